@@ -0,0 +1,111 @@
+"""Query latency of the sparse (BM25 / SQLite FTS5) side of hybrid retrieval.
+
+Fills a BM25Index with synthetic chunks whose words follow a Zipf
+distribution, like real prose, then times BM25Index.search for queries of
+2-8 terms mixing frequent, mid-frequency and rare words plus stopwords.
+Exits with status 1 when the p95 latency misses --target-p95-ms.
+
+    python -m benchmarks.bm25_search --chunks 200000 --output results/bm25_search.json
+"""
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.pipeline import environment, percentiles
+from src.services.bm25 import STOPWORDS, BM25Index
+
+
+def vocabulary(size: int, rng: random.Random) -> List[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(3, 10))))
+    return sorted(words)
+
+
+def zipf_weights(size: int, exponent: float = 1.1) -> List[float]:
+    return [1.0 / (rank ** exponent) for rank in range(1, size + 1)]
+
+
+def build_index(
+    index: BM25Index, words: List[str], weights: List[float], chunks: int, chunk_words: int, rng: random.Random
+) -> float:
+    started = time.perf_counter()
+    batch = 2000
+    for start in range(0, chunks, batch):
+        count = min(batch, chunks - start)
+        texts = [" ".join(rng.choices(words, weights, k=chunk_words)) for _ in range(count)]
+        index.add([f"chunk-{start + i}" for i in range(count)], texts, [{"source": f"doc-{(start + i) // 40}"} for i in range(count)])
+    index.optimize()
+    return time.perf_counter() - started
+
+
+def make_queries(words: List[str], count: int, rng: random.Random) -> List[str]:
+    stopwords = sorted(STOPWORDS)
+    frequent, middle, rare = words[:50], words[50:5000], words[5000:]
+    queries = []
+    for _ in range(count):
+        terms = [rng.choice(frequent)] + [rng.choice(middle) for _ in range(rng.randint(1, 4))]
+        terms += [rng.choice(rare) for _ in range(rng.randint(0, 2))] + rng.sample(stopwords, 2)
+        rng.shuffle(terms)
+        queries.append(" ".join(terms))
+    return queries
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=200000)
+    parser.add_argument("--chunk-words", type=int, default=150, help="about a 1000-character chunk")
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=20, help="RETRIEVER_FETCH_K")
+    parser.add_argument("--target-p95-ms", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = vocabulary(args.vocabulary, rng)
+    workdir = tempfile.mkdtemp(prefix="bench-bm25-")
+    try:
+        index = BM25Index(os.path.join(workdir, "bm25.sqlite3"))
+        build_seconds = build_index(index, words, zipf_weights(len(words)), args.chunks, args.chunk_words, rng)
+        queries = make_queries(words, args.queries, rng)
+
+        for query in queries[:20]:
+            index.search(query, args.k)
+        latencies = []
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query, args.k)
+            latencies.append(time.perf_counter() - started)
+        index_bytes = sum(os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results: Dict[str, Any] = {
+        "chunks": args.chunks,
+        "build_seconds": round(build_seconds, 2),
+        "index_mib": round(index_bytes / 2 ** 20, 1),
+        "queries": len(queries),
+        **percentiles(latencies),
+    }
+    results["meets_target"] = results["p95_ms"] <= args.target_p95_ms
+    print(json.dumps(results))
+
+    report = {"parameters": vars(args), "environment": environment(), "results": results}
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0 if results["meets_target"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
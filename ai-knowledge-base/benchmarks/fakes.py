@@ -0,0 +1,171 @@
+"""Deterministic, offline stand-ins for Gemini, the embedding API and Docling.
+
+The fakes sleep for a configurable time to model network and model
+latency, so benchmarks exercise the same concurrency and batching as the
+real backends without calling them.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+import asyncio
+import hashlib
+import random
+import time
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+
+from src.services.converter_pool import ConverterPool
+from src.services.embeddings import LocalHashEmbeddings
+from src.services.format_router import PageRange, RouterSettings, classify_pdf_pages, pdf_text_document, text_document
+
+# Words the fake LLM builds its answers from
+VOCABULARY = (
+    "the project team will deliver a scalable platform with clear milestones secure integration "
+    "reliable testing phased rollout stakeholder review budget timeline architecture service data "
+    "pipeline document quality support maintenance deployment api users requirements scope"
+).split()
+
+
+class FakeEmbeddings(Embeddings):
+    """Hashing-trick vectors returned after `latency_ms` per request plus `per_text_ms` per text"""
+
+    def __init__(self, dimensions: int = 768, latency_ms: float = 0.0, per_text_ms: float = 0.0) -> None:
+        self._local = LocalHashEmbeddings(dimensions)
+        self.dimensions = dimensions
+        self.latency_ms = latency_ms
+        self.per_text_ms = per_text_ms
+        self.requests = 0
+
+    def _wait(self, texts: int) -> None:
+        delay = (self.latency_ms + self.per_text_ms * texts) / 1000
+        if delay > 0:
+            time.sleep(delay)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.requests += 1
+        self._wait(len(texts))
+        return self._local.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        self.requests += 1
+        self._wait(1)
+        return self._local.embed_query(text)
+
+
+class FakeLLM(LLM):
+    """LLM answering with text derived from a hash of the prompt.
+
+    The first token arrives after `first_token_ms`, the rest at
+    `tokens_per_second`; the same prompt always gets the same answer.
+    """
+
+    first_token_ms: float = 300.0
+    tokens_per_second: float = 80.0
+    answer_tokens: int = 120
+    # Tokens per streamed chunk; Gemini streams a few words at a time
+    chunk_tokens: int = 8
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {
+            "first_token_ms": self.first_token_ms,
+            "tokens_per_second": self.tokens_per_second,
+            "answer_tokens": self.answer_tokens,
+        }
+
+    def _chunks(self, prompt: str) -> List[str]:
+        seed = int.from_bytes(hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).digest(), "little")
+        rng = random.Random(seed)
+        words = [rng.choice(VOCABULARY) for _ in range(self.answer_tokens)]
+        return [" ".join(words[i:i + self.chunk_tokens]) + " " for i in range(0, len(words), self.chunk_tokens)]
+
+    def _delays(self, chunks: List[str]) -> Iterator[float]:
+        for index, chunk in enumerate(chunks):
+            tokens = len(chunk.split())
+            yield (self.first_token_ms / 1000 if index == 0 else 0.0) + tokens / self.tokens_per_second
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        return "".join(chunk.text for chunk in self._stream(prompt, stop, run_manager, **kwargs))
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        return "".join([chunk.text async for chunk in self._astream(prompt, stop, run_manager, **kwargs)])
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[GenerationChunk]:
+        chunks = self._chunks(prompt)
+        for chunk, delay in zip(chunks, self._delays(chunks)):
+            time.sleep(delay)
+            yield GenerationChunk(text=chunk)
+
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[GenerationChunk]:
+        chunks = self._chunks(prompt)
+        for chunk, delay in zip(chunks, self._delays(chunks)):
+            await asyncio.sleep(delay)
+            yield GenerationChunk(text=chunk)
+
+
+@dataclass
+class FakeConversionResult:
+    document: Any
+
+
+class FakeConverter:
+    """Docling stand-in: text layer of PDFs, plain text otherwise, after `page_ms` per page"""
+
+    def __init__(self, page_ms: float = 0.0) -> None:
+        self.page_ms = page_ms
+
+    def convert(self, source: Any, page_range: Optional[PageRange] = None, **kwargs: Any) -> FakeConversionResult:
+        path = str(source)
+        name = Path(path).stem
+        with open(path, "rb") as f:
+            is_pdf = f.read(5) == b"%PDF-"
+        if is_pdf:
+            pages = classify_pdf_pages(path, RouterSettings(), page_range)
+            document = pdf_text_document(name, pages)
+        else:
+            pages = [path]
+            document = text_document(name, Path(path).read_text(encoding="utf-8", errors="replace"))
+        time.sleep(self.page_ms * len(pages) / 1000)
+        return FakeConversionResult(document)
+
+
+class FakeConverterPool(ConverterPool):
+    """ConverterPool handing out FakeConverters, so warm-up loads no models"""
+
+    def __init__(self, size: int = 1, page_ms: float = 0.0) -> None:
+        super().__init__(size)
+        self.page_ms = page_ms
+
+    def _new_converter(self) -> FakeConverter:
+        return FakeConverter(self.page_ms)
@@ -0,0 +1,669 @@
+"""HTTP load test of every route in routes.py against stubbed model backends.
+
+Serves the FastAPI app with uvicorn on a background thread, with Gemini,
+the embedding API and Docling replaced by the fakes of benchmarks/fakes.py
+and every store under a temporary directory. Concurrent clients then send
+a weighted mix of uploads, generate, validate, template, job and metrics
+calls for a fixed duration, either as fast as the server answers or at a
+fixed arrival --rate. The report has throughput, latency and time to first
+byte percentiles and error rates per scenario, the server's event-loop lag,
+and every route whose handler blocked the loop for longer than
+--block-threshold-ms, with the line of code that did it.
+
+The clients run in a separate process so they do not compete with the
+server for the GIL; both still share the machine, so the numbers are for
+comparing commits on one machine rather than for capacity planning.
+
+    python -m benchmarks.load --duration 60 --concurrency 32
+    python -m benchmarks.load --mix validate=10,proposal=2 --rate 50 --output results/load.json
+    python -m benchmarks.load --fail-on-block    # exit status 1 when a handler blocked the loop
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import concurrent.futures
+import io
+import json
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from benchmarks.fakes import VOCABULARY, FakeConverterPool, FakeEmbeddings, FakeLLM
+from benchmarks.loop_monitor import LoopLagMonitor, RequestContextMiddleware, summarize_stalls
+from benchmarks.pipeline import compare, environment, peak_rss_mib, percentiles, sample_sentences, write_text_pdf
+
+# Scenario name -> relative weight in the default traffic mix
+DEFAULT_MIX = {
+    "upload_transcript": 2.0,
+    "upload_codebase": 1.0,
+    "upload_wireframe": 1.0,
+    "proposal": 1.0,
+    "technical_doc": 1.0,
+    "jira_ticket": 1.0,
+    "validate": 6.0,
+    "validate_batch": 0.5,
+    "templates": 2.0,
+    "jobs": 3.0,
+    "metrics": 0.5,
+    "root": 0.5,
+}
+
+
+@dataclass
+class Call:
+    """One request of a scenario; `route` is the template it hits, for the coverage report"""
+    label: str
+    method: str
+    route: str
+    url: str
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    on_response: Optional[Callable[[int, bytes], None]] = None
+
+
+def configure_environment(workdir: str, llm_review: bool) -> None:
+    """Point every store of the app at `workdir` and keep it offline"""
+    os.environ.update({
+        "VECTOR_BACKEND": "local",
+        "CHROMA_PERSIST_DIR": os.path.join(workdir, "store"),
+        "EMBED_CACHE_PATH": "",
+        "JOBS_DB_PATH": os.path.join(workdir, "jobs.sqlite3"),
+        "JOBS_RETRY_BACKOFF_SECONDS": "1",
+        "UPLOAD_SPOOL_DIR": os.path.join(workdir, "uploads"),
+        "WIREFRAME_IMAGE_DIR": os.path.join(workdir, "wireframes"),
+        "VALIDATION_LLM_REVIEW": "true" if llm_review else "false",
+    })
+    os.environ.pop("GOOGLE_API_KEY", None)
+
+
+def install_fakes(args: argparse.Namespace) -> None:
+    """Make the app's process-wide LLM, embeddings and converter pool the benchmark fakes.
+
+    The getters only build their singleton when none is set, so setting it
+    first is enough; nothing else in the app changes.
+    """
+    import src.services.converter_pool as converter_pool
+    import src.services.embeddings as embeddings
+    import src.services.llm as llm
+    from src.services.embeddings import EmbeddingService
+
+    llm._llm = FakeLLM(
+        first_token_ms=args.llm_first_token_ms,
+        tokens_per_second=args.llm_tokens_per_second,
+        answer_tokens=args.llm_answer_tokens,
+    )
+    embeddings._embeddings = EmbeddingService(
+        FakeEmbeddings(args.dim, args.embed_latency_ms, args.embed_per_text_ms),
+        model_name=f"fake-{args.dim}",
+        cache=None,
+        requests_per_second=1000.0,
+    )
+    converter_pool._pool = FakeConverterPool(page_ms=args.convert_page_ms)
+
+
+class Payloads:
+    """Request bodies built before the run, so clients spend no time generating them"""
+
+    def __init__(self, rng: random.Random, sentences: List[str], workdir: str, pool_size: int = 16) -> None:
+        self.sentences = sentences
+        self.transcripts = [self._transcript(rng, i) for i in range(pool_size)]
+        self.codebases = [self._codebase(rng, i) for i in range(pool_size)]
+        # Few enough images that some uploads are perceptual duplicates of earlier ones
+        self.wireframes = [self._png(rng, i) for i in range(pool_size)] + [self._pdf(rng, workdir)]
+
+    def sentence(self, rng: random.Random) -> str:
+        return rng.choice(self.sentences)
+
+    def _transcript(self, rng: random.Random, index: int) -> Tuple[str, bytes, str]:
+        speakers = ["Alice", "Bob", "Priya", "Chen"]
+        if index % 2:
+            lines = [
+                f"{rng.choice(speakers)}: {' '.join(self.sentence(rng) for _ in range(rng.randint(1, 3)))}"
+                for _ in range(rng.randint(40, 120))
+            ]
+            return f"meeting-{index}.txt", "\n".join(lines).encode("utf-8"), "text/plain"
+
+        cues, start = ["WEBVTT", ""], 0.0
+        for _ in range(rng.randint(40, 120)):
+            end = start + rng.uniform(2, 12)
+            cues += [
+                f"{_vtt_time(start)} --> {_vtt_time(end)}",
+                f"<v {rng.choice(speakers)}>{self.sentence(rng)}",
+                "",
+            ]
+            start = end
+        return f"meeting-{index}.vtt", "\n".join(cues).encode("utf-8"), "text/vtt"
+
+    def _codebase(self, rng: random.Random, index: int) -> List[Tuple[str, bytes, str]]:
+        files = []
+        for n in range(rng.randint(2, 5)):
+            functions = [
+                f"def {rng.choice(VOCABULARY)}_{i}(value):\n"
+                f"    \"\"\"{self.sentence(rng)}\"\"\"\n"
+                f"    return value * {i} + {rng.randint(0, 99)}\n"
+                for i in range(rng.randint(5, 30))
+            ]
+            files.append((f"module_{index}_{n}.py", "\n\n".join(functions).encode("utf-8"), "text/x-python"))
+        return files
+
+    def _png(self, rng: random.Random, index: int) -> Tuple[str, bytes, str]:
+        from PIL import Image, ImageDraw
+
+        width, height = rng.choice([(1280, 800), (1440, 900), (1920, 1080), (800, 2400)])
+        image = Image.new("RGB", (width, height), "white")
+        draw = ImageDraw.Draw(image)
+        for _ in range(rng.randint(10, 40)):
+            x, y = rng.randrange(width - 40), rng.randrange(height - 40)
+            box = (x, y, min(width, x + rng.randint(40, 400)), min(height, y + rng.randint(20, 200)))
+            draw.rectangle(box, outline="black", fill=rng.choice(["white", "#eeeeee", "#cce5ff", "#dddddd"]))
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        return f"wireframe-{index}.png", buffer.getvalue(), "image/png"
+
+    def _pdf(self, rng: random.Random, workdir: str) -> Tuple[str, bytes, str]:
+        path = os.path.join(workdir, "wireframe.pdf")
+        write_text_pdf(path, [[self.sentence(rng)[:90] for _ in range(30)] for _ in range(3)])
+        with open(path, "rb") as f:
+            return "wireframe.pdf", f.read(), "application/pdf"
+
+
+def _vtt_time(seconds: float) -> str:
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
+
+
+class Traffic:
+    """Builds the calls of each scenario; holds what later calls reuse (job IDs, validated documents)"""
+
+    def __init__(self, payloads: Payloads, stream_share: float, validate_documents: int, batch_size: int) -> None:
+        from src.modules.templates.controller import DOCUMENT_TEMPLATES, PROPOSAL_SECTIONS
+
+        self.payloads = payloads
+        self.stream_share = stream_share
+        self.batch_size = batch_size
+        self.job_ids: Deque[str] = deque(maxlen=256)
+        self.doc_types = sorted(DOCUMENT_TEMPLATES)
+
+        # (document type, template, content keys) of every template the validator knows
+        self.templates: List[Tuple[str, str, List[str]]] = []
+        for doc_type, variants in sorted(DOCUMENT_TEMPLATES.items()):
+            for name, template in sorted(variants.items()):
+                keys = template.get("fields") or [
+                    PROPOSAL_SECTIONS.get(section, (section,))[0] if doc_type == "proposal" else section
+                    for section in template.get("sections", [])
+                ]
+                self.templates.append((doc_type, name, keys))
+
+        rng = random.Random(1)
+        self.documents: Dict[str, Tuple[str, str, Dict[str, Any]]] = {}
+        for index in range(validate_documents):
+            doc_type, template, keys = self.templates[index % len(self.templates)]
+            content = {key: payloads.sentence(rng) for key in keys}
+            self.documents[f"doc-{index}"] = (doc_type, template, content)
+
+        self.builders: Dict[str, Callable[[random.Random], Call]] = {
+            "upload_transcript": self.upload_transcript,
+            "upload_codebase": self.upload_codebase,
+            "upload_wireframe": self.upload_wireframe,
+            "proposal": self.proposal,
+            "technical_doc": self.technical_doc,
+            "jira_ticket": self.jira_ticket,
+            "validate": self.validate,
+            "validate_batch": self.validate_batch,
+            "templates": self.templates_call,
+            "jobs": self.jobs,
+            "metrics": lambda rng: Call("metrics", "GET", "/metrics", "/metrics"),
+            "root": lambda rng: Call("root", "GET", "/", "/"),
+        }
+
+    def _remember_job(self, status: int, body: bytes) -> None:
+        if status == 202:
+            self.job_ids.append(json.loads(body)["job_id"])
+
+    def upload_transcript(self, rng: random.Random) -> Call:
+        name, data, content_type = rng.choice(self.payloads.transcripts)
+        return Call("upload_transcript", "POST", "/upload/transcript", "/upload/transcript",
+                    {"files": {"file": (name, data, content_type)}}, self._remember_job)
+
+    def upload_codebase(self, rng: random.Random) -> Call:
+        files = [("files", item) for item in rng.choice(self.payloads.codebases)]
+        data = {"project_name": f"project-{rng.randrange(4)}", "language": "python"}
+        return Call("upload_codebase", "POST", "/upload/codebase", "/upload/codebase",
+                    {"files": files, "data": data}, self._remember_job)
+
+    def upload_wireframe(self, rng: random.Random) -> Call:
+        name, data, content_type = rng.choice(self.payloads.wireframes)
+        return Call("upload_wireframe", "POST", "/upload/wireframe", "/upload/wireframe",
+                    {"files": {"file": (name, data, content_type)}}, self._remember_job)
+
+    def _generate(self, rng: random.Random, name: str, path: str, body: Dict[str, Any]) -> Call:
+        stream = rng.random() < self.stream_share
+        label = f"{name}:stream" if stream else name
+        return Call(label, "POST", path, path, {"json": body, "params": {"stream": str(stream).lower()}})
+
+    def proposal(self, rng: random.Random) -> Call:
+        return self._generate(rng, "proposal", "/generate/proposal", {
+            "client_name": f"Client {rng.randrange(1000)}",
+            "project_description": self.payloads.sentence(rng),
+            "requirements": [self.payloads.sentence(rng)[:60] for _ in range(rng.randint(2, 5))],
+            "budget_range": "$50k-$80k",
+            "timeline": f"{rng.randint(2, 9)} months",
+            "template_type": rng.choice(["standard", "technical"]),
+        })
+
+    def technical_doc(self, rng: random.Random) -> Call:
+        return self._generate(rng, "technical_doc", "/generate/technical-doc", {
+            "project_name": f"Project {rng.randrange(100)}",
+            "doc_type": rng.choice(["api", "architecture", "user_guide", "technical_spec"]),
+            "additional_context": self.payloads.sentence(rng),
+        })
+
+    def jira_ticket(self, rng: random.Random) -> Call:
+        return self._generate(rng, "jira_ticket", "/generate/jira-ticket", {
+            "ticket_type": rng.choice(["story", "task", "bug", "epic"]),
+            "summary": self.payloads.sentence(rng)[:80],
+            "description": self.payloads.sentence(rng),
+            "components": ["api", "frontend"],
+        })
+
+    def _edit(self, rng: random.Random, doc_id: str) -> Dict[str, Any]:
+        """The document with one section rewritten (or cleared), as an editor would between validations"""
+        doc_type, template, content = self.documents[doc_id]
+        content = dict(content)
+        key = rng.choice(sorted(content))
+        content[key] = "" if rng.random() < 0.1 else self.payloads.sentence(rng)
+        self.documents[doc_id] = (doc_type, template, content)
+        return {"document_type": doc_type, "template": template, "content": content}
+
+    def validate(self, rng: random.Random) -> Call:
+        doc_id = rng.choice(sorted(self.documents))
+        return Call("validate", "POST", "/validate/{doc_id}", f"/validate/{doc_id}", {"json": self._edit(rng, doc_id)})
+
+    def validate_batch(self, rng: random.Random) -> Call:
+        doc_ids = rng.sample(sorted(self.documents), min(self.batch_size, len(self.documents)))
+        documents = [{"doc_id": doc_id, **self._edit(rng, doc_id)} for doc_id in doc_ids]
+        return Call("validate_batch", "POST", "/validate/batch", "/validate/batch", {"json": {"documents": documents}})
+
+    def templates_call(self, rng: random.Random) -> Call:
+        if rng.random() < 0.3:
+            return Call("templates", "GET", "/templates/", "/templates/")
+        doc_type = rng.choice(self.doc_types)
+        return Call("templates", "GET", "/templates/{doc_type}", f"/templates/{doc_type}")
+
+    def jobs(self, rng: random.Random) -> Call:
+        if self.job_ids and rng.random() < 0.8:
+            job_id = rng.choice(self.job_ids)
+            return Call("jobs", "GET", "/jobs/{job_id}", f"/jobs/{job_id}")
+        return Call("jobs", "GET", "/jobs/", "/jobs/", {"params": {"limit": 20}})
+
+
+class Recorder:
+    """Latencies, time to first byte and outcomes per scenario label"""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = {}
+        self.first_bytes: Dict[str, List[float]] = {}
+        self.outcomes: Dict[str, Dict[str, int]] = {}
+        self.routes: Dict[Tuple[str, str], int] = {}
+        self.seconds = 0.0
+
+    def record(self, call: Call, outcome: str, latency: float, first_byte: Optional[float]) -> None:
+        self.latencies.setdefault(call.label, []).append(latency)
+        if first_byte is not None:
+            self.first_bytes.setdefault(call.label, []).append(first_byte)
+        outcomes = self.outcomes.setdefault(call.label, {})
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        key = (call.method, call.route)
+        self.routes[key] = self.routes.get(key, 0) + 1
+
+    @staticmethod
+    def _errors(outcomes: Dict[str, int]) -> int:
+        # Anything but a 2xx/3xx status counts, including client-side timeouts and connection errors
+        return sum(count for outcome, count in outcomes.items() if not outcome[:1] in ("2", "3"))
+
+    def summary(self) -> Dict[str, Any]:
+        scenarios = {}
+        for label in sorted(self.latencies):
+            outcomes = self.outcomes[label]
+            requests = len(self.latencies[label])
+            errors = self._errors(outcomes)
+            scenarios[label] = {
+                "requests": requests,
+                "requests_per_second": round(requests / self.seconds, 2) if self.seconds else 0.0,
+                "errors": errors,
+                "error_rate": round(errors / requests, 4),
+                "outcomes": dict(sorted(outcomes.items())),
+                "latency": percentiles(self.latencies[label]),
+                "first_byte": percentiles(self.first_bytes[label]) if label in self.first_bytes else None,
+            }
+        requests = sum(len(latencies) for latencies in self.latencies.values())
+        errors = sum(self._errors(outcomes) for outcomes in self.outcomes.values())
+        all_latencies = [latency for latencies in self.latencies.values() for latency in latencies]
+        return {
+            "seconds": round(self.seconds, 2),
+            "requests": requests,
+            "requests_per_second": round(requests / self.seconds, 2) if self.seconds else 0.0,
+            "errors": errors,
+            "error_rate": round(errors / requests, 4) if requests else 0.0,
+            "latency": percentiles(all_latencies) if all_latencies else None,
+            "scenarios": scenarios,
+        }
+
+
+async def execute(client: httpx.AsyncClient, call: Call, recorder: Recorder, started: Optional[float] = None) -> None:
+    """Send `call` and read the whole body; latency counts from `started` (the scheduled time) when given"""
+    started = started if started is not None else time.perf_counter()
+    first_byte = None
+    body = bytearray()
+    try:
+        async with client.stream(call.method, call.url, **call.kwargs) as response:
+            async for chunk in response.aiter_raw():
+                if first_byte is None:
+                    first_byte = time.perf_counter() - started
+                body += chunk
+        outcome = str(response.status_code)
+    except httpx.HTTPError as e:
+        outcome = type(e).__name__
+    recorder.record(call, outcome, time.perf_counter() - started, first_byte)
+    if call.on_response is not None and outcome.isdigit():
+        call.on_response(int(outcome), bytes(body))
+
+
+def _picker(traffic: Traffic, mix: Dict[str, float]) -> Callable[[random.Random], Call]:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    return lambda rng: traffic.builders[rng.choices(names, weights)[0]](rng)
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    pick: Callable[[random.Random], Call],
+    recorder: Recorder,
+    seconds: float,
+    concurrency: int,
+    rate: Optional[float],
+    seed: int,
+) -> None:
+    """Send calls for `seconds`: `concurrency` clients back to back, or arrivals at `rate` per second.
+
+    With a rate, latency counts from the time a request was due, so waiting
+    for a free connection when the server falls behind shows up in the tail.
+    """
+    started = time.perf_counter()
+    deadline = started + seconds
+
+    if not rate:
+        async def worker(index: int) -> None:
+            rng = random.Random(seed * 1000 + index)
+            while time.perf_counter() < deadline:
+                await execute(client, pick(rng), recorder)
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    else:
+        rng = random.Random(seed)
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = set()
+
+        async def limited(call: Call, due: float) -> None:
+            async with semaphore:
+                await execute(client, call, recorder, started=due)
+
+        sent = 0
+        while True:
+            due = started + sent / rate
+            if due >= deadline:
+                break
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            task = asyncio.create_task(limited(pick(rng), due))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            sent += 1
+        await asyncio.gather(*list(tasks))
+    recorder.seconds = time.perf_counter() - started
+
+
+class ServerThread:
+    """The app served by uvicorn on its own event loop in a background thread"""
+
+    def __init__(self, app: Any, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((host, port))
+        self.server = uvicorn.Server(uvicorn.Config(app, lifespan="on", log_level="warning"))
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._serve, name="load-test-server", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.socket.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def _serve(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.server.serve(sockets=[self.socket]))
+
+    def start(self, timeout: float = 120.0) -> None:
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("Server did not start; see the log above")
+            time.sleep(0.05)
+
+    def submit(self, coro: Any) -> concurrent.futures.Future:
+        """Run a coroutine on the server's event loop"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self._thread.join()
+
+
+async def _run_clients(url: str, pick: Callable[[random.Random], Call], args: argparse.Namespace, warmed: Any) -> Recorder:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        if args.warmup > 0:
+            await drive(client, pick, Recorder(), args.warmup, args.concurrency, args.rate, args.seed + 1)
+        warmed.set()
+        recorder = Recorder()
+        await drive(client, pick, recorder, args.duration, args.concurrency, args.rate, args.seed)
+        return recorder
+
+
+def _client_process(
+    url: str, args: argparse.Namespace, mix: Dict[str, float], workdir: str, warmed: Any, results: Any
+) -> None:
+    """Load generator; runs in its own process and sends back its Recorder"""
+    payloads = Payloads(random.Random(args.seed), sample_sentences(args.samples), workdir)
+    traffic = Traffic(payloads, args.stream_share, args.validate_documents, args.batch_size)
+    results.put(asyncio.run(_run_clients(url, _picker(traffic, mix), args, warmed)))
+
+
+def run_clients(
+    url: str, args: argparse.Namespace, mix: Dict[str, float], workdir: str, on_warm: Callable[[], None]
+) -> Recorder:
+    # Spawned rather than forked: the server threads and their SQLite connections must not be copied
+    context = multiprocessing.get_context("spawn")
+    warmed, results = context.Event(), context.Queue()
+    client = context.Process(
+        target=_client_process, args=(url, args, mix, workdir, warmed, results), name="load-test-client", daemon=True
+    )
+    client.start()
+    try:
+        while not warmed.wait(0.5):
+            if not client.is_alive():
+                raise RuntimeError(f"Load test client exited with status {client.exitcode}")
+        on_warm()
+        while True:
+            try:
+                return results.get(timeout=0.5)
+            except queue.Empty:
+                if not client.is_alive():
+                    raise RuntimeError(f"Load test client exited with status {client.exitcode}")
+    finally:
+        client.join(timeout=10)
+        if client.is_alive():
+            client.terminate()
+
+
+def route_coverage(app: Any, recorder: Recorder) -> Dict[str, Any]:
+    """Routes of the app's OpenAPI schema that the traffic mix never called"""
+    routes = {
+        (method.upper(), path)
+        for path, operations in app.openapi()["paths"].items()
+        for method in operations
+    }
+    exercised = routes & set(recorder.routes)
+    return {
+        "routes": len(routes),
+        "exercised": len(exercised),
+        "unexercised": [f"{method} {path}" for method, path in sorted(routes - exercised)],
+    }
+
+
+def job_counts() -> Dict[str, int]:
+    from src.services.jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, get_job_queue
+
+    store = get_job_queue().store
+    return {status: len(store.list(status=status, limit=1_000_000)) for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)}
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, weight = item.partition("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown scenario '{name}'. Available: {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def print_report(results: Dict[str, Any], threshold_ms: float) -> None:
+    load = results["load"]
+    print(f"\n{load['requests']} request(s) in {load['seconds']}s: {load['requests_per_second']}/s, "
+          f"error rate {load['error_rate']:.2%}")
+    print(f"  {'scenario':<24} {'requests':>8} {'rps':>8} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'max ms':>9} {'ttfb p50':>9}")
+    for label, stats in load["scenarios"].items():
+        latency = stats["latency"]
+        first_byte = stats["first_byte"]["p50_ms"] if stats["first_byte"] else float("nan")
+        print(f"  {label:<24} {stats['requests']:>8} {stats['requests_per_second']:>8} {stats['errors']:>7} "
+              f"{latency['p50_ms']:>9.1f} {latency['p95_ms']:>9.1f} {latency['p99_ms']:>9.1f} "
+              f"{latency['max_ms']:>9.1f} {first_byte:>9.1f}")
+
+    lag = results["loop_lag"]
+    print(f"\nEvent-loop lag: p50 {lag['p50_ms']} ms, p99 {lag['p99_ms']} ms, max {lag['max_ms']} ms; "
+          f"{lag['stalls']} stall(s) of {threshold_ms:g} ms or more")
+    for route, stats in results["blocking_handlers"].items():
+        locations = ", ".join(f"{location} (x{count})" for location, count in stats["locations"].items())
+        label = f"BLOCKING {route}" if route != "-" else "outside requests"
+        print(f"  {label}: {stats['stalls']} stall(s), max {stats['max_ms']} ms, "
+              f"{stats['cpu_share']:.0%} on the loop's CPU, at {locations}")
+
+    coverage = results["coverage"]
+    print(f"\nRoutes exercised: {coverage['exercised']}/{coverage['routes']}")
+    for route in coverage["unexercised"]:
+        print(f"  not exercised: {route}")
+    print(f"Background jobs: {results['jobs']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of load before measuring")
+    parser.add_argument("--concurrency", type=int, default=16, help="clients, or connections with --rate")
+    parser.add_argument("--rate", type=float, default=0.0, help="requests per second (open loop); 0 = closed loop")
+    parser.add_argument("--mix", type=parse_mix, default=None,
+                        help=f"scenario=weight,...; default {','.join(f'{k}={v:g}' for k, v in DEFAULT_MIX.items())}")
+    parser.add_argument("--stream-share", type=float, default=0.5, help="share of generate calls with ?stream=true")
+    parser.add_argument("--validate-documents", type=int, default=200, help="documents the validate calls edit")
+    parser.add_argument("--batch-size", type=int, default=50, help="documents per /validate/batch call")
+    parser.add_argument("--llm-review", action="store_true", help="turn on VALIDATION_LLM_REVIEW")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--block-threshold-ms", type=float, default=50.0)
+    parser.add_argument("--lag-interval-ms", type=float, default=10.0)
+    parser.add_argument("--fail-on-block", action="store_true", help="exit with status 1 when a handler blocked the loop")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--embed-latency-ms", type=float, default=40.0, help="per embedding request")
+    parser.add_argument("--embed-per-text-ms", type=float, default=0.2)
+    parser.add_argument("--convert-page-ms", type=float, default=200.0, help="fake Docling time per page")
+    parser.add_argument("--llm-first-token-ms", type=float, default=300.0)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--llm-answer-tokens", type=int, default=120)
+    parser.add_argument("--samples", default="Uploads/*.pdf", help="PDFs whose sentences fill the payloads")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="")
+    parser.add_argument("--compare", default="", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+    mix = args.mix or DEFAULT_MIX
+
+    workdir = tempfile.mkdtemp(prefix="bench-load-")
+    try:
+        configure_environment(workdir, args.llm_review)
+        install_fakes(args)
+        from main import app
+
+        app.add_middleware(RequestContextMiddleware)
+
+        server = ServerThread(app)
+        server.start()
+        monitor = LoopLagMonitor(args.lag_interval_ms / 1000, args.block_threshold_ms / 1000)
+        monitoring = server.submit(monitor.run())
+        try:
+            recorder = run_clients(server.url, args, mix, workdir, on_warm=monitor.reset)
+        finally:
+            monitor.stop()
+            monitoring.result(timeout=10)
+            jobs = job_counts()
+            server.stop()
+
+        lags = monitor.lags or [0.0]
+        results = {
+            "load": recorder.summary(),
+            "loop_lag": {
+                "samples": len(monitor.lags),
+                **percentiles(lags),
+                "stalls": len(monitor.stalls),
+                "stalled_seconds": round(sum(stall.lag_seconds for stall in monitor.stalls), 3),
+            },
+            "blocking_handlers": summarize_stalls(monitor.stalls),
+            "coverage": route_coverage(app, recorder),
+            "jobs": jobs,
+            "peak_rss_mib": peak_rss_mib(),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(results, args.block_threshold_ms)
+    report = {"parameters": vars(args), "environment": environment(), "results": results}
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nAgainst {args.compare} (commit {baseline.get('environment', {}).get('commit')}):")
+        for row in compare(baseline, report):
+            change = "n/a" if row["change_pct"] is None else f"{row['change_pct']:+.1f}%"
+            print(f"  {row['metric']:<60} {row['baseline']:>12g} -> {row['current']:>12g}  {change}")
+
+    blocked = [route for route in results["blocking_handlers"] if route != "-"]
+    return 1 if args.fail_on_block and blocked else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""Event-loop lag measurement with attribution of stalls to requests.
+
+A task on the monitored loop sleeps for `interval` and records how late it
+wakes up: any callback or coroutine step that runs without yielding delays
+it. While the loop is late, a watchdog thread samples the loop thread's
+stack and the request whose task is running, so every stall longer than
+`threshold` is reported with the route and the line of code that held the
+loop, and with the CPU time the loop thread used meanwhile: a high share
+means the handler computed on the loop, a low one that it waited (blocking
+I/O, sleep) or that other threads held the GIL or the CPU.
+"""
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import os
+import sys
+import threading
+import time
+import weakref
+
+from src.services.metrics import route_template
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_BENCHMARKS_DIR = os.path.join(PROJECT_ROOT, "benchmarks")
+
+# ASGI scope of the request the current task works for; inherited by the tasks it creates
+_current_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar("current_scope", default=None)
+
+
+@dataclass
+class Stall:
+    lag_seconds: float
+    # Share of the late sleep the loop thread spent on the CPU
+    cpu_share: float
+    # "POST /upload/transcript", or "-" when no request task was running
+    route: str
+    # Innermost frame of the application's own code, e.g. "src/services/uploads.py:83 in spool_upload"
+    location: Optional[str]
+    # Innermost frames of the loop thread at sampling time, outermost first
+    stack: List[str] = field(default_factory=list)
+
+
+class RequestContextMiddleware:
+    """ASGI middleware making each HTTP request visible to the LoopLagMonitor"""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_scope.set(scope)
+        task = asyncio.current_task()
+        if task is not None:
+            _task_scopes[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_scope.reset(token)
+
+
+# Request scope per task; `Task.get_context()` would do but needs Python 3.12
+_task_scopes: "weakref.WeakKeyDictionary[asyncio.Task, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+
+def _task_factory(loop: asyncio.AbstractEventLoop, coro: Any, **kwargs: Any) -> asyncio.Task:
+    task = asyncio.Task(coro, loop=loop, **kwargs)
+    scope = _current_scope.get()
+    if scope is not None:
+        _task_scopes[task] = scope
+    return task
+
+
+def _frame_label(filename: str, lineno: int, name: str) -> str:
+    if filename.startswith(PROJECT_ROOT + os.sep):
+        filename = os.path.relpath(filename, PROJECT_ROOT)
+    return f"{filename}:{lineno} in {name}"
+
+
+class LoopLagMonitor:
+    """Samples the lag of the event loop it runs on every `interval` seconds.
+
+    Start it with `run()` on the loop to watch (from another thread:
+    `asyncio.run_coroutine_threadsafe(monitor.run(), loop)`) and end it with
+    `stop()`.
+    """
+
+    def __init__(self, interval: float = 0.01, threshold: float = 0.1, stack_depth: int = 8) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_depth = stack_depth
+        self.lags: List[float] = []
+        self.stalls: List[Stall] = []
+        # (tick, time the current sleep should end); replaced as a whole so the watchdog reads a consistent pair
+        self._pending: Optional[Tuple[int, float]] = None
+        self._samples: Dict[int, Tuple[str, Optional[str], List[str]]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_id: Optional[int] = None
+        self._stopped = threading.Event()
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        previous_factory = self._loop.get_task_factory()
+        self._loop.set_task_factory(_task_factory)
+        watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        watchdog.start()
+        tick = 0
+        try:
+            while not self._stopped.is_set():
+                tick += 1
+                cpu_started, started = time.thread_time(), time.perf_counter()
+                self._pending = (tick, started + self.interval)
+                await asyncio.sleep(self.interval)
+                elapsed = time.perf_counter() - started
+                lag = max(0.0, elapsed - self.interval)
+                cpu_share = min(1.0, (time.thread_time() - cpu_started) / elapsed)
+                self.lags.append(lag)
+                sample = self._samples.pop(tick, None)
+                if self._samples:
+                    # Taken by the watchdog just after the tick they belong to ended
+                    for stale in [t for t in list(self._samples) if t < tick]:
+                        self._samples.pop(stale, None)
+                if lag >= self.threshold:
+                    route, location, stack = sample or ("-", None, [])
+                    self.stalls.append(Stall(lag, cpu_share, route, location, stack))
+        finally:
+            self._stopped.set()
+            self._pending = None
+            self._loop.set_task_factory(previous_factory)
+            watchdog.join()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def reset(self) -> None:
+        """Forget the samples so far, e.g. the ones taken during warm-up"""
+        self.lags = []
+        self.stalls = []
+
+    def _watch(self) -> None:
+        # Check a few times per threshold so a stall is sampled while it is happening
+        while not self._stopped.wait(self.threshold / 4):
+            pending = self._pending
+            if pending is None or pending[0] in self._samples:
+                continue
+            tick, due = pending
+            if time.perf_counter() - due >= self.threshold / 2:
+                self._samples[tick] = self._sample()
+
+    def _sample(self) -> Tuple[str, Optional[str], List[str]]:
+        frames = []
+        frame = sys._current_frames().get(self._thread_id)
+        while frame is not None:
+            frames.append((frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name))
+            frame = frame.f_back
+        frames.reverse()
+
+        location = None
+        for filename, lineno, name in reversed(frames):
+            if filename.startswith(PROJECT_ROOT + os.sep) and not filename.startswith(_BENCHMARKS_DIR + os.sep):
+                location = _frame_label(filename, lineno, name)
+                break
+
+        route = "-"
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        scope = _task_scopes.get(task) if task is not None else None
+        if scope is not None:
+            route = f"{scope['method']} {route_template(scope)}"
+        return route, location, [_frame_label(*frame) for frame in frames[-self.stack_depth:]]
+
+
+def summarize_stalls(stalls: List[Stall], top_locations: int = 3) -> Dict[str, Dict[str, Any]]:
+    """Stalls per route, worst first, with the code locations that caused them most often"""
+    by_route: Dict[str, List[Stall]] = {}
+    for stall in stalls:
+        by_route.setdefault(stall.route, []).append(stall)
+
+    summary = {}
+    for route, route_stalls in sorted(by_route.items(), key=lambda item: -max(s.lag_seconds for s in item[1])):
+        locations: Dict[str, int] = {}
+        for stall in route_stalls:
+            key = stall.location or (stall.stack[-1] if stall.stack else "unknown")
+            locations[key] = locations.get(key, 0) + 1
+        worst = max(route_stalls, key=lambda s: s.lag_seconds)
+        total = sum(s.lag_seconds for s in route_stalls)
+        summary[route] = {
+            "stalls": len(route_stalls),
+            "max_ms": round(worst.lag_seconds * 1000, 1),
+            "total_ms": round(total * 1000, 1),
+            "cpu_share": round(sum(s.cpu_share * s.lag_seconds for s in route_stalls) / total, 2) if total else 0.0,
+            "locations": dict(sorted(locations.items(), key=lambda item: -item[1])[:top_locations]),
+            "worst_stack": worst.stack,
+        }
+    return summary
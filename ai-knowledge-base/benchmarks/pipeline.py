@@ -0,0 +1,421 @@
+"""Offline end-to-end benchmark: ingest, retrieval and /generate with fake backends.
+
+Writes a synthetic corpus (Markdown, plain text and text-layer PDFs) built
+from the sentences of the Uploads/*.pdf samples, ingests it through the
+format router, StructureChunker and the local vector store with fake
+embeddings, then measures hybrid retrieval + reranking and proposal
+generation against a fake LLM with realistic latencies. Nothing touches
+the network. Results are JSON; --compare prints the change against an
+earlier run, e.g. one from the previous commit.
+
+    python -m benchmarks.pipeline --documents 150 --output results/pipeline.json
+    python -m benchmarks.pipeline --documents 150 --compare results/pipeline.json
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import glob
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.fakes import VOCABULARY, FakeEmbeddings, FakeLLM
+from src.services.bm25 import BM25Index
+from src.services.chunker import StructureChunker
+from src.services.converter_pool import get_converter_pool
+from src.services.embeddings import EmbeddingService
+from src.services.format_router import get_route_counters
+from src.services.hybrid_retriever import HybridRetriever
+from src.services.indexed_store import IndexedVectorStore
+from src.services.loader import convert_documents
+from src.services.local_vectorstore import LocalVectorStore
+from src.services.reranker import Reranker, RerankingRetriever
+
+_SENTENCE = re.compile(r"[^.!?]{20,300}[.!?]")
+_NUMERIC_TOKEN = re.compile(r"\d")
+
+
+def sample_sentences(pattern: str) -> List[str]:
+    """Sentences of the text layer of the sample PDFs, or vocabulary sentences if there are none"""
+    import pypdfium2 as pdfium
+
+    sentences: List[str] = []
+    for path in sorted(glob.glob(pattern)):
+        pdf = pdfium.PdfDocument(path)
+        try:
+            for page in pdf:
+                textpage = page.get_textpage()
+                text = textpage.get_text_range().replace("\r\n", " ")
+                textpage.close()
+                page.close()
+                sentences.extend(s.strip() for s in _SENTENCE.findall(text) if "�" not in s)
+        finally:
+            pdf.close()
+    if not sentences:
+        rng = random.Random(0)
+        sentences = [" ".join(rng.choice(VOCABULARY) for _ in range(12)).capitalize() + "." for _ in range(200)]
+    return sentences
+
+
+def _paragraph(rng: random.Random, sentences: List[str]) -> str:
+    return " ".join(rng.choice(sentences) for _ in range(rng.randint(2, 5)))
+
+
+def _pdf_text(text: str) -> str:
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_text_pdf(path: str, pages: List[List[str]]) -> None:
+    """Minimal born-digital PDF with one Helvetica text line per entry"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>")
+    font = 3 + 2 * len(pages)
+    for i, lines in enumerate(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        )
+        stream = "BT /F1 10 Tf 13 TL 50 750 Td " + " ".join(f"({_pdf_text(line)}) Tj T*" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def _wrap(text: str, width: int = 95) -> List[str]:
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + len(word) + 1 > width:
+            lines.append(line)
+            line = ""
+        line = f"{line} {word}".strip()
+    return lines + [line] if line else lines
+
+
+def write_corpus(directory: str, sentences: List[str], documents: int, seed: int = 0) -> List[str]:
+    """Synthetic documents cycling through Markdown, plain text and text-layer PDF"""
+    rng = random.Random(seed)
+    # Numeric sentences would make PDF pages look like tables and send them to Docling
+    prose = [s for s in sentences if len(_NUMERIC_TOKEN.findall(s)) < 3] or sentences
+    paths = []
+    for index in range(documents):
+        sections = [
+            (f"Section {s + 1}: {rng.choice(prose)[:40]}", [_paragraph(rng, sentences) for _ in range(rng.randint(2, 6))])
+            for s in range(rng.randint(3, 8))
+        ]
+        kind = ("md", "txt", "pdf")[index % 3]
+        path = os.path.join(directory, f"doc-{index:05d}.{kind}")
+        if kind == "md":
+            body = "\n\n".join(f"## {title}\n\n" + "\n\n".join(paragraphs) for title, paragraphs in sections)
+            Path(path).write_text(f"# Document {index}\n\n{body}\n", encoding="utf-8")
+        elif kind == "txt":
+            body = "\n\n".join(f"{title}\n\n" + "\n\n".join(paragraphs) for title, paragraphs in sections)
+            Path(path).write_text(body + "\n", encoding="utf-8")
+        else:
+            lines: List[str] = []
+            for title, _ in sections:
+                lines.append(title)
+                for _ in range(rng.randint(2, 6)):
+                    lines.extend(_wrap(_paragraph(rng, prose)))
+                    lines.append("")
+            write_text_pdf(path, [lines[i:i + 55] for i in range(0, len(lines), 55)])
+        paths.append(path)
+    return paths
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+
+    def at(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+    return {"p50_ms": at(0.50), "p95_ms": at(0.95), "p99_ms": at(0.99), "max_ms": round(ordered[-1] * 1000, 3)}
+
+
+def peak_rss_mib() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+class _Phase:
+    """Wall time and, with tracing on, peak traced Python memory of one benchmark phase"""
+
+    def __init__(self, trace_memory: bool) -> None:
+        self.trace_memory = trace_memory
+        self.result: Dict[str, Any] = {}
+
+    def __enter__(self) -> "_Phase":
+        if self.trace_memory:
+            tracemalloc.start()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.result["wall_seconds"] = round(time.perf_counter() - self._started, 3)
+        if self.trace_memory:
+            self.result["peak_traced_mib"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+            tracemalloc.stop()
+        self.result["peak_rss_mib"] = peak_rss_mib()
+
+
+def bench_ingest(paths: List[str], vectorstore, chunker: StructureChunker, batch_size: int) -> Dict[str, Any]:
+    routes_before = get_route_counters().as_dict()
+    pool = get_converter_pool()
+    convert_seconds = embed_seconds = 0.0
+    chunks = 0
+    batch: List[Any] = []
+
+    def flush() -> float:
+        started = time.perf_counter()
+        vectorstore.add_documents(batch, ids=[doc.metadata["chunk_id"] for doc in batch])
+        batch.clear()
+        return time.perf_counter() - started
+
+    for index, path in enumerate(paths):
+        started = time.perf_counter()
+        documents = convert_documents(pool, path, chunker)
+        convert_seconds += time.perf_counter() - started
+        for n, document in enumerate(documents):
+            document.metadata["chunk_id"] = f"{index}-{n}"
+        chunks += len(documents)
+        batch.extend(documents)
+        if len(batch) >= batch_size:
+            embed_seconds += flush()
+    if batch:
+        embed_seconds += flush()
+
+    total = convert_seconds + embed_seconds
+    routes = {
+        route: {key: stats[key] - routes_before.get(route, {}).get(key, 0) for key in ("documents", "pages", "seconds")}
+        for route, stats in get_route_counters().as_dict().items()
+    }
+    megabytes = sum(os.path.getsize(path) for path in paths) / 2 ** 20
+    return {
+        "files": len(paths),
+        "chunks": chunks,
+        "input_mib": round(megabytes, 2),
+        "convert_split_seconds": round(convert_seconds, 3),
+        "embed_store_seconds": round(embed_seconds, 3),
+        "files_per_second": round(len(paths) / total, 2) if total else 0.0,
+        "chunks_per_second": round(chunks / total, 2) if total else 0.0,
+        "routes": routes,
+    }
+
+
+def bench_retrieval(retriever, queries: List[str]) -> Dict[str, Any]:
+    retriever.invoke(queries[0])
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        retriever.invoke(query)
+        latencies.append(time.perf_counter() - started)
+    return {"queries": len(queries), **percentiles(latencies)}
+
+
+async def _generate_once(plan, llm, retriever, max_sections: int) -> Tuple[float, float]:
+    from src.services.generation import stream_document
+
+    started = time.perf_counter()
+    first_token = None
+    async for event, _ in stream_document(plan, llm, retriever, max_concurrency=max_sections):
+        if event == "token" and first_token is None:
+            first_token = time.perf_counter() - started
+    return time.perf_counter() - started, first_token or 0.0
+
+
+async def _bench_generate(llm, retriever, runs: int, concurrency: int, max_sections: int) -> Dict[str, Any]:
+    from src.modules.generate.proposal.controller import ProposalRequest, build_proposal_plan
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> Tuple[float, float]:
+        plan = build_proposal_plan(ProposalRequest(
+            client_name=f"Client {index}",
+            project_description="Laptop procurement portal with order tracking and bulk discounts",
+            requirements=["Order tracking", "Bulk purchase discounts", "Early payment terms"],
+            budget_range="$50k-$80k",
+            timeline="3 months",
+        ))
+        async with semaphore:
+            return await _generate_once(plan, llm, retriever, max_sections)
+
+    started = time.perf_counter()
+    timings = await asyncio.gather(*(one(i) for i in range(runs)))
+    wall = time.perf_counter() - started
+    totals = [total for total, _ in timings]
+    first_tokens = [first for _, first in timings]
+    return {
+        "runs": runs,
+        "concurrency": concurrency,
+        "total": percentiles(totals),
+        "first_token": percentiles(first_tokens),
+        "documents_per_second": round(runs / wall, 3),
+    }
+
+
+def bench_generate(llm, retriever, runs: int, concurrency: int, max_sections: int) -> Dict[str, Any]:
+    return asyncio.run(_bench_generate(llm, retriever, runs, concurrency, max_sections))
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _numeric_leaves(value: Any, prefix: str = "") -> Dict[str, float]:
+    leaves: Dict[str, float] = {}
+    if isinstance(value, dict):
+        for key, nested in value.items():
+            leaves.update(_numeric_leaves(nested, f"{prefix}.{key}" if prefix else str(key)))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        leaves[prefix] = float(value)
+    return leaves
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Every numeric result present in both runs, with its relative change"""
+    before = _numeric_leaves(baseline.get("results", {}))
+    after = _numeric_leaves(current.get("results", {}))
+    rows = []
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        change = round((new - old) / old * 100, 1) if old else None
+        rows.append({"metric": key, "baseline": old, "current": new, "change_pct": change})
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=150)
+    parser.add_argument("--samples", default="Uploads/*.pdf", help="PDFs whose sentences seed the corpus")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--embed-latency-ms", type=float, default=40.0, help="per embedding request")
+    parser.add_argument("--embed-per-text-ms", type=float, default=0.2)
+    parser.add_argument("--embed-batch", type=int, default=100)
+    parser.add_argument("--index", choices=["flat", "ivf"], default="ivf")
+    parser.add_argument("--quantization", choices=["none", "int8", "pq"], default="none")
+    parser.add_argument("--min-train", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--llm-first-token-ms", type=float, default=300.0)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--llm-answer-tokens", type=int, default=120)
+    parser.add_argument("--generate-runs", type=int, default=8)
+    parser.add_argument("--generate-concurrency", type=int, default=4)
+    parser.add_argument("--section-concurrency", type=int, default=8)
+    parser.add_argument("--trace-memory", action="store_true", help="also report tracemalloc peaks (slower)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="")
+    parser.add_argument("--compare", default="", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sentences = sample_sentences(args.samples)
+    workdir = tempfile.mkdtemp(prefix="bench-pipeline-")
+    results: Dict[str, Any] = {}
+    try:
+        corpus_dir = os.path.join(workdir, "corpus")
+        os.makedirs(corpus_dir)
+        paths = write_corpus(corpus_dir, sentences, args.documents, args.seed)
+
+        embeddings = EmbeddingService(
+            FakeEmbeddings(args.dim, args.embed_latency_ms, args.embed_per_text_ms),
+            model_name=f"fake-{args.dim}",
+            cache=None,
+            batch_size=args.embed_batch,
+            requests_per_second=1000.0,
+        )
+        vectorstore = IndexedVectorStore(
+            LocalVectorStore(
+                os.path.join(workdir, "store"),
+                embeddings,
+                index_type=args.index,
+                min_train=args.min_train,
+                quantization=args.quantization,
+            ),
+            BM25Index(os.path.join(workdir, "bm25.sqlite3")),
+        )
+
+        with _Phase(args.trace_memory) as phase:
+            phase.result.update(bench_ingest(paths, vectorstore, StructureChunker(max_chars=args.chunk_size), 256))
+        results["ingest"] = phase.result
+        print(json.dumps({"ingest": results["ingest"]}))
+
+        retriever = RerankingRetriever(
+            base_retriever=HybridRetriever(vectorstore=vectorstore, bm25_index=vectorstore.bm25_index, k=12),
+            reranker=Reranker(embeddings=embeddings, top_n=4),
+        )
+        queries = [" ".join(rng.choice(sentences).split()[:8]) for _ in range(args.queries)]
+        with _Phase(args.trace_memory) as phase:
+            phase.result.update(bench_retrieval(retriever, queries))
+        results["retrieval"] = phase.result
+        print(json.dumps({"retrieval": results["retrieval"]}))
+
+        llm = FakeLLM(
+            first_token_ms=args.llm_first_token_ms,
+            tokens_per_second=args.llm_tokens_per_second,
+            answer_tokens=args.llm_answer_tokens,
+        )
+        with _Phase(args.trace_memory) as phase:
+            phase.result.update(bench_generate(
+                llm, retriever, args.generate_runs, args.generate_concurrency, args.section_concurrency
+            ))
+        results["generate"] = phase.result
+        print(json.dumps({"generate": results["generate"]}))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results["peak_rss_mib"] = peak_rss_mib()
+    report = {"parameters": vars(args), "environment": environment(), "results": results}
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nAgainst {args.compare} (commit {baseline.get('environment', {}).get('commit')}):")
+        for row in compare(baseline, report):
+            change = "n/a" if row["change_pct"] is None else f"{row['change_pct']:+.1f}%"
+            print(f"  {row['metric']:<45} {row['baseline']:>12g} -> {row['current']:>12g}  {change}")
+
+
+if __name__ == "__main__":
+    main()
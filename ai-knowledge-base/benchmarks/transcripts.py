@@ -0,0 +1,106 @@
+"""Parse and chunk time of a large SRT/WebVTT transcript.
+
+Generates a caption file of --megabytes (an hour-long meeting exported as
+WebVTT is about 10 MB and 100k cues), mixing "<v Speaker>" voice tags,
+"Speaker: text" prefixes and multi-line cues, then times iter_turns alone
+and iter_turns feeding TranscriptChunker. Each is timed --repeats times and
+the fastest run is reported. Exits with status 1 when parsing and chunking
+together take longer than --target-seconds; on a single-vCPU Xeon VM with
+Python 3.11 the default 10 MB file takes 0.7-0.85 s.
+
+    python -m benchmarks.transcripts --megabytes 10 --output results/transcripts.json
+"""
+from typing import Any, Dict
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+
+from benchmarks.pipeline import environment
+from src.services.transcripts import TranscriptChunker, iter_turns
+
+WORDS = (
+    "the project timeline needs review before we commit to the api integration and the dashboard release "
+    "so let us check with design whether the onboarding flow is ready for testing next week"
+).split()
+SPEAKERS = ["Alice Johnson", "Bob", "Carol (PM)", "Dan"]
+
+
+def timestamp(seconds: float, separator: str) -> str:
+    return f"{int(seconds // 3600):02d}:{int(seconds // 60 % 60):02d}:{int(seconds % 60):02d}{separator}{int(seconds * 1000) % 1000:03d}"
+
+
+def make_captions(size: int, fmt: str, rng: random.Random) -> bytes:
+    separator = "." if fmt == "vtt" else ","
+    blocks = ["WEBVTT\n"] if fmt == "vtt" else []
+    written, cue, clock = 0, 0, 0.0
+    while written < size:
+        cue += 1
+        end = clock + rng.uniform(1.0, 4.0)
+        speaker = rng.choice(SPEAKERS)
+        text = " ".join(rng.choices(WORDS, k=rng.randint(4, 12)))
+        if cue % 7 == 0:
+            text = f"{text}\n{' '.join(rng.choices(WORDS, k=rng.randint(3, 8)))}"
+        body = f"<v {speaker}>{text}</v>" if fmt == "vtt" and cue % 3 else f"{speaker}: {text}"
+        block = f"{cue}\n{timestamp(clock, separator)} --> {timestamp(end, separator)}\n{body}\n"
+        blocks.append(block)
+        written += len(block) + 1
+        clock = end
+    return "\n".join(blocks).encode()
+
+
+def best_of(repeats: int, run) -> float:
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megabytes", type=float, default=10.0)
+    parser.add_argument("--format", choices=("vtt", "srt"), default="vtt")
+    parser.add_argument("--max-tokens", type=int, default=300, help="TRANSCRIPT_CHUNK_TOKENS")
+    parser.add_argument("--max-seconds", type=float, default=180.0, help="TRANSCRIPT_CHUNK_SECONDS")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--target-seconds", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="")
+    args = parser.parse_args()
+
+    data = make_captions(int(args.megabytes * 2 ** 20), args.format, random.Random(args.seed))
+    chunker = TranscriptChunker(args.max_tokens, args.max_seconds)
+    turns = sum(1 for _ in iter_turns(io.BytesIO(data), args.format))
+    chunks = sum(1 for _ in chunker.chunk(iter_turns(io.BytesIO(data), args.format)))
+
+    parse_seconds = best_of(args.repeats, lambda: sum(1 for _ in iter_turns(io.BytesIO(data), args.format)))
+    total_seconds = best_of(
+        args.repeats, lambda: sum(1 for _ in chunker.chunk(iter_turns(io.BytesIO(data), args.format)))
+    )
+
+    results: Dict[str, Any] = {
+        "megabytes": round(len(data) / 2 ** 20, 2),
+        "turns": turns,
+        "chunks": chunks,
+        "parse_seconds": round(parse_seconds, 3),
+        "parse_and_chunk_seconds": round(total_seconds, 3),
+        "turns_per_second": round(turns / total_seconds),
+    }
+    results["meets_target"] = total_seconds <= args.target_seconds
+    print(json.dumps(results))
+
+    report = {"parameters": vars(args), "environment": environment(), "results": results}
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0 if results["meets_target"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""Recall vs. memory of the quantized local vector store against float32 search.
+
+Builds each configuration from the same synthetic, clustered, unit-length
+vectors (Gemini embedding sized by default), measures recall@k against exact
+float32 search, query latency and the bytes scanned per vector, and writes
+the results as JSON. The embedded float32 Chroma (HNSW) path is included
+when chromadb is installed.
+
+    python -m benchmarks.vector_quantization --vectors 50000 --output results/vector_quantization.json
+"""
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from src.services.embeddings import LocalHashEmbeddings
+from src.services.local_vectorstore import LocalVectorStore
+
+CONFIGS = [
+    {"name": "local-flat-float32", "index_type": "flat", "quantization": "none"},
+    {"name": "local-ivf-float32", "index_type": "ivf", "quantization": "none"},
+    {"name": "local-flat-int8", "index_type": "flat", "quantization": "int8"},
+    {"name": "local-ivf-int8", "index_type": "ivf", "quantization": "int8"},
+    {"name": "local-flat-pq", "index_type": "flat", "quantization": "pq"},
+    {"name": "local-ivf-pq", "index_type": "ivf", "quantization": "pq"},
+]
+
+
+def clustered_vectors(count: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(clusters, size=count)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_neighbours(vectors: np.ndarray, queries: np.ndarray, k: int) -> List[set]:
+    truth = []
+    for query in queries:
+        scores = vectors @ query
+        truth.append(set(np.argpartition(-scores, k - 1)[:k].tolist()))
+    return truth
+
+
+def directory_bytes(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+    )
+
+
+def _latency_summary(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 3),
+    }
+
+
+def bench_local(config: Dict[str, Any], vectors: np.ndarray, queries: np.ndarray, truth: List[set],
+                k: int, workdir: str, nprobe: int, rescore_factor: int) -> Dict[str, Any]:
+    directory = os.path.join(workdir, config["name"])
+    store = LocalVectorStore(
+        directory,
+        LocalHashEmbeddings(vectors.shape[1]),
+        index_type=config["index_type"],
+        nprobe=nprobe,
+        min_train=1,
+        quantization=config["quantization"],
+        rescore_factor=rescore_factor,
+    )
+    started = time.perf_counter()
+    ids = [str(i) for i in range(len(vectors))]
+    for start in range(0, len(vectors), 10000):
+        end = start + 10000
+        store.add_embeddings(ids[start:end], vectors[start:end], ids=ids[start:end])
+    if config["index_type"] == "ivf" or config["quantization"] == "pq":
+        store.train()
+    build_seconds = time.perf_counter() - started
+
+    hits, latencies = 0, []
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        found = store.similarity_search_with_score_by_vector(query.tolist(), k=k)
+        latencies.append(time.perf_counter() - started)
+        hits += len({int(doc.id) for doc, _ in found} & expected)
+
+    footprint = store.footprint()
+    return {
+        "name": config["name"],
+        f"recall@{k}": round(hits / (k * len(queries)), 4),
+        **_latency_summary(latencies),
+        "build_seconds": round(build_seconds, 2),
+        "scanned_bytes_per_vector": footprint["scanned_bytes_per_vector"],
+        "scanned_mib": round((footprint["code_bytes"] or footprint["float32_bytes"]) / 2 ** 20, 2),
+        "disk_mib": round(directory_bytes(directory) / 2 ** 20, 2),
+    }
+
+
+def bench_chroma(vectors: np.ndarray, queries: np.ndarray, truth: List[set], k: int, workdir: str) -> Optional[Dict[str, Any]]:
+    try:
+        import chromadb
+        from chromadb.config import Settings
+    except ImportError:
+        return None
+
+    directory = os.path.join(workdir, "chroma-float32")
+    client = chromadb.PersistentClient(path=directory, settings=Settings(anonymized_telemetry=False))
+    collection = client.get_or_create_collection("bench", metadata={"hnsw:space": "cosine"})
+    started = time.perf_counter()
+    batch = client.get_max_batch_size()
+    for start in range(0, len(vectors), batch):
+        end = start + batch
+        collection.add(ids=[str(i) for i in range(start, min(end, len(vectors)))], embeddings=vectors[start:end].tolist())
+    build_seconds = time.perf_counter() - started
+
+    hits, latencies = 0, []
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        found = collection.query(query_embeddings=[query.tolist()], n_results=k)
+        latencies.append(time.perf_counter() - started)
+        hits += len({int(i) for i in found["ids"][0]} & expected)
+
+    return {
+        "name": "chroma-hnsw-float32",
+        f"recall@{k}": round(hits / (k * len(queries)), 4),
+        **_latency_summary(latencies),
+        "build_seconds": round(build_seconds, 2),
+        "scanned_bytes_per_vector": vectors.shape[1] * 4,
+        "scanned_mib": round(vectors.nbytes / 2 ** 20, 2),
+        "disk_mib": round(directory_bytes(directory) / 2 ** 20, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--output", default="")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = clustered_vectors(args.vectors, args.dim, args.clusters, rng)
+    queries = clustered_vectors(args.queries, args.dim, args.clusters, np.random.default_rng(1))
+    truth = exact_neighbours(vectors, queries, args.k)
+
+    workdir = tempfile.mkdtemp(prefix="bench-vectors-")
+    results = []
+    try:
+        for config in CONFIGS:
+            result = bench_local(config, vectors, queries, truth, args.k, workdir, args.nprobe, args.rescore_factor)
+            print(json.dumps(result))
+            results.append(result)
+        chroma = bench_chroma(vectors, queries, truth, args.k, workdir)
+        if chroma is not None:
+            print(json.dumps(chroma))
+            results.append(chroma)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"parameters": vars(args), "results": results}
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
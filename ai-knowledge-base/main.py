@@ -1,24 +1,50 @@
-from typing import Iterator
+from contextlib import asynccontextmanager
+from dataclasses import asdict
 from pathlib import Path
-from langchain_core.document_loaders import BaseLoader
-from langchain_core.documents import Document as LCDocument
-from docling.document_converter import DocumentConverter
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 import os
 
-from typing import Iterable
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import PromptTemplate
-from langchain_core.runnables import RunnablePassthrough
+from langchain_google_genai import GoogleGenerativeAI
+import asyncio
 from fastapi import FastAPI
 from routes import router
+from src.services.chunker import StructureChunker
+from src.services.converter_pool import get_converter_pool
+from src.services.embeddings import build_embeddings
+from src.services.format_router import RouterSettings
+from src.services.jobs import get_job_queue
+from src.services.ingestion import SUPPORTED_EXTENSIONS, find_supported_files, ingest_incrementally
+from src.services.manifest import IngestManifest
+from src.services.metrics import MetricsMiddleware
+from src.services.rag import build_rag_chain
+from src.services.response_cache import get_response_cache
+from src.services.indexed_store import IndexedVectorStore
+from src.services.vectorstore import build_retriever, open_vectorstore, persist_directory, warm_up_vectorstore
+from src.modules.validate.rules import get_rule_engine
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the Docling models once, before the first upload arrives
+    await asyncio.to_thread(get_converter_pool().warm_up)
+    # One vector store client per worker process, connected before the first request
+    await asyncio.to_thread(warm_up_vectorstore)
+    # Validation rules are compiled once per worker process
+    get_rule_engine()
+    get_job_queue().start()
+    yield
+    await asyncio.to_thread(get_job_queue().stop)
+
 
 app = FastAPI(
     title="AI Document Assistant",
     description="Automating Raw Unstructured data to Structured Document Workflow",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Per-route latency histograms, exposed with the stage timings at /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include all routes
 app.include_router(router)
 
@@ -27,86 +53,66 @@ def read_root():
     return {"message": "AI Document Assistant - Ready for Hackathon!", "status": "active"}
 
 
-class DoclingLoader(BaseLoader):
-    """Document loader using Docling for various document formats."""
-
-    def __init__(self, file_path: str | list[str]) -> None:
-        self._file_paths = file_path if isinstance(file_path, list) else [file_path]
-        self._converter = DocumentConverter()
-
-    def lazy_load(self) -> Iterator[LCDocument]:
-        for source in self._file_paths:
-            dl_doc = self._converter.convert(source).document
-            text = dl_doc.export_to_markdown()
-            yield LCDocument(page_content=text)
-
-
-def demonstrate_document_loading() -> Iterable[LCDocument]:
-    """Load all supported documents from the Uploads directory."""
+def ingest_uploads(
+    vectorstore: IndexedVectorStore,
+    chunker: StructureChunker,
+    manifest: IngestManifest,
+    params: dict
+) -> None:
+    """Incrementally convert, chunk and embed the Uploads directory with the parallel pipeline."""
     uploads_dir = Path("./Uploads")
 
     if not uploads_dir.exists():
         print(f"Uploads directory not found: {uploads_dir}")
-        return []
-
-    # Common document extensions supported by Docling
-    supported_extensions = {'.pdf', '.docx', '.doc', '.pptx', '.ppt', '.xlsx', '.xls', '.txt', '.md'}
-
-    # Find all supported files in the Uploads directory
-    file_paths = []
-    for file_path in uploads_dir.iterdir():
-        if file_path.is_file() and file_path.suffix.lower() in supported_extensions:
-            file_paths.append(str(file_path))
+        return
 
+    file_paths = find_supported_files(uploads_dir)
     if not file_paths:
         print(f"No supported documents found in {uploads_dir}")
-        print(f"Supported extensions: {', '.join(supported_extensions)}")
-        return []
+        print(f"Supported extensions: {', '.join(SUPPORTED_EXTENSIONS)}")
 
     print(f"Found {len(file_paths)} supported document(s):")
 
-    all_documents = []
-
-    # Load each file individually with error handling
-    for file_path in file_paths:
-        print(f"  - {Path(file_path).name}")
-
-        try:
-            print(f"Loading: {Path(file_path).name}")
-            docling_loader = DoclingLoader(file_path)
-            documents = docling_loader.load()
-            all_documents.extend(documents)
-            print(f"  ✓ Successfully loaded {len(documents)} document(s) from {Path(file_path).name}")
-        except Exception as e:
-            print(f"  ✗ Error loading {Path(file_path).name}: {e}")
-            continue
-
-    print(f"\nTotal documents loaded: {len(all_documents)}")
-    return all_documents
+    plan, report = ingest_incrementally(
+        file_paths, vectorstore, manifest, params, chunker=chunker
+    )
 
+    print(f"  {len(plan.unchanged)} unchanged, {len(plan.to_ingest)} to ingest, {len(plan.removed)} removed")
+    if report is None:
+        return
 
-def format_docs(docs: Iterable[LCDocument]) -> Iterable[str]:
-    return "\n\n".join(doc.page_content for doc in docs)
+    print(f"\nTotal documents loaded: {report.files_loaded}/{report.files_total}")
+    for name, stats in report.summary()["stages"].items():
+        print(f"  {name}: {stats['items']} item(s) in {stats['busy_seconds']}s ({stats['items_per_second']}/s)")
+    for route, stats in report.summary()["routes"].items():
+        print(f"  route {route}: {stats['pages']} page(s) in {stats['seconds']}s ({stats['seconds_per_page']}s/page)")
 
 
 def main() -> None:
     print("Starting Docling Document Loader Demo")
-    docs = demonstrate_document_loading()
-
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
 
-    splits = text_splitter.split_documents(docs)
+    # Chunks follow Docling's section, table and list boundaries
+    chunk_size = 1000
+    chunker = StructureChunker(max_chars=chunk_size)
 
-    # embeddings = HuggingFaceEmbeddings(model_name=HF_EMBED_MODEL_ID)
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/gemini-embedding-001")
-    persist_directory = "./chroma_db"
+    # Batched, rate-limited and cached; EMBEDDING_BACKEND=local runs offline
+    embeddings = build_embeddings()
+    data_directory = persist_directory()
     # client = MilvusClient(MILVUS_URI)
     # chroma_client = chromadb.Client();
-    vectorstore = Chroma.from_documents(
-        splits,
-        embeddings,
-        persist_directory=persist_directory
-    )
+    # VECTOR_BACKEND picks embedded Chroma, the Chroma server or the local mmap index;
+    # every backend keeps a BM25 index in sync with each write
+    vectorstore = open_vectorstore(embedding_function=embeddings, directory=data_directory)
+
+    # Changing any of these re-ingests every file
+    ingest_params = {
+        "chunker": "structure",
+        "chunk_size": chunk_size,
+        "format_router": asdict(RouterSettings.from_env()),
+        "embedding_model": embeddings.model_name,
+    }
+    manifest = IngestManifest(os.path.join(data_directory, "ingest_manifest.json"))
+    ingest_uploads(vectorstore, chunker, manifest, ingest_params)
     # vectorstore = Milvus.from_documents(
     #     splits,
     #     embeddings,
@@ -121,33 +127,17 @@ def main() -> None:
     )
 
 
-    retriever = vectorstore.as_retriever()
-    prompt = PromptTemplate.from_template("""
-You are a helpful AI assistant that answers questions based on provided documents. 
-
-Here is the relevant information from the documents:
-{context}
-
-Based on the information above, please answer the following question. If the answer is not found in the provided context, please say so clearly. Be specific and cite relevant details when possible.
-
-Question: {question}
-
-Answer: """)
-
-    rag_chain = (
-        {"context": retriever | format_docs, "question": RunnablePassthrough()}
-        | prompt
-        | llm
-        | StrOutputParser()
-    )
+    retriever = build_retriever(vectorstore)
+    rag_chain = build_rag_chain(retriever, llm, cache=get_response_cache())
 
     print("\n" + "="*50)
     print("RAG CHAIN RESPONSE:")
     print("="*50)
 
-    result = rag_chain.invoke("How many students from Ms. Hubert’s afterschool took the survey?")
-
-    print(result)
+    # Print the answer as Gemini produces it instead of waiting for the whole response
+    for token in rag_chain.stream("How many students from Ms. Hubert’s afterschool took the survey?"):
+        print(token, end="", flush=True)
+    print()
 
     print("="*50)
 
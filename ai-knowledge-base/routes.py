@@ -7,6 +7,8 @@ from src.modules.generate.technical_doc.controller import router as technical_do
 from src.modules.generate.jira_ticket.controller import router as jira_ticket_router
 from src.modules.templates.controller import router as templates_router
 from src.modules.validate.controller import router as validate_router
+from src.modules.jobs.controller import router as jobs_router
+from src.modules.metrics.controller import router as metrics_router
 
 # Main router that combines all module routers
 router = APIRouter()
@@ -24,3 +26,9 @@ router.include_router(jira_ticket_router, prefix="/generate", tags=["Generate"])
 # Template and validation routes
 router.include_router(templates_router, prefix="/templates", tags=["Templates"])
 router.include_router(validate_router, prefix="/validate", tags=["Validation"])
+
+# Background job routes
+router.include_router(jobs_router, prefix="/jobs", tags=["Jobs"])
+
+# Prometheus scrape endpoint
+router.include_router(metrics_router, tags=["Metrics"])
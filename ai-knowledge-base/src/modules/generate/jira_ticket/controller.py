@@ -1,8 +1,15 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 import logging
 
+from src.services.generation import DocumentPlan, SectionSpec, generate_document, parse_list, stream_document
+from src.services.llm import get_llm
+from src.services.response_cache import get_response_cache
+from src.services.sse import sse_response
+from src.services.vectorstore import get_retriever
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
@@ -15,54 +22,97 @@ class JiraTicketRequest(BaseModel):
     transcript_context: Optional[str] = None
     codebase_context: Optional[str] = None
 
-@router.post("/jira-ticket")
-async def generate_jira_ticket(request: JiraTicketRequest) -> Dict[str, Any]:
+def build_jira_ticket_plan(request: JiraTicketRequest) -> DocumentPlan:
+    """Ticket fields; description and acceptance criteria are written by the LLM when configured"""
+    details = "\n".join([
+        f"Ticket type: {request.ticket_type}",
+        f"Summary: {request.summary}",
+        f"Description: {request.description or 'not provided'}",
+        f"Priority: {request.priority}",
+        f"Components: {', '.join(request.components or []) or 'none'}",
+        f"Transcript context: {request.transcript_context or 'none'}",
+        f"Codebase context: {request.codebase_context or 'none'}",
+    ])
+
+    sections = [
+        SectionSpec("ticket_type", request.ticket_type.upper()),
+        SectionSpec("summary", request.summary),
+        SectionSpec("description", request.description or "Generated from uploaded context",
+                    "Write a detailed ticket description with background and expected outcome."),
+        SectionSpec("priority", request.priority.upper()),
+        SectionSpec("components", request.components or []),
+        SectionSpec("acceptance_criteria", [
+            "Define acceptance criteria based on requirements",
+            "Include testing requirements",
+            "Specify completion conditions"
+        ], "List testable acceptance criteria, one per line.", parse=parse_list),
+        SectionSpec("story_points", "To be estimated"),
+        SectionSpec("labels", [request.ticket_type, "generated", "hackathon"]),
+        SectionSpec("attachments", []),
+        SectionSpec("subtasks", []),
+    ]
+
+    # Add context-specific details
+    if request.ticket_type == "story":
+        sections.append(SectionSpec("user_story", f"As a user, I want {request.summary}",
+                                    "Write the user story as 'As a <role>, I want <goal> so that <benefit>'."))
+    elif request.ticket_type == "task":
+        sections.append(SectionSpec("task_details", "Technical implementation details",
+                                    "Describe the technical implementation steps."))
+    elif request.ticket_type == "bug":
+        sections.append(SectionSpec("reproduction_steps", "Steps to reproduce the issue",
+                                    "List the steps to reproduce the issue."))
+        sections.append(SectionSpec("expected_behavior", "Expected system behavior",
+                                    "Describe the expected system behavior."))
+
+    return DocumentPlan(
+        title=f"Jira {request.ticket_type}",
+        details=details,
+        query=" ".join(filter(None, [request.summary, request.description, request.transcript_context])),
+        sections=sections,
+    )
+
+
+def _jira_ticket_response(request: JiraTicketRequest, ticket_structure: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "status": "success",
+        "document_type": "jira_ticket",
+        "ticket_type": request.ticket_type,
+        "ticket": ticket_structure,
+        "jira_formatted": True,
+        "message": f"{request.ticket_type.title()} ticket generated successfully"
+    }
+
+
+@router.post("/jira-ticket", response_model=None)
+async def generate_jira_ticket(
+    request: JiraTicketRequest,
+    stream: bool = False
+) -> Union[Dict[str, Any], StreamingResponse]:
     """
     Generate structured Jira tickets from requirements and context
     Uses uploaded transcripts and codebase analysis for detailed specifications
+    With ?stream=true, fields are streamed as Server-Sent Events
     """
     try:
-        # TODO: Query Chroma for relevant context from transcripts/codebase
-        # TODO: Use Gemini API to generate detailed ticket description
         # TODO: Apply Jira formatting and validation
 
-        # Generate ticket structure
-        ticket_structure = {
-            "ticket_type": request.ticket_type.upper(),
-            "summary": request.summary,
-            "description": request.description or "Generated from uploaded context",
-            "priority": request.priority.upper(),
-            "components": request.components or [],
-            "acceptance_criteria": [
-                "Define acceptance criteria based on requirements",
-                "Include testing requirements",
-                "Specify completion conditions"
-            ],
-            "story_points": "To be estimated",
-            "labels": [request.ticket_type, "generated", "hackathon"],
-            "attachments": [],
-            "subtasks": []
-        }
-
-        # Add context-specific details
-        if request.ticket_type == "story":
-            ticket_structure["user_story"] = f"As a user, I want {request.summary}"
-        elif request.ticket_type == "task":
-            ticket_structure["task_details"] = "Technical implementation details"
-        elif request.ticket_type == "bug":
-            ticket_structure["reproduction_steps"] = "Steps to reproduce the issue"
-            ticket_structure["expected_behavior"] = "Expected system behavior"
+        plan = build_jira_ticket_plan(request)
+        llm = get_llm()
+        retriever = get_retriever() if llm is not None else None
+
+        if stream:
+            logger.info(f"Streaming Jira ticket: {request.ticket_type} - {request.summary}")
+            return sse_response(
+                stream_document(plan, llm, retriever, cache=get_response_cache()),
+                finalize=lambda ticket: _jira_ticket_response(request, ticket)
+            )
+
+        ticket_structure = await generate_document(plan, llm, retriever, cache=get_response_cache())
 
         logger.info(f"Jira ticket generated: {request.ticket_type} - {request.summary}")
 
-        return {
-            "status": "success",
-            "document_type": "jira_ticket",
-            "ticket_type": request.ticket_type,
-            "ticket": ticket_structure,
-            "jira_formatted": True,
-            "message": f"{request.ticket_type.title()} ticket generated successfully"
-        }
+        return _jira_ticket_response(request, ticket_structure)
 
     except Exception as e:
         logger.error(f"Error generating Jira ticket: {str(e)}")
@@ -1,8 +1,16 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 import logging
 
+from src.services.generation import DocumentPlan, SectionSpec, generate_document, parse_list, stream_document
+from src.services.llm import get_llm
+from src.services.response_cache import get_response_cache
+from src.services.sse import sse_response
+from src.services.vectorstore import get_retriever
+from src.modules.templates.controller import DOCUMENT_TEMPLATES, PROPOSAL_SECTIONS
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
@@ -14,41 +22,102 @@ class ProposalRequest(BaseModel):
     timeline: Optional[str] = None
     template_type: str = "standard"
 
-@router.post("/proposal")
-async def generate_proposal(request: ProposalRequest) -> Dict[str, Any]:
+
+def build_proposal_plan(request: ProposalRequest) -> DocumentPlan:
+    """Plan one section per entry of the DOCUMENT_TEMPLATES proposal template, plus the technical approach"""
+    templates = DOCUMENT_TEMPLATES["proposal"]
+    template = templates.get(request.template_type)
+    if template is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Template '{request.template_type}' not found. Available templates: {list(templates.keys())}"
+        )
+
+    # Proposals have always carried a technical_approach section; templates without one get it after the budget
+    template_sections = list(template["sections"])
+    if "technical_approach" not in template_sections:
+        position = template_sections.index("budget") + 1 if "budget" in template_sections else len(template_sections)
+        template_sections.insert(position, "technical_approach")
+
+    fallbacks = {
+        "executive_summary": f"Proposal for {request.client_name}",
+        "project_overview": request.project_description,
+        "scope_of_work": request.requirements,
+        "timeline": request.timeline or "To be determined",
+        "budget_estimate": request.budget_range or "To be determined",
+        "technical_approach": "Based on uploaded codebase and wireframes",
+        "team_composition": "Recommended team structure",
+        "deliverables": "Project deliverables and milestones",
+        "terms_and_conditions": "Standard terms and conditions",
+    }
+
+    sections = []
+    for section in template_sections:
+        key, instruction = PROPOSAL_SECTIONS.get(section, (section, f"Write the {section.replace('_', ' ')} section."))
+        sections.append(SectionSpec(
+            key,
+            fallbacks.get(key, f"{section.replace('_', ' ').title()} to be defined"),
+            instruction,
+            parse=parse_list if key == "scope_of_work" else None,
+        ))
+
+    details = "\n".join([
+        f"Client: {request.client_name}",
+        f"Project description: {request.project_description}",
+        f"Requirements: {'; '.join(request.requirements)}",
+        f"Budget range: {request.budget_range or 'not specified'}",
+        f"Timeline: {request.timeline or 'not specified'}",
+        f"Template: {template['name']}",
+    ])
+
+    return DocumentPlan(
+        title=template["name"].lower(),
+        details=details,
+        query=f"{request.client_name} {request.project_description} {' '.join(request.requirements)}",
+        sections=sections,
+    )
+
+
+def _proposal_response(request: ProposalRequest, proposal_structure: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "status": "success",
+        "document_type": "presale_proposal",
+        "client_name": request.client_name,
+        "template_used": request.template_type,
+        "proposal": proposal_structure,
+        "message": "Presale proposal generated successfully"
+    }
+
+
+@router.post("/proposal", response_model=None)
+async def generate_proposal(request: ProposalRequest, stream: bool = False) -> Union[Dict[str, Any], StreamingResponse]:
     """
     Generate presale proposals from requirements and client information
     Uses uploaded transcripts, codebase analysis, and wireframes as context
+    With ?stream=true, sections are streamed as Server-Sent Events
     """
     try:
-        # TODO: Query Chroma for relevant context
-        # TODO: Use Gemini API to generate structured proposal
+        plan = build_proposal_plan(request)
+        llm = get_llm()
+        retriever = get_retriever() if llm is not None else None
+
         # TODO: Apply validation layers
 
-        # Mock response structure for now
-        proposal_structure = {
-            "executive_summary": f"Proposal for {request.client_name}",
-            "project_overview": request.project_description,
-            "scope_of_work": request.requirements,
-            "timeline": request.timeline or "To be determined",
-            "budget_estimate": request.budget_range or "To be determined",
-            "technical_approach": "Based on uploaded codebase and wireframes",
-            "team_composition": "Recommended team structure",
-            "deliverables": "Project deliverables and milestones",
-            "terms_and_conditions": "Standard terms and conditions"
-        }
+        if stream:
+            logger.info(f"Streaming proposal for client: {request.client_name}")
+            return sse_response(
+                stream_document(plan, llm, retriever, cache=get_response_cache()),
+                finalize=lambda proposal: _proposal_response(request, proposal)
+            )
+
+        proposal_structure = await generate_document(plan, llm, retriever, cache=get_response_cache())
 
         logger.info(f"Proposal generated for client: {request.client_name}")
 
-        return {
-            "status": "success",
-            "document_type": "presale_proposal",
-            "client_name": request.client_name,
-            "template_used": request.template_type,
-            "proposal": proposal_structure,
-            "message": "Presale proposal generated successfully"
-        }
+        return _proposal_response(request, proposal_structure)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating proposal: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
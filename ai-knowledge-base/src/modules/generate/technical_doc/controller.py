@@ -1,8 +1,16 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 import logging
 
+from src.services.generation import DocumentPlan, SectionSpec, generate_document, stream_document
+from src.services.llm import get_llm
+from src.services.response_cache import get_response_cache
+from src.services.sse import sse_response
+from src.services.vectorstore import get_retriever
+from src.modules.templates.controller import DOCUMENT_TEMPLATES
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
@@ -13,62 +21,107 @@ class TechnicalDocRequest(BaseModel):
     wireframe_id: Optional[str] = None
     additional_context: Optional[str] = None
 
-@router.post("/technical-doc")
-async def generate_technical_doc(request: TechnicalDocRequest) -> Dict[str, Any]:
+def build_technical_doc_plan(request: TechnicalDocRequest) -> DocumentPlan:
+    """Plan the sections of the requested doc type, taken from DOCUMENT_TEMPLATES when it has one"""
+    doc_templates = {
+        "api": {
+            "introduction": f"API Documentation for {request.project_name}",
+            "authentication": "Authentication methods and requirements",
+            "endpoints": "API endpoints and their specifications",
+            "examples": "Request/response examples",
+            "error_handling": "Error codes and handling"
+        },
+        "architecture": {
+            "overview": f"System Architecture for {request.project_name}",
+            "components": "System components and their interactions",
+            "data_flow": "Data flow and processing pipeline",
+            "deployment": "Deployment architecture and requirements",
+            "security": "Security considerations and implementations"
+        },
+        "user_guide": {
+            "introduction": f"User Guide for {request.project_name}",
+            "getting_started": "Getting started guide",
+            "features": "Feature descriptions and usage",
+            "troubleshooting": "Common issues and solutions",
+            "faq": "Frequently asked questions"
+        },
+        "technical_spec": {
+            "requirements": f"Technical Specifications for {request.project_name}",
+            "system_requirements": "Hardware and software requirements",
+            "implementation": "Implementation details and guidelines",
+            "testing": "Testing procedures and criteria",
+            "maintenance": "Maintenance and support procedures"
+        }
+    }
+
+    fallback_content = doc_templates.get(request.doc_type, doc_templates["technical_spec"])
+    template = DOCUMENT_TEMPLATES["technical_doc"].get(request.doc_type)
+    section_names = template["sections"] if template else list(fallback_content)
+
+    details = "\n".join([
+        f"Project: {request.project_name}",
+        f"Documentation type: {request.doc_type}",
+        f"Codebase: {request.codebase_id or 'not specified'}",
+        f"Wireframe: {request.wireframe_id or 'not specified'}",
+        f"Additional context: {request.additional_context or 'none'}",
+    ])
+
+    return DocumentPlan(
+        title=template["name"] if template else f"{request.doc_type.replace('_', ' ')} document",
+        details=details,
+        query=" ".join(filter(None, [request.project_name, request.doc_type, request.additional_context])),
+        sections=[
+            SectionSpec(
+                name,
+                fallback_content.get(name, f"{name.replace('_', ' ').title()} to be defined"),
+                f"Cover: {fallback_content.get(name, name.replace('_', ' '))}."
+            )
+            for name in section_names
+        ],
+    )
+
+
+def _technical_doc_response(request: TechnicalDocRequest, document_content: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "status": "success",
+        "document_type": "technical_documentation",
+        "project_name": request.project_name,
+        "doc_subtype": request.doc_type,
+        "content": document_content,
+        "message": f"{request.doc_type.title()} documentation generated successfully"
+    }
+
+
+@router.post("/technical-doc", response_model=None)
+async def generate_technical_doc(
+    request: TechnicalDocRequest,
+    stream: bool = False
+) -> Union[Dict[str, Any], StreamingResponse]:
     """
     Generate technical documentation from codebase and wireframes
     Supports: API docs, Architecture docs, User guides, Technical specifications
+    With ?stream=true, sections are streamed as Server-Sent Events
     """
     try:
-        # TODO: Retrieve relevant codebase analysis from Chroma
         # TODO: Incorporate wireframe analysis if provided
-        # TODO: Use Gemini API to generate structured documentation
         # TODO: Apply technical writing validation
 
-        # Mock response structure based on doc type
-        doc_templates = {
-            "api": {
-                "introduction": f"API Documentation for {request.project_name}",
-                "authentication": "Authentication methods and requirements",
-                "endpoints": "API endpoints and their specifications",
-                "examples": "Request/response examples",
-                "error_handling": "Error codes and handling"
-            },
-            "architecture": {
-                "overview": f"System Architecture for {request.project_name}",
-                "components": "System components and their interactions",
-                "data_flow": "Data flow and processing pipeline",
-                "deployment": "Deployment architecture and requirements",
-                "security": "Security considerations and implementations"
-            },
-            "user_guide": {
-                "introduction": f"User Guide for {request.project_name}",
-                "getting_started": "Getting started guide",
-                "features": "Feature descriptions and usage",
-                "troubleshooting": "Common issues and solutions",
-                "faq": "Frequently asked questions"
-            },
-            "technical_spec": {
-                "requirements": f"Technical Specifications for {request.project_name}",
-                "system_requirements": "Hardware and software requirements",
-                "implementation": "Implementation details and guidelines",
-                "testing": "Testing procedures and criteria",
-                "maintenance": "Maintenance and support procedures"
-            }
-        }
+        plan = build_technical_doc_plan(request)
+        llm = get_llm()
+        retriever = get_retriever() if llm is not None else None
+
+        if stream:
+            logger.info(f"Streaming technical documentation: {request.doc_type} for {request.project_name}")
+            return sse_response(
+                stream_document(plan, llm, retriever, cache=get_response_cache()),
+                finalize=lambda content: _technical_doc_response(request, content)
+            )
 
-        document_content = doc_templates.get(request.doc_type, doc_templates["technical_spec"])
+        document_content = await generate_document(plan, llm, retriever, cache=get_response_cache())
 
         logger.info(f"Technical documentation generated: {request.doc_type} for {request.project_name}")
 
-        return {
-            "status": "success",
-            "document_type": "technical_documentation",
-            "project_name": request.project_name,
-            "doc_subtype": request.doc_type,
-            "content": document_content,
-            "message": f"{request.doc_type.title()} documentation generated successfully"
-        }
+        return _technical_doc_response(request, document_content)
 
     except Exception as e:
         logger.error(f"Error generating technical doc: {str(e)}")
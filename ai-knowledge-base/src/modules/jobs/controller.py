@@ -0,0 +1,44 @@
+from fastapi import APIRouter, HTTPException
+from typing import Dict, Any, Optional
+import asyncio
+import logging
+
+from src.services.jobs import get_job_queue
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get("/{job_id}")
+async def get_job(job_id: str) -> Dict[str, Any]:
+    """
+    Get the status, progress and result of a background job
+    """
+    job = await asyncio.to_thread(get_job_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+
+    return {
+        "status": "success",
+        "job": job.to_dict(),
+        "message": f"Job is {job.status}"
+    }
+
+@router.get("/")
+async def list_jobs(status: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
+    """
+    List recent background jobs, optionally filtered by status
+    Statuses: queued, running, succeeded, failed
+    """
+    try:
+        jobs = await asyncio.to_thread(get_job_queue().store.list, status=status, limit=min(limit, 500))
+
+        return {
+            "status": "success",
+            "count": len(jobs),
+            "jobs": [job.to_dict() for job in jobs],
+            "message": "Jobs retrieved successfully"
+        }
+
+    except Exception as e:
+        logger.error(f"Error listing jobs: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Retrieval failed: {str(e)}")
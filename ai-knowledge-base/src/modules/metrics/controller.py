@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from src.services.metrics import CONTENT_TYPE, get_metrics
+
+router = APIRouter()
+
+@router.get("/metrics")
+def metrics() -> Response:
+    """
+    Request latencies, pipeline stage timings, token and cache counters
+    in the Prometheus text exposition format
+    """
+    return Response(content=get_metrics().render(), media_type=CONTENT_TYPE)
@@ -45,6 +45,25 @@ DOCUMENT_TEMPLATES = {
     }
 }
 
+# How each template section appears in the response, and what the LLM is asked to write
+PROPOSAL_SECTIONS = {
+    "executive_summary": ("executive_summary", "Summarize the client's needs and the proposed solution in one paragraph."),
+    "project_overview": ("project_overview", "Describe the project goals and context."),
+    "scope_of_work": ("scope_of_work", "List the work items in scope, one per line."),
+    "timeline": ("timeline", "Propose phases and milestones that fit the requested timeline."),
+    "budget": ("budget_estimate", "Give a budget estimate broken down by phase, within the budget range."),
+    "technical_approach": ("technical_approach", "Describe the technical approach, drawing on the uploaded codebase and wireframes."),
+    "team": ("team_composition", "Recommend the team roles and their allocation."),
+    "deliverables": ("deliverables", "List the project deliverables and their milestones."),
+    "terms": ("terms_and_conditions", None),
+    "technical_overview": ("technical_overview", "Give an overview of the proposed technical solution."),
+    "architecture": ("architecture", "Describe the proposed system architecture and its components."),
+    "implementation": ("implementation", "Describe the implementation approach and phases."),
+    "testing": ("testing", "Describe the testing strategy and quality gates."),
+    "deployment": ("deployment", "Describe the deployment approach and environments."),
+    "maintenance": ("maintenance", "Describe maintenance and support after delivery."),
+}
+
 @router.get("/{doc_type}")
 async def get_templates(doc_type: str) -> Dict[str, Any]:
     """
@@ -1,14 +1,17 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
 from typing import Dict, Any, List
-import zipfile
-import tempfile
-import os
+import asyncio
 import logging
+import os
 
-router = APIRouter()
+from src.services.jobs import get_job_queue
+from src.services.uploads import UploadRoute, max_request_bytes, spool_upload
+from src.modules.upload.codebase.tasks import process_codebase  # noqa: F401 (registers job handler)
+
+router = APIRouter(route_class=UploadRoute)
 logger = logging.getLogger(__name__)
 
-@router.post("/codebase")
+@router.post("/codebase", status_code=202)
 async def upload_codebase(
     files: List[UploadFile] = File(...),
     project_name: str = Form(...),
@@ -17,49 +20,55 @@ async def upload_codebase(
     """
     Upload codebase files for analysis and documentation
     Supports: .zip archives, individual source files
+    Processing runs in the background; poll /jobs/{job_id} for progress
     """
     try:
         processed_files = []
+        spooled = []
         total_size = 0
 
-        for file in files:
-            content = await file.read()
-            total_size += len(content)
-
-            # Handle zip files
-            if file.filename.endswith('.zip'):
-                with tempfile.NamedTemporaryFile(delete=False) as tmp:
-                    tmp.write(content)
-                    tmp_path = tmp.name
+        try:
+            for file in files:
+                # The request limit applies to all files of the request together
+                upload = await spool_upload(file, max_bytes=max_request_bytes() - total_size)
+                total_size += upload.size
+                spooled.append({"path": upload.path, "filename": file.filename, "sha256": upload.sha256})
 
-                # TODO: Extract and analyze zip contents
-                # TODO: Parse code structure, functions, classes
-                # TODO: Generate code documentation
+                processed_files.append({
+                    "filename": file.filename,
+                    "size": upload.size,
+                    "type": file.content_type,
+                    "sha256": upload.sha256
+                })
+        except BaseException:
+            for item in spooled:
+                os.unlink(item["path"])
+            raise
 
-                os.unlink(tmp_path)
-
-            processed_files.append({
-                "filename": file.filename,
-                "size": len(content),
-                "type": file.content_type
-            })
-
-        # TODO: Use Gemini API to analyze code structure
         # TODO: Extract documentation from comments
-        # TODO: Store code embeddings in Chroma
+        job = await asyncio.to_thread(get_job_queue().submit, "upload.codebase", {
+            "project_name": project_name,
+            "language": language,
+            "files": spooled,
+            "spool_paths": [item["path"] for item in spooled]
+        })
 
-        logger.info(f"Codebase uploaded: {project_name} with {len(files)} files")
+        logger.info(f"Codebase uploaded: {project_name} with {len(files)} files (job {job.id})")
 
         return {
-            "status": "success",
+            "status": "accepted",
             "project_name": project_name,
             "language": language,
             "files_processed": len(files),
             "total_size": total_size,
             "files": processed_files,
-            "message": "Codebase uploaded and analyzed successfully"
+            "job_id": job.id,
+            "job_url": f"/jobs/{job.id}",
+            "message": "Codebase uploaded and queued for analysis"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing codebase: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
@@ -0,0 +1,30 @@
+from typing import Any, Dict
+import logging
+import os
+
+from src.services.code_indexer import CodebaseIndexer, project_collection_name
+from src.services.jobs import ProgressCallback, job_handler
+from src.services.manifest import IngestManifest
+from src.services.vectorstore import get_vectorstore
+
+logger = logging.getLogger(__name__)
+
+@job_handler("upload.codebase")
+def process_codebase(payload: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    """Index the uploaded files and archives into the project's Chroma collection"""
+    collection_name = project_collection_name(payload["project_name"])
+    manifest = IngestManifest(os.path.join(
+        os.environ.get("CHROMA_PERSIST_DIR", "./chroma_db"), "code_manifests", f"{collection_name}.json"
+    ))
+    indexer = CodebaseIndexer(get_vectorstore(collection_name), manifest)
+
+    # TODO: Use Gemini API to analyze code structure
+    progress(0.05, "Hashing source files")
+    report = indexer.index(
+        payload["files"],
+        metadata={"project": payload["project_name"], "language": payload["language"], "type": "codebase"},
+        progress=lambda fraction, message=None: progress(0.05 + 0.95 * fraction, message)
+    )
+
+    logger.info(f"Codebase processed: {payload['project_name']} -> {collection_name}")
+    return {"project_name": payload["project_name"], "collection": collection_name, **report.as_dict()}
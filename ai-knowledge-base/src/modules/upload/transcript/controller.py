@@ -1,39 +1,53 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from typing import Dict, Any
+import asyncio
 import logging
 
-router = APIRouter()
+from src.services.jobs import get_job_queue
+from src.services.uploads import UploadRoute, spool_upload
+from src.modules.upload.transcript.tasks import process_transcript  # noqa: F401 (registers job handler)
+
+router = APIRouter(route_class=UploadRoute)
 logger = logging.getLogger(__name__)
 
-@router.post("/transcript")
+@router.post("/transcript", status_code=202)
 async def upload_transcript(file: UploadFile = File(...)) -> Dict[str, Any]:
     """
     Upload AI notetaker transcripts for processing
     Supports: .txt, .json, .srt, .vtt formats
+    Processing runs in the background; poll /jobs/{job_id} for progress
     """
     try:
         # Validate file type
-        allowed_types = ["text/plain", "application/json", "text/srt", "text/vtt"]
+        allowed_types = ["text/plain", "application/json", "text/srt", "application/x-subrip", "text/vtt"]
         if file.content_type not in allowed_types:
             raise HTTPException(status_code=400, detail="Unsupported file type")
 
-        # Read file content
-        content = await file.read()
+        upload = await spool_upload(file)
 
-        # TODO: Process transcript with Gemini API
-        # TODO: Extract key information, speakers, topics
-        # TODO: Store in Chroma vector database
+        job = await asyncio.to_thread(get_job_queue().submit, "upload.transcript", {
+            "path": upload.path,
+            "filename": file.filename,
+            "content_type": file.content_type,
+            "sha256": upload.sha256,
+            "spool_paths": [upload.path]
+        })
 
-        logger.info(f"Transcript uploaded: {file.filename}")
+        logger.info(f"Transcript uploaded: {file.filename} (job {job.id})")
 
         return {
-            "status": "success",
+            "status": "accepted",
             "filename": file.filename,
-            "size": len(content),
+            "size": upload.size,
+            "sha256": upload.sha256,
             "type": "transcript",
-            "message": "Transcript uploaded and processed successfully"
+            "job_id": job.id,
+            "job_url": f"/jobs/{job.id}",
+            "message": "Transcript uploaded and queued for processing"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing transcript: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
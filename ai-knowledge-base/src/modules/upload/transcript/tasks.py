@@ -0,0 +1,59 @@
+from typing import Any, Dict, List
+import logging
+import os
+
+from langchain_core.documents import Document as LCDocument
+
+from src.services.jobs import ProgressCallback, job_handler
+from src.services.manifest import chunk_id_prefix, params_key
+from src.services.transcripts import TranscriptChunker, iter_turns, transcript_format
+from src.services.vectorstore import get_vectorstore
+
+logger = logging.getLogger(__name__)
+
+@job_handler("upload.transcript")
+def process_transcript(payload: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    """Parse an uploaded transcript into speaker-turn chunks and store them while parsing"""
+    path = payload["path"]
+    size = os.path.getsize(path) or 1
+    chunker = TranscriptChunker(
+        max_tokens=int(os.environ.get("TRANSCRIPT_CHUNK_TOKENS", "300")),
+        max_seconds=float(os.environ.get("TRANSCRIPT_CHUNK_SECONDS", "180")),
+    )
+    batch_size = int(os.environ.get("TRANSCRIPT_EMBED_BATCH", "64"))
+    vectorstore = get_vectorstore()
+
+    # TODO: Process transcript with Gemini API
+    # TODO: Extract key information, topics
+
+    with open(path, "rb") as f:
+        fmt = transcript_format(payload["filename"], payload.get("content_type", ""), f.read(4096))
+        f.seek(0)
+        key = params_key({"chunker": "transcript-turns", "max_tokens": chunker.max_tokens, "max_seconds": chunker.max_seconds})
+        prefix = chunk_id_prefix(payload["filename"], payload.get("sha256", ""), key)
+        progress(0.05, f"Parsing {fmt} transcript")
+
+        chunks = 0
+        speakers = set()
+        batch: List[LCDocument] = []
+
+        def flush() -> None:
+            ids = [f"{prefix}-{chunks - len(batch) + i}" for i in range(len(batch))]
+            for document, chunk_id in zip(batch, ids):
+                document.metadata["chunk_id"] = chunk_id
+            vectorstore.add_documents(batch, ids=ids)
+            progress(0.05 + 0.95 * min(f.tell() / size, 1.0), f"Embedded {chunks} chunk(s)")
+            batch.clear()
+
+        metadata = {"source": payload["filename"], "type": "transcript", "format": fmt}
+        for document in chunker.chunk(iter_turns(f, fmt), metadata):
+            chunks += 1
+            speakers.update(filter(None, document.metadata["speakers"].split(", ")))
+            batch.append(document)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+
+    logger.info(f"Transcript processed: {payload['filename']} ({fmt}, {chunks} chunks)")
+    return {"filename": payload["filename"], "format": fmt, "chunks": chunks, "speakers": sorted(speakers)}
@@ -1,17 +1,23 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from typing import Dict, Any
+import asyncio
 import logging
-from PIL import Image
-import io
+import os
 
-router = APIRouter()
+from src.services.jobs import get_job_queue
+from src.services.uploads import UploadRoute, spool_upload
+from src.services.wireframes import read_dimensions
+from src.modules.upload.wireframe.tasks import process_wireframe  # noqa: F401 (registers job handler)
+
+router = APIRouter(route_class=UploadRoute)
 logger = logging.getLogger(__name__)
 
-@router.post("/wireframe")
+@router.post("/wireframe", status_code=202)
 async def upload_wireframe(file: UploadFile = File(...)) -> Dict[str, Any]:
     """
     Upload UX wireframes for analysis and documentation
     Supports: .png, .jpg, .jpeg, .svg, .pdf formats
+    Analysis runs in the background; poll /jobs/{job_id} for progress
     """
     try:
         # Validate file type
@@ -19,36 +25,44 @@ async def upload_wireframe(file: UploadFile = File(...)) -> Dict[str, Any]:
         if file.content_type not in allowed_types:
             raise HTTPException(status_code=400, detail="Unsupported wireframe format")
 
-        content = await file.read()
+        upload = await spool_upload(file)
+        dimensions = None
 
         # Process image files
         if file.content_type.startswith("image/"):
             try:
-                image = Image.open(io.BytesIO(content))
-                dimensions = image.size
-
-                # TODO: Use Gemini Vision API to analyze wireframe
-                # TODO: Extract UI components, layout structure
-                # TODO: Generate technical specifications
-
-            except Exception as img_error:
+                # Only the header is parsed, which is enough to reject invalid files
+                dimensions = read_dimensions(upload.path, file.content_type)
+            except ValueError:
+                os.unlink(upload.path)
                 raise HTTPException(status_code=400, detail="Invalid image file")
 
-        # TODO: Store wireframe analysis in Chroma
-        # TODO: Extract design patterns and components
+        job = await asyncio.to_thread(get_job_queue().submit, "upload.wireframe", {
+            "path": upload.path,
+            "filename": file.filename,
+            "content_type": file.content_type,
+            "dimensions": dimensions,
+            "sha256": upload.sha256,
+            "spool_paths": [upload.path]
+        })
 
-        logger.info(f"Wireframe uploaded: {file.filename}")
+        logger.info(f"Wireframe uploaded: {file.filename} (job {job.id})")
 
         return {
-            "status": "success",
+            "status": "accepted",
             "filename": file.filename,
-            "size": len(content),
+            "size": upload.size,
+            "sha256": upload.sha256,
             "type": "wireframe",
             "content_type": file.content_type,
-            "dimensions": dimensions if file.content_type.startswith("image/") else None,
-            "message": "Wireframe uploaded and analyzed successfully"
+            "dimensions": dimensions,
+            "job_id": job.id,
+            "job_url": f"/jobs/{job.id}",
+            "message": "Wireframe uploaded and queued for analysis"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing wireframe: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
@@ -0,0 +1,53 @@
+from typing import Any, Dict
+import logging
+import os
+
+from src.services.chunker import StructureChunker
+from src.services.converter_pool import get_converter_pool
+from src.services.jobs import ProgressCallback, job_handler
+from src.services.vectorstore import get_vectorstore
+from src.services.wireframes import VisionSettings, WireframePreprocessor, get_hash_index
+
+logger = logging.getLogger(__name__)
+
+@job_handler("upload.wireframe")
+def process_wireframe(payload: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    """Prepare vision-sized images of an uploaded wireframe and store its extracted content in Chroma"""
+    progress(0.05, "Preparing images")
+    preprocessor = WireframePreprocessor(
+        os.path.join(os.environ.get("WIREFRAME_IMAGE_DIR", "./data/wireframes"), payload["sha256"][:16]),
+        get_hash_index(),
+        VisionSettings.from_env(),
+    )
+    prepared = preprocessor.prepare(payload["path"], payload["content_type"], payload["filename"], payload["sha256"])
+    result = {
+        "filename": payload["filename"],
+        "dimensions": payload.get("dimensions"),
+        **prepared.as_dict(),
+        "images": [image.as_dict() for image in prepared.images],
+    }
+    if prepared.is_duplicate:
+        logger.info(f"Wireframe skipped as a duplicate: {payload['filename']} -> {result['duplicate_of']}")
+        return {**result, "chunks": 0}
+
+    chunks = []
+    if payload["content_type"] == "application/pdf":
+        progress(0.3, "Converting PDF")
+        dl_doc = get_converter_pool().convert(payload["path"]).document
+        chunks = list(StructureChunker().chunk(dl_doc, {"source": payload["filename"], "type": "wireframe"}))
+
+    # TODO: Use Gemini Vision API to analyze prepared.images
+    # TODO: Extract UI components, layout structure
+    # TODO: Extract design patterns and components
+
+    progress(0.6, f"Embedding {len(chunks)} chunk(s)")
+    if chunks:
+        # IDs derived from the file's bytes, so a retried job upserts instead of adding duplicates
+        for index, chunk in enumerate(chunks):
+            chunk.metadata["chunk_id"] = f"wireframe-{payload['sha256'][:24]}-p{chunk.metadata.get('page_start', 0)}-{index}"
+        get_vectorstore().add_documents(chunks, ids=[chunk.metadata["chunk_id"] for chunk in chunks])
+
+    # Only now are the pages findable as duplicates of this upload
+    preprocessor.record(prepared, payload["filename"], payload["sha256"])
+    logger.info(f"Wireframe processed: {payload['filename']}")
+    return {**result, "chunks": len(chunks)}
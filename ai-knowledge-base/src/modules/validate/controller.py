@@ -1,7 +1,15 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
+import asyncio
 import logging
+import os
+import time
+
+from src.modules.validate.incremental import get_incremental_validator
+from src.modules.validate.rules import get_rule_engine
+from src.services.sse import format_sse
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -9,37 +17,81 @@ logger = logging.getLogger(__name__)
 class ValidationRequest(BaseModel):
     document_type: str
     content: Dict[str, Any]
+    # Template of DOCUMENT_TEMPLATES whose sections/fields are required; the type's default rules otherwise
+    template: Optional[str] = None
+    # Rule ids ("required:summary") or categories ("required", "suggest") to run; all rules otherwise
     validation_rules: Optional[List[str]] = None
 
+class BatchValidationItem(ValidationRequest):
+    doc_id: str
+
+class BatchValidationRequest(BaseModel):
+    documents: List[BatchValidationItem]
+
 class ValidationResult(BaseModel):
     is_valid: bool
     score: float
     issues: List[Dict[str, str]]
     suggestions: List[str]
 
+@router.post("/batch")
+async def validate_batch(request: BatchValidationRequest) -> StreamingResponse:
+    """
+    Validate many documents in one call
+    Results are streamed as Server-Sent Events: one `result` event per document,
+    in request order, then a `done` event with totals
+    """
+    engine = get_rule_engine()
+    slice_size = int(os.environ.get("VALIDATION_BATCH_SLICE", "256"))
+
+    async def body() -> AsyncIterator[str]:
+        started = time.perf_counter()
+        valid = invalid = failed = 0
+        documents = request.documents
+        for start in range(0, len(documents), slice_size):
+            items = documents[start:start + slice_size]
+            results = await asyncio.to_thread(engine.validate_many, [item.model_dump() for item in items])
+            for offset, (item, result) in enumerate(zip(items, results)):
+                event = {"index": start + offset, "document_id": item.doc_id, "document_type": item.document_type}
+                if "error" in result:
+                    failed += 1
+                    yield format_sse({**event, "status": "error", "detail": result["error"]}, event="result")
+                    continue
+                valid += result["is_valid"]
+                invalid += not result["is_valid"]
+                yield format_sse({**event, "status": "success", "validation": result}, event="result")
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"Batch validated: {len(documents)} document(s) in {elapsed:.3f}s")
+        yield format_sse({
+            "documents": len(documents),
+            "valid": valid,
+            "invalid": invalid,
+            "failed": failed,
+            "elapsed_ms": round(elapsed * 1000, 2),
+        }, event="done")
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.post("/{doc_id}")
 async def validate_document(doc_id: str, request: ValidationRequest) -> Dict[str, Any]:
     """
     Validate generated documents against quality criteria
     Checks: completeness, structure, content quality, formatting
+    Repeated calls for the same doc_id only re-run the checks of sections that changed
     """
     try:
-        validation_results = ValidationResult(
-            is_valid=True,
-            score=0.0,
-            issues=[],
-            suggestions=[]
-        )
-
-        # Document type specific validation
-        if request.document_type == "proposal":
-            validation_results = await _validate_proposal(request.content)
-        elif request.document_type == "technical_doc":
-            validation_results = await _validate_technical_doc(request.content)
-        elif request.document_type == "jira_ticket":
-            validation_results = await _validate_jira_ticket(request.content)
-        else:
-            validation_results = await _validate_generic(request.content)
+        try:
+            result = await get_incremental_validator().validate(
+                doc_id, request.document_type, request.content, request.template, request.validation_rules
+            )
+        except KeyError as e:
+            raise HTTPException(status_code=400, detail=str(e.args[0]))
+        validation_results = ValidationResult(**result)
 
         logger.info(f"Document validated: {doc_id} - Score: {validation_results.score}")
 
@@ -53,106 +105,12 @@ async def validate_document(doc_id: str, request: ValidationRequest) -> Dict[str
                 "issues": validation_results.issues,
                 "suggestions": validation_results.suggestions
             },
+            "incremental": result["incremental"],
             "message": "Document validation completed"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error validating document: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Validation failed: {str(e)}")
-
-async def _validate_proposal(content: Dict[str, Any]) -> ValidationResult:
-    """Validate proposal document structure and content"""
-    issues = []
-    suggestions = []
-    score = 100.0
-
-    required_sections = ["executive_summary", "project_overview", "scope_of_work", "timeline", "budget_estimate"]
-
-    for section in required_sections:
-        if section not in content or not content[section]:
-            issues.append({
-                "type": "missing_section",
-                "severity": "high",
-                "message": f"Required section '{section}' is missing or empty"
-            })
-            score -= 20.0
-
-    if not issues:
-        suggestions.append("Consider adding client testimonials or case studies")
-        suggestions.append("Include detailed project milestones")
-
-    return ValidationResult(
-        is_valid=len(issues) == 0,
-        score=max(0.0, score),
-        issues=issues,
-        suggestions=suggestions
-    )
-
-async def _validate_technical_doc(content: Dict[str, Any]) -> ValidationResult:
-    """Validate technical documentation structure and content"""
-    issues = []
-    suggestions = []
-    score = 100.0
-
-    # TODO: Implement specific technical documentation validation
-    # Check for code examples, proper formatting, completeness
-
-    suggestions.append("Consider adding code examples")
-    suggestions.append("Include diagrams or flowcharts")
-
-    return ValidationResult(
-        is_valid=True,
-        score=score,
-        issues=issues,
-        suggestions=suggestions
-    )
-
-async def _validate_jira_ticket(content: Dict[str, Any]) -> ValidationResult:
-    """Validate Jira ticket structure and content"""
-    issues = []
-    suggestions = []
-    score = 100.0
-
-    required_fields = ["summary", "description", "priority"]
-
-    for field in required_fields:
-        if field not in content or not content[field]:
-            issues.append({
-                "type": "missing_field",
-                "severity": "medium",
-                "message": f"Required field '{field}' is missing"
-            })
-            score -= 15.0
-
-    if content.get("ticket_type") == "story" and "acceptance_criteria" not in content:
-        suggestions.append("User stories should include acceptance criteria")
-
-    return ValidationResult(
-        is_valid=len([i for i in issues if i["severity"] == "high"]) == 0,
-        score=max(0.0, score),
-        issues=issues,
-        suggestions=suggestions
-    )
-
-async def _validate_generic(content: Dict[str, Any]) -> ValidationResult:
-    """Generic validation for any document type"""
-    issues = []
-    suggestions = []
-    score = 85.0  # Default score for generic validation
-
-    if not content:
-        issues.append({
-            "type": "empty_content",
-            "severity": "high",
-            "message": "Document content is empty"
-        })
-        score = 0.0
-
-    suggestions.append("Consider using specific document type validation")
-
-    return ValidationResult(
-        is_valid=len(issues) == 0,
-        score=score,
-        issues=issues,
-        suggestions=suggestions
-    )
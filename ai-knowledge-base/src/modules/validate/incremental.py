@@ -0,0 +1,288 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+from langchain_core.language_models import BaseLLM
+from langchain_core.prompts import PromptTemplate
+
+from src.modules.validate.rules import DOCUMENT_KEYS, CompiledRuleSet, RuleEngine, rule_enabled, get_rule_engine
+from src.services.context_packer import estimate_tokens
+from src.services.llm import get_llm
+from src.services.metrics import count_llm_tokens, get_metrics, span, stats_samples
+
+logger = logging.getLogger(__name__)
+
+REVIEW_PROMPT = PromptTemplate.from_template("""
+You are reviewing the "{section}" section of a {document_type}.
+
+{text}
+
+If the section is clear, specific and complete, answer only "OK".
+Otherwise answer with one sentence describing its most important problem.
+""")
+
+# Score deducted per section the LLM review flags; review issues never change is_valid
+REVIEW_PENALTY = 5.0
+# Longest section text sent for review
+REVIEW_MAX_CHARS = 6000
+
+
+def section_hashes(content: Dict[str, Any]) -> Dict[str, str]:
+    """Content hash of every section, plus DOCUMENT_KEYS for the set of sections present"""
+    def digest(value: Any) -> str:
+        return hashlib.blake2b(json.dumps(value, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+    hashes = {key: digest(value) for key, value in content.items()}
+    hashes[DOCUMENT_KEYS] = digest(sorted(content))
+    return hashes
+
+
+def section_text(value: Any) -> Optional[str]:
+    """Reviewable text of a section: non-empty strings and lists of strings"""
+    if isinstance(value, str):
+        text = value.strip()
+    elif isinstance(value, list) and value and all(isinstance(item, str) for item in value):
+        text = "\n".join(f"- {item.strip()}" for item in value)
+    else:
+        return None
+    return text[:REVIEW_MAX_CHARS] or None
+
+
+class SectionReviewer:
+    """LLM quality review of a single section"""
+
+    def __init__(self, llm: BaseLLM, max_concurrency: int = 4) -> None:
+        self.llm = llm
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def review(self, document_type: str, section: str, text: str) -> Optional[Dict[str, str]]:
+        """Issue found in the section, or None when the model answers OK"""
+        prompt = REVIEW_PROMPT.format(section=section, document_type=document_type.replace("_", " "), text=text)
+        async with self._semaphore:
+            with span("llm"):
+                answer = str(await self.llm.ainvoke(prompt)).strip()
+        count_llm_tokens(estimate_tokens(prompt), estimate_tokens(answer))
+        if not answer or answer.upper().rstrip(".").startswith("OK"):
+            return None
+        return {"type": "quality", "severity": "low", "message": f"Section '{section}': {answer[:300]}"}
+
+
+@dataclass
+class ValidationCacheMetrics:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    rules_evaluated: int = 0
+    rules_reused: int = 0
+    reviews_run: int = 0
+    reviews_reused: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "rules_evaluated": self.rules_evaluated,
+            "rules_reused": self.rules_reused,
+            "reviews_run": self.reviews_run,
+            "reviews_reused": self.reviews_reused,
+        }
+
+
+@dataclass
+class _DocumentState:
+    rule_set: CompiledRuleSet
+    hashes: Dict[str, str]
+    # Unfiltered fired flags of every check / suggestion; rule selection is applied per request
+    checks: np.ndarray
+    suggestions: np.ndarray
+    # section -> (content hash, issue or None) of the last LLM review
+    reviews: Dict[str, Tuple[str, Optional[Dict[str, str]]]] = field(default_factory=dict)
+
+
+class IncrementalValidator:
+    """Re-validates documents by re-running only the rules that read changed sections.
+
+    The last outcome of every rule is kept per document together with a
+    content hash of each section. On the next validation of the same document
+    only the sections whose hash changed are looked at: rules that do not
+    depend on them keep their cached outcome, and the optional LLM review
+    only runs for changed sections. Documents are evicted least recently
+    validated first once more than `max_documents` are held.
+    """
+
+    def __init__(self, engine: RuleEngine, max_documents: int = 1024, reviewer: Optional[SectionReviewer] = None) -> None:
+        self.engine = engine
+        self.max_documents = max_documents
+        self.reviewer = reviewer
+        self.metrics = ValidationCacheMetrics()
+        self._documents: "OrderedDict[str, _DocumentState]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _cached(self, doc_id: str, rule_set: CompiledRuleSet) -> Optional[_DocumentState]:
+        with self._lock:
+            state = self._documents.get(doc_id)
+            # A different document type or template means none of the cached outcomes apply
+            if state is None or state.rule_set is not rule_set:
+                self.metrics.misses += 1
+                return None
+            self._documents.move_to_end(doc_id)
+            self.metrics.hits += 1
+            return state
+
+    def _store(self, doc_id: str, state: _DocumentState) -> None:
+        with self._lock:
+            self._documents[doc_id] = state
+            self._documents.move_to_end(doc_id)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+                self.metrics.evictions += 1
+
+    def forget(self, doc_id: str) -> None:
+        with self._lock:
+            self._documents.pop(doc_id, None)
+
+    def _evaluate(
+        self, rule_set: CompiledRuleSet, content: Dict[str, Any], previous: Optional[_DocumentState], changed: Set[str]
+    ) -> Tuple[np.ndarray, np.ndarray, int]:
+        if previous is None:
+            checks, suggestions = rule_set.fired(rule_set.features_of([content]))
+            return checks[0], suggestions[0], checks.shape[1] + suggestions.shape[1]
+
+        checks, suggestions = previous.checks.copy(), previous.suggestions.copy()
+        check_rows, suggestion_rows, columns = rule_set.rows_depending_on(frozenset(changed))
+        if check_rows or suggestion_rows:
+            fired_checks, fired_suggestions = rule_set.fired(
+                rule_set.features_of([content], columns), check_rows, suggestion_rows
+            )
+            checks[check_rows] = fired_checks[0]
+            suggestions[suggestion_rows] = fired_suggestions[0]
+        return checks, suggestions, len(check_rows) + len(suggestion_rows)
+
+    async def _review(
+        self,
+        document_type: str,
+        content: Dict[str, Any],
+        hashes: Dict[str, str],
+        previous: Optional[_DocumentState],
+    ) -> Tuple[Dict[str, Tuple[str, Optional[Dict[str, str]]]], int, int]:
+        """Review outcome of every textual section, and how many reviews ran and were reused"""
+        reviews: Dict[str, Tuple[str, Optional[Dict[str, str]]]] = {}
+        if self.reviewer is None:
+            return reviews, 0, 0
+        pending: List[Tuple[str, str]] = []
+        reused = 0
+        for section, value in content.items():
+            text = section_text(value)
+            if text is None:
+                continue
+            cached = previous.reviews.get(section) if previous else None
+            if cached and cached[0] == hashes[section]:
+                reviews[section] = cached
+                reused += 1
+            else:
+                pending.append((section, text))
+
+        outcomes = await asyncio.gather(
+            *(self.reviewer.review(document_type, section, text) for section, text in pending),
+            return_exceptions=True,
+        )
+        for (section, _), outcome in zip(pending, outcomes):
+            if isinstance(outcome, Exception):
+                # Left uncached so the next validation tries again
+                logger.warning(f"Section review failed for '{section}': {str(outcome)}")
+                continue
+            reviews[section] = (hashes[section], outcome)
+        return reviews, len(pending), reused
+
+    async def validate(
+        self,
+        doc_id: str,
+        document_type: str,
+        content: Dict[str, Any],
+        template: Optional[str] = None,
+        enabled: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """Validation result of the document plus an `incremental` summary of what was re-evaluated.
+
+        Raises KeyError for a template the document type does not have.
+        """
+        rule_set = self.engine.rule_set(document_type, template)
+        hashes = section_hashes(content)
+        previous = self._cached(doc_id, rule_set)
+        if previous is None:
+            changed = set(hashes)
+        else:
+            changed = {key for key in hashes.keys() | previous.hashes.keys() if hashes.get(key) != previous.hashes.get(key)}
+
+        checks, suggestions, evaluated = self._evaluate(rule_set, content, previous, changed)
+        reviews, reviewed, reused = await self._review(document_type, content, hashes, previous)
+        self._store(doc_id, _DocumentState(rule_set, hashes, checks, suggestions, reviews))
+
+        selection: Optional[FrozenSet[str]] = frozenset(enabled) if enabled else None
+        result = rule_set.results(checks[None, :], suggestions[None, :], selection)[0]
+        flagged = [
+            issue for section, (_, issue) in reviews.items()
+            if issue is not None and rule_enabled(f"review:{section}", selection)
+        ]
+        if flagged:
+            result["issues"].extend(dict(issue) for issue in flagged)
+            result["score"] = round(max(0.0, result["score"] - REVIEW_PENALTY * len(flagged)), 2)
+
+        total = len(checks) + len(suggestions)
+        with self._lock:
+            self.metrics.rules_evaluated += evaluated
+            self.metrics.rules_reused += total - evaluated
+            self.metrics.reviews_run += reviewed
+            self.metrics.reviews_reused += reused
+
+        result["incremental"] = {
+            "cached": previous is not None,
+            "changed_sections": sorted(key for key in changed if key != DOCUMENT_KEYS),
+            "rules_evaluated": evaluated,
+            "rules_reused": total - evaluated,
+            "reviews_run": reviewed,
+        }
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"documents": len(self._documents), "max_documents": self.max_documents, **self.metrics.as_dict()}
+
+
+_validator: Optional[IncrementalValidator] = None
+_validator_lock = threading.Lock()
+
+
+def get_incremental_validator() -> IncrementalValidator:
+    """Process-wide incremental validator configured from VALIDATION_* variables"""
+    global _validator
+    if _validator is None:
+        with _validator_lock:
+            if _validator is None:
+                reviewer = None
+                if os.environ.get("VALIDATION_LLM_REVIEW", "false").lower() == "true":
+                    llm = get_llm()
+                    if llm is None:
+                        logger.warning("VALIDATION_LLM_REVIEW is set but no LLM is configured; skipping section reviews")
+                    else:
+                        reviewer = SectionReviewer(llm, int(os.environ.get("VALIDATION_REVIEW_CONCURRENCY", "4")))
+                _validator = IncrementalValidator(
+                    get_rule_engine(),
+                    max_documents=int(os.environ.get("VALIDATION_CACHE_DOCUMENTS", "1024")),
+                    reviewer=reviewer,
+                )
+                validator = _validator
+                get_metrics().register_collector(
+                    "validation_cache", lambda: stats_samples("validation_cache", validator.stats())
+                )
+    return _validator
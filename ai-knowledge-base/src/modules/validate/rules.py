@@ -0,0 +1,339 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+import logging
+import threading
+
+import numpy as np
+
+from src.modules.templates.controller import DOCUMENT_TEMPLATES, PROPOSAL_SECTIONS
+
+logger = logging.getLogger(__name__)
+
+# Tests a rule can make on a document's content: (test, key, value)
+PRESENT = "present"    # content[key] exists and is not empty
+HAS_KEY = "has_key"    # key exists, even if empty
+EQUALS = "equals"      # content[key] == value
+EMPTY = "empty"        # the whole document is empty
+
+Feature = Tuple[str, Optional[str], Any]
+
+# Rule set used for document types without rules of their own
+GENERIC = "generic"
+
+# Pseudo-section standing for the set of keys a document has, read by EMPTY tests
+DOCUMENT_KEYS = "*"
+
+
+@dataclass(frozen=True)
+class Check:
+    """Reports `issue` and deducts `penalty` when every (feature, outcome) pair of `when` holds"""
+    id: str
+    when: Tuple[Tuple[Feature, bool], ...]
+    issue: Dict[str, str] = field(hash=False)
+    penalty: float = 0.0
+
+    @property
+    def keys(self) -> FrozenSet[str]:
+        return _dependencies(self.when)
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    """Adds `message` when every (feature, outcome) pair of `when` holds, and optionally only without issues"""
+    id: str
+    message: str
+    when: Tuple[Tuple[Feature, bool], ...] = ()
+    only_without_issues: bool = False
+
+    @property
+    def keys(self) -> FrozenSet[str]:
+        return _dependencies(self.when)
+
+
+def _dependencies(when: Tuple[Tuple[Feature, bool], ...]) -> FrozenSet[str]:
+    """Sections whose content decides whether a rule fires"""
+    return frozenset(DOCUMENT_KEYS if test == EMPTY else key for (test, key, _), _ in when)
+
+
+@dataclass
+class RuleSet:
+    document_type: str
+    template: Optional[str]
+    checks: List[Check]
+    suggestions: List[Suggestion] = field(default_factory=list)
+    base_score: float = 100.0
+    # "no_issues", or "no_high_severity" to accept documents with only medium/low issues
+    valid_when: str = "no_issues"
+
+
+def _feature_test(feature: Feature) -> Callable[[Dict[str, Any]], bool]:
+    test, key, value = feature
+    if test == PRESENT:
+        return lambda content: bool(content.get(key))
+    if test == HAS_KEY:
+        return lambda content: key in content
+    if test == EQUALS:
+        return lambda content: content.get(key) == value
+    if test == EMPTY:
+        return lambda content: not content
+    raise ValueError(f"Unknown rule test '{test}'")
+
+
+def rule_enabled(rule_id: str, enabled: Optional[FrozenSet[str]]) -> bool:
+    # Rules are selected by id ("required:summary") or by category ("required")
+    return enabled is None or rule_id in enabled or rule_id.split(":", 1)[0] in enabled
+
+
+class CompiledRuleSet:
+    """A rule set turned into arrays, evaluated for many documents at once.
+
+    Every distinct test of the rule set is one column of a boolean feature
+    matrix with a row per document; that matrix is the only per-document
+    Python work. A rule is a mask over the columns plus the outcome it
+    requires, so which rules fire, the scores and the validity of the whole
+    batch are a handful of numpy operations. A subset of the rules can be
+    re-evaluated on its own, which only runs the tests those rules use.
+    """
+
+    def __init__(self, rules: RuleSet) -> None:
+        self.rules = rules
+        features: List[Feature] = []
+        for rule in [*rules.checks, *rules.suggestions]:
+            for feature, _ in rule.when:
+                if feature not in features:
+                    features.append(feature)
+        self.features = features
+        self._tests = [_feature_test(feature) for feature in features]
+
+        def matrices(rule_list: Sequence[Any]) -> Tuple[np.ndarray, np.ndarray]:
+            mask = np.zeros((len(rule_list), len(features)), dtype=bool)
+            expected = np.zeros((len(rule_list), len(features)), dtype=bool)
+            for i, rule in enumerate(rule_list):
+                for feature, outcome in rule.when:
+                    j = features.index(feature)
+                    mask[i, j] = True
+                    expected[i, j] = outcome
+            return mask, expected
+
+        self._check_mask, self._check_expected = matrices(rules.checks)
+        self._penalties = np.array([check.penalty for check in rules.checks], dtype=np.float64)
+        self._high = np.array([check.issue.get("severity") == "high" for check in rules.checks], dtype=bool)
+        self._suggestion_mask, self._suggestion_expected = matrices(rules.suggestions)
+        self._only_without_issues = np.array([s.only_without_issues for s in rules.suggestions], dtype=bool)
+        self.check_dependencies = [check.keys for check in rules.checks]
+        self.suggestion_dependencies = [suggestion.keys for suggestion in rules.suggestions]
+
+    def features_of(self, contents: Sequence[Dict[str, Any]], columns: Optional[Sequence[int]] = None) -> np.ndarray:
+        """Feature matrix of `contents`; with `columns`, only those tests run and the rest stay False"""
+        columns = range(len(self._tests)) if columns is None else list(columns)
+        values = np.zeros((len(contents), len(self._tests)), dtype=bool)
+        for i, content in enumerate(contents):
+            values[i, columns] = [self._tests[j](content) for j in columns]
+        return values
+
+    def rows_depending_on(self, sections: FrozenSet[str]) -> Tuple[List[int], List[int], List[int]]:
+        """Checks and suggestions that read any of `sections`, and the feature columns they need"""
+        check_rows = [i for i, keys in enumerate(self.check_dependencies) if keys & sections]
+        suggestion_rows = [i for i, keys in enumerate(self.suggestion_dependencies) if keys & sections]
+        used = self._check_mask[check_rows].any(axis=0) | self._suggestion_mask[suggestion_rows].any(axis=0)
+        return check_rows, suggestion_rows, np.flatnonzero(used).tolist()
+
+    def fired(
+        self,
+        values: np.ndarray,
+        check_rows: Optional[List[int]] = None,
+        suggestion_rows: Optional[List[int]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(documents, rules) matrices of the checks and suggestions whose conditions hold, optionally for some rows only"""
+        check_rows = slice(None) if check_rows is None else check_rows
+        suggestion_rows = slice(None) if suggestion_rows is None else suggestion_rows
+        return (
+            self._fires(values, self._check_mask[check_rows], self._check_expected[check_rows]),
+            self._fires(values, self._suggestion_mask[suggestion_rows], self._suggestion_expected[suggestion_rows]),
+        )
+
+    @staticmethod
+    def _fires(values: np.ndarray, mask: np.ndarray, expected: np.ndarray) -> np.ndarray:
+        # (documents, rules): no masked feature differs from the outcome the rule requires
+        mismatch = (values[:, None, :] != expected[None, :, :]) & mask[None, :, :]
+        return ~mismatch.any(axis=2)
+
+    def evaluate(
+        self, contents: Sequence[Dict[str, Any]], enabled: Optional[FrozenSet[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Validation result (is_valid, score, issues, suggestions) of each document"""
+        return self.results(*self.fired(self.features_of(contents)), enabled)
+
+    def results(
+        self, checks: np.ndarray, suggestions: np.ndarray, enabled: Optional[FrozenSet[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Scores, validity, issues and suggestions from the fired-rule matrices"""
+        checks, suggestions = checks.copy(), suggestions.copy()
+        if enabled is not None:
+            checks &= np.array([rule_enabled(c.id, enabled) for c in self.rules.checks], dtype=bool)
+            suggestions &= np.array([rule_enabled(s.id, enabled) for s in self.rules.suggestions], dtype=bool)
+
+        issue_counts = checks.sum(axis=1)
+        scores = np.maximum(0.0, self.rules.base_score - checks @ self._penalties)
+        if self.rules.valid_when == "no_high_severity":
+            valid = ~(checks & self._high).any(axis=1)
+        else:
+            valid = issue_counts == 0
+        suggestions &= ~self._only_without_issues | (issue_counts == 0)[:, None]
+
+        return [
+            {
+                "is_valid": bool(valid[i]),
+                "score": round(float(scores[i]), 2),
+                "issues": [dict(self.rules.checks[j].issue) for j in np.flatnonzero(checks[i])],
+                "suggestions": [self.rules.suggestions[j].message for j in np.flatnonzero(suggestions[i])],
+            }
+            for i in range(len(checks))
+        ]
+
+
+def _required(key: str, kind: str, severity: str, penalty: float) -> Check:
+    message = (
+        f"Required section '{key}' is missing or empty" if kind == "section" else f"Required field '{key}' is missing"
+    )
+    return Check(
+        id=f"required:{key}",
+        when=(((PRESENT, key, None), False),),
+        issue={"type": f"missing_{kind}", "severity": severity, "message": message},
+        penalty=penalty,
+    )
+
+
+PROPOSAL_SUGGESTIONS = [
+    Suggestion("suggest:case_studies", "Consider adding client testimonials or case studies", only_without_issues=True),
+    Suggestion("suggest:milestones", "Include detailed project milestones", only_without_issues=True),
+]
+TECHNICAL_DOC_SUGGESTIONS = [
+    Suggestion("suggest:code_examples", "Consider adding code examples"),
+    Suggestion("suggest:diagrams", "Include diagrams or flowcharts"),
+]
+JIRA_TICKET_SUGGESTIONS = [
+    Suggestion(
+        "suggest:acceptance_criteria",
+        "User stories should include acceptance criteria",
+        when=(((EQUALS, "ticket_type", "story"), True), ((HAS_KEY, "acceptance_criteria", None), False)),
+    ),
+]
+
+
+def default_rule_sets() -> List[RuleSet]:
+    """Rules applied when a document does not name a template"""
+    return [
+        RuleSet(
+            "proposal", None,
+            [_required(key, "section", "high", 20.0) for key in
+             ["executive_summary", "project_overview", "scope_of_work", "timeline", "budget_estimate"]],
+            PROPOSAL_SUGGESTIONS,
+        ),
+        RuleSet("technical_doc", None, [], TECHNICAL_DOC_SUGGESTIONS),
+        RuleSet(
+            "jira_ticket", None,
+            [_required(key, "field", "medium", 15.0) for key in ["summary", "description", "priority"]],
+            JIRA_TICKET_SUGGESTIONS,
+            valid_when="no_high_severity",
+        ),
+        RuleSet(
+            GENERIC, None,
+            [Check(
+                id="required:content",
+                when=(((EMPTY, None, None), True),),
+                issue={"type": "empty_content", "severity": "high", "message": "Document content is empty"},
+                penalty=85.0,
+            )],
+            [Suggestion("suggest:document_type", "Consider using specific document type validation")],
+            base_score=85.0,
+        ),
+    ]
+
+
+def template_rule_sets(templates: Dict[str, Dict[str, Dict[str, Any]]]) -> List[RuleSet]:
+    """One rule set per DOCUMENT_TEMPLATES entry: every section or field of the template is required"""
+    rule_sets = []
+    for doc_type, variants in templates.items():
+        for name, template in variants.items():
+            if "fields" in template:
+                checks = [_required(key, "field", "medium", 15.0) for key in template["fields"]]
+                rule_sets.append(RuleSet(doc_type, name, checks, JIRA_TICKET_SUGGESTIONS, valid_when="no_high_severity"))
+                continue
+            # Generated proposals store some template sections under a different key (budget -> budget_estimate)
+            keys = [
+                PROPOSAL_SECTIONS.get(section, (section,))[0] if doc_type == "proposal" else section
+                for section in template.get("sections", [])
+            ]
+            penalty = 100.0 / len(keys) if keys else 0.0
+            checks = [_required(key, "section", "high", penalty) for key in keys]
+            suggestions = PROPOSAL_SUGGESTIONS if doc_type == "proposal" else TECHNICAL_DOC_SUGGESTIONS
+            rule_sets.append(RuleSet(doc_type, name, checks, suggestions))
+    return rule_sets
+
+
+class RuleEngine:
+    """Compiled rule sets by (document type, template)"""
+
+    def __init__(self, rule_sets: Sequence[RuleSet]) -> None:
+        self._compiled: Dict[Tuple[str, Optional[str]], CompiledRuleSet] = {
+            (rules.document_type, rules.template): CompiledRuleSet(rules) for rules in rule_sets
+        }
+        logger.info(f"Compiled {len(self._compiled)} validation rule set(s)")
+
+    def rule_set(self, document_type: str, template: Optional[str] = None) -> CompiledRuleSet:
+        """Rules for a document; raises KeyError for a template the document type does not have"""
+        if template:
+            compiled = self._compiled.get((document_type, template))
+            if compiled is None:
+                raise KeyError(f"Unknown template '{template}' for document type '{document_type}'")
+            return compiled
+        return self._compiled.get((document_type, None)) or self._compiled[(GENERIC, None)]
+
+    def validate(
+        self,
+        document_type: str,
+        content: Dict[str, Any],
+        template: Optional[str] = None,
+        enabled: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        return self.rule_set(document_type, template).evaluate([content], frozenset(enabled) if enabled else None)[0]
+
+    def validate_many(self, documents: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Validate documents ({"document_type", "content", "template", "validation_rules"}) in input order.
+
+        Documents are grouped by rule set and rule selection, and each group is
+        evaluated in one pass. A document naming an unknown template gets
+        {"error": ...} instead of a result.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(documents)
+        groups: Dict[Tuple[int, Optional[FrozenSet[str]]], Tuple[CompiledRuleSet, List[int]]] = {}
+        for index, document in enumerate(documents):
+            try:
+                compiled = self.rule_set(document["document_type"], document.get("template"))
+            except KeyError as e:
+                results[index] = {"error": str(e.args[0])}
+                continue
+            rules = document.get("validation_rules")
+            enabled = frozenset(rules) if rules else None
+            groups.setdefault((id(compiled), enabled), (compiled, []))[1].append(index)
+
+        for (_, enabled), (compiled, indices) in groups.items():
+            evaluated = compiled.evaluate([documents[i]["content"] for i in indices], enabled)
+            for index, result in zip(indices, evaluated):
+                results[index] = result
+        return results
+
+
+_engine: Optional[RuleEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_rule_engine() -> RuleEngine:
+    """Process-wide rule engine, compiled from the default and DOCUMENT_TEMPLATES rules on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = RuleEngine([*default_rule_sets(), *template_rule_sets(DOCUMENT_TEMPLATES)])
+    return _engine
@@ -0,0 +1,208 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+
+from langchain_core.documents import Document as LCDocument
+
+logger = logging.getLogger(__name__)
+
+# Very common words that would only make the OR-query scan long posting lists
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "did", "do", "does", "for", "from", "how", "in", "is",
+    "it", "many", "much", "of", "on", "or", "the", "this", "that", "to", "was", "were", "what", "when",
+    "where", "which", "who", "why", "with",
+}
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Query terms found in more than this share of chunks are dropped: their idf is
+# close to zero, yet FTS5 would still score every posting they have
+MAX_TERM_DOC_FRACTION = float(os.environ.get("BM25_MAX_TERM_DOC_FRACTION", "0.1"))
+# Below this many chunks every posting list is short, so no query term is dropped
+MIN_FILTERED_DOCS = int(os.environ.get("BM25_MIN_FILTERED_DOCS", "1000"))
+# Entries kept in the change log read by other processes' response caches
+CHANGE_LOG_SIZE = 100000
+
+
+def query_terms(query: str) -> List[str]:
+    terms = []
+    for token in _TOKEN_PATTERN.findall(query.lower()):
+        if token not in STOPWORDS and token not in terms:
+            terms.append(token)
+    return terms
+
+
+class BM25Index:
+    """Persistent BM25 inverted index backed by SQLite FTS5.
+
+    Chunk text and metadata are stored once in a regular table; an
+    external-content FTS5 table kept in sync by triggers holds the postings,
+    so adds and deletes update the index incrementally and queries are ranked
+    with FTS5's built-in bm25().
+
+    Ids of chunks that are replaced or deleted are appended to a change log,
+    so every process sharing the index can tell which cached results are
+    stale (see `changes_since`).
+    """
+
+    def __init__(
+        self, path: str, max_term_doc_fraction: float = MAX_TERM_DOC_FRACTION, min_filtered_docs: int = MIN_FILTERED_DOCS
+    ) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                rowid INTEGER PRIMARY KEY,
+                chunk_id TEXT UNIQUE NOT NULL,
+                content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                content, content='chunks', content_rowid='rowid', tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+                INSERT INTO chunks_fts(rowid, content) VALUES (new.rowid, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+                INSERT INTO chunks_fts(chunks_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+            END;
+            CREATE TABLE IF NOT EXISTS changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                chunk_id TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS temp.chunk_terms USING fts5vocab(main, chunks_fts, 'row');
+            CREATE VIRTUAL TABLE IF NOT EXISTS temp.query_terms USING fts5(term, tokenize='porter unicode61');
+            CREATE VIRTUAL TABLE IF NOT EXISTS temp.query_stems USING fts5vocab(temp, query_terms, 'instance');
+        """)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.max_term_doc_fraction = max_term_doc_fraction
+        self.min_filtered_docs = min_filtered_docs
+        # (PRAGMA data_version, chunk count); the version moves when another connection commits
+        self._doc_count: Optional[Tuple[int, int]] = None
+
+    def add(self, ids: Sequence[str], texts: Sequence[str], metadatas: Optional[Sequence[Dict[str, Any]]] = None) -> None:
+        """Insert or replace chunks"""
+        metadatas = metadatas or [{} for _ in ids]
+        with self._lock:
+            self._remove(ids)
+            self._conn.executemany(
+                "INSERT INTO chunks (chunk_id, content, metadata) VALUES (?, ?, ?)",
+                [
+                    (chunk_id, text, json.dumps(metadata or {}, default=str))
+                    for chunk_id, text, metadata in zip(ids, texts, metadatas)
+                ],
+            )
+            self._conn.commit()
+            self._doc_count = None
+
+    def delete(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            self._remove(ids)
+            self._conn.commit()
+            self._doc_count = None
+
+    def _remove(self, ids: Iterable[str]) -> None:
+        """Delete chunks, logging the ids of those that existed; the caller commits"""
+        rows = [(chunk_id,) for chunk_id in ids]
+        self._conn.executemany("INSERT INTO changes (chunk_id) SELECT chunk_id FROM chunks WHERE chunk_id = ?", rows)
+        self._conn.executemany("DELETE FROM chunks WHERE chunk_id = ?", rows)
+        self._conn.execute(
+            "DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?", (CHANGE_LOG_SIZE,)
+        )
+
+    def change_seq(self) -> int:
+        """Sequence number of the latest logged change"""
+        with self._lock:
+            return self._conn.execute("SELECT MAX(seq) FROM changes").fetchone()[0] or 0
+
+    def changes_since(self, seq: int) -> Tuple[int, Optional[List[str]]]:
+        """Latest change sequence number and the ids of chunks replaced or deleted after `seq`.
+
+        The ids are None when the log no longer reaches back to `seq`, in
+        which case anything derived from the index before then is stale.
+        """
+        with self._lock:
+            first, latest = self._conn.execute(
+                "SELECT (SELECT MIN(seq) FROM changes), (SELECT MAX(seq) FROM changes)"
+            ).fetchone()
+            # Trimming keeps the newest entry, so an empty log has never had one
+            latest = latest or 0
+            if latest == seq:
+                return latest, []
+            if seq > latest or seq < first - 1:
+                return latest, None
+            rows = self._conn.execute("SELECT chunk_id FROM changes WHERE seq > ?", (seq,)).fetchall()
+        return latest, [chunk_id for chunk_id, in rows]
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[LCDocument, float]]:
+        """Top-k chunks by BM25 score (higher is better)"""
+        terms = query_terms(query)
+        if not terms:
+            return []
+        with self._lock:
+            terms = self._selective_terms(terms)
+            if not terms:
+                return []
+            match = " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+            # Rank on the FTS table alone and join only the top k, so chunk text
+            # and metadata are not read for every match
+            rows = self._conn.execute(
+                "SELECT c.chunk_id, c.content, c.metadata, top.score FROM ("
+                "  SELECT rowid, bm25(chunks_fts) AS score FROM chunks_fts"
+                "  WHERE chunks_fts MATCH ? ORDER BY score LIMIT ?"
+                ") AS top JOIN chunks c ON c.rowid = top.rowid ORDER BY top.score",
+                (match, k),
+            ).fetchall()
+
+        results = []
+        for chunk_id, content, metadata, score in rows:
+            metadata = json.loads(metadata)
+            metadata.setdefault("chunk_id", chunk_id)
+            # FTS5 returns negated BM25 scores so that ascending order is best-first
+            results.append((LCDocument(page_content=content, metadata=metadata, id=chunk_id), -score))
+        return results
+
+    def _selective_terms(self, terms: List[str]) -> List[str]:
+        """Drop terms that no chunk contains or that occur in too many chunks, keeping at least the rarest one"""
+        if len(terms) < 2 or self.max_term_doc_fraction >= 1:
+            return terms
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._doc_count is None or self._doc_count[0] != data_version:
+            self._doc_count = (data_version, self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0])
+        if self._doc_count[1] < self.min_filtered_docs:
+            return terms
+
+        # Stem the terms with the index's own tokenizer, then read document
+        # frequencies from the FTS5 vocabulary; a term the tokenizer splits is
+        # as selective as its rarest part
+        self._conn.execute("DELETE FROM temp.query_terms")
+        self._conn.executemany("INSERT INTO temp.query_terms (rowid, term) VALUES (?, ?)", list(enumerate(terms)))
+        doc_freq = dict(self._conn.execute(
+            "SELECT s.doc, MIN(v.doc) FROM temp.query_stems s JOIN temp.chunk_terms v ON v.term = s.term GROUP BY s.doc"
+        ).fetchall())
+        self._conn.commit()
+
+        # Terms missing from the vocabulary match nothing, so they must not count as the most selective ones
+        present = [i for i in range(len(terms)) if doc_freq.get(i, 0) > 0]
+        if not present:
+            return []
+        limit = self.max_term_doc_fraction * self._doc_count[1]
+        selective = [terms[i] for i in present if doc_freq[i] <= limit]
+        return selective or [terms[min(present, key=doc_freq.__getitem__)]]
+
+    def optimize(self) -> None:
+        """Merge FTS5 segments; worth running after large bulk loads"""
+        with self._lock:
+            self._conn.execute("INSERT INTO chunks_fts(chunks_fts) VALUES ('optimize')")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
@@ -0,0 +1,64 @@
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+_clients: Dict[Tuple[str, str], Any] = {}
+_clients_lock = threading.Lock()
+
+
+def chroma_server() -> Optional[Tuple[str, int, bool]]:
+    """(host, port, ssl) of the Chroma server from CHROMA_URL or CHROMA_HOST/CHROMA_PORT, if configured"""
+    url = os.environ.get("CHROMA_URL")
+    if url:
+        parsed = urlparse(url)
+        ssl = parsed.scheme == "https"
+        return parsed.hostname or "localhost", parsed.port or (443 if ssl else 8000), ssl
+    host = os.environ.get("CHROMA_HOST")
+    if host:
+        return host, int(os.environ.get("CHROMA_PORT", "8000")), False
+    return None
+
+
+def collection_metadata() -> Dict[str, Any]:
+    """HNSW parameters for new collections; Chroma ignores changes to existing ones"""
+    return {
+        "hnsw:space": os.environ.get("CHROMA_HNSW_SPACE", "cosine"),
+        "hnsw:M": int(os.environ.get("CHROMA_HNSW_M", "16")),
+        "hnsw:construction_ef": int(os.environ.get("CHROMA_HNSW_CONSTRUCTION_EF", "100")),
+        "hnsw:search_ef": int(os.environ.get("CHROMA_HNSW_SEARCH_EF", "100")),
+    }
+
+
+def _create_client(kind: str, location: str) -> Any:
+    import chromadb
+    from chromadb.config import Settings
+
+    settings = Settings(anonymized_telemetry=False)
+    if kind == "http":
+        host, port, ssl = chroma_server() or ("localhost", 8000, False)
+        logger.info(f"Connecting to Chroma server at {host}:{port}")
+        return chromadb.HttpClient(host=host, port=port, ssl=ssl, settings=settings)
+    logger.info(f"Opening embedded Chroma at {location}")
+    return chromadb.PersistentClient(path=location, settings=settings)
+
+
+def get_chroma_client(kind: str, location: str = "") -> Any:
+    """One Chroma client per process and location, shared by all collections.
+
+    The HTTP client keeps its keep-alive connection pool between requests, and
+    the embedded client keeps the persistent segments open, instead of each
+    request connecting or loading from scratch.
+    """
+    key = (kind, location)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _create_client(kind, location)
+                _clients[key] = client
+    return client
@@ -0,0 +1,148 @@
+from typing import Any, Dict, Iterator, List, Optional
+import logging
+
+from langchain_core.documents import Document as LCDocument
+
+from src.services.context_packer import text_units
+
+logger = logging.getLogger(__name__)
+
+HEADING_SEPARATOR = " > "
+
+
+def _label(item: Any) -> str:
+    label = getattr(item, "label", "")
+    return str(getattr(label, "value", label))
+
+
+def _page_numbers(item: Any) -> List[int]:
+    return [prov.page_no for prov in getattr(item, "prov", None) or [] if getattr(prov, "page_no", None)]
+
+
+def _table_markdown(item: Any, dl_doc: Any) -> str:
+    try:
+        return item.export_to_markdown(doc=dl_doc)
+    except TypeError:
+        # Older docling-core versions take no document argument
+        return item.export_to_markdown()
+
+
+class _Buffer:
+    """Consecutive body items of one kind collected into the next chunk"""
+
+    def __init__(self) -> None:
+        self.parts: List[str] = []
+        self.pages: List[int] = []
+        self.kind = "text"
+        self.size = 0
+
+    def add(self, text: str, pages: List[int]) -> None:
+        self.parts.append(text)
+        self.pages.extend(pages)
+        self.size += len(text) + 1
+
+
+class StructureChunker:
+    """Chunk a DoclingDocument along its layout tree instead of re-splitting Markdown.
+
+    Body items are walked in reading order. Section headings, tables and the
+    start and end of lists close the current chunk; paragraphs of one section
+    are merged up to `max_chars`. Paragraphs and tables larger than that are
+    split at sentence and row boundaries, and every table piece repeats the
+    header row. Chunks carry the heading path and page range as metadata and
+    are yielded as soon as they are complete.
+    """
+
+    def __init__(self, max_chars: int = 1000, include_headings: bool = True) -> None:
+        self.max_chars = max_chars
+        self.include_headings = include_headings
+
+    def _make_chunk(
+        self, body: str, kind: str, pages: List[int], headings: List[str], metadata: Dict[str, Any]
+    ) -> LCDocument:
+        chunk_metadata = dict(metadata, content_type=kind)
+        if headings:
+            chunk_metadata["headings"] = HEADING_SEPARATOR.join(headings)
+        if pages:
+            chunk_metadata["page_start"] = min(pages)
+            chunk_metadata["page_end"] = max(pages)
+        if self.include_headings and headings:
+            body = f"{HEADING_SEPARATOR.join(headings)}\n\n{body}"
+        return LCDocument(page_content=body, metadata=chunk_metadata)
+
+    def _split_text(self, text: str) -> Iterator[str]:
+        piece = ""
+        for unit in text_units(text):
+            if piece and len(piece) + len(unit) > self.max_chars:
+                yield piece.strip()
+                piece = ""
+            piece += unit
+        if piece.strip():
+            yield piece.strip()
+
+    def _split_table(self, markdown: str) -> Iterator[str]:
+        lines = markdown.splitlines()
+        header, rows = lines[:2], lines[2:]
+        piece: List[str] = []
+        size = sum(len(line) + 1 for line in header)
+        for row in rows:
+            if piece and size + len(row) + 1 > self.max_chars:
+                yield "\n".join(header + piece)
+                piece, size = [], sum(len(line) + 1 for line in header)
+            piece.append(row)
+            size += len(row) + 1
+        yield "\n".join(header + piece)
+
+    def chunk(self, dl_doc: Any, metadata: Optional[Dict[str, Any]] = None) -> Iterator[LCDocument]:
+        metadata = metadata or {}
+        headings: List[str] = []
+        heading_levels: List[int] = []
+        buffer = _Buffer()
+
+        def flush() -> Iterator[LCDocument]:
+            nonlocal buffer
+            if buffer.parts:
+                separator = "\n" if buffer.kind == "list" else "\n\n"
+                yield self._make_chunk(separator.join(buffer.parts), buffer.kind, buffer.pages, headings, metadata)
+            buffer = _Buffer()
+
+        for item, _ in dl_doc.iterate_items():
+            label = _label(item)
+            pages = _page_numbers(item)
+
+            if label in ("title", "section_header"):
+                yield from flush()
+                level = 0 if label == "title" else getattr(item, "level", 1)
+                while heading_levels and heading_levels[-1] >= level:
+                    heading_levels.pop()
+                    headings.pop()
+                heading_levels.append(level)
+                headings.append(item.text.strip())
+                continue
+
+            if label == "table":
+                yield from flush()
+                markdown = _table_markdown(item, dl_doc)
+                for piece in self._split_table(markdown) if len(markdown) > self.max_chars else [markdown]:
+                    yield self._make_chunk(piece, "table", pages, headings, metadata)
+                continue
+
+            text = (getattr(item, "text", "") or "").strip()
+            if not text:
+                continue
+            kind = "list" if label == "list_item" else "text"
+            if kind == "list":
+                text = f"{getattr(item, 'marker', '') or '-'} {text}"
+            elif label == "code":
+                text = f"```\n{text}\n```"
+
+            if buffer.parts and (buffer.kind != kind or buffer.size + len(text) > self.max_chars):
+                yield from flush()
+            if len(text) > self.max_chars:
+                for piece in self._split_text(text):
+                    yield self._make_chunk(piece, kind, pages, headings, metadata)
+                continue
+            buffer.kind = kind
+            buffer.add(text, pages)
+
+        yield from flush()
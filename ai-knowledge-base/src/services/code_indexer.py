@@ -0,0 +1,351 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import ast
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import zipfile
+
+from langchain_core.documents import Document as LCDocument
+from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
+
+from src.services.manifest import IngestManifest, chunk_id_prefix, params_key
+
+logger = logging.getLogger(__name__)
+
+# Source and documentation files worth indexing, with the splitter language used as fallback
+SOURCE_LANGUAGES: Dict[str, Optional[Language]] = {
+    '.py': Language.PYTHON, '.js': Language.JS, '.jsx': Language.JS, '.ts': Language.TS, '.tsx': Language.TS,
+    '.java': Language.JAVA, '.kt': Language.KOTLIN, '.go': Language.GO, '.rs': Language.RUST,
+    '.rb': Language.RUBY, '.php': Language.PHP, '.cs': Language.CSHARP, '.c': Language.C, '.h': Language.C,
+    '.cpp': Language.CPP, '.hpp': Language.CPP, '.swift': Language.SWIFT, '.scala': Language.SCALA,
+    '.md': Language.MARKDOWN, '.sql': None, '.txt': None, '.json': None, '.yaml': None, '.yml': None,
+}
+MAX_SOURCE_FILE_SIZE = 1024 * 1024
+MAX_SYMBOL_CHARS = 4000
+SKIPPED_DIRECTORIES = {"node_modules", ".git", "__pycache__", "dist", "build", ".venv", "venv", "vendor"}
+
+# Declarations picked up in languages without a dedicated parser
+_DECLARATION_PATTERN = re.compile(
+    r"^[ \t]*(?:export\s+)?(?:default\s+)?(?:public\s+|private\s+|protected\s+|static\s+|async\s+|abstract\s+)*"
+    r"(?P<kind>class|interface|function|func|fn|def|struct|enum|trait)\s+(?P<name>[A-Za-z_][\w]*)",
+    re.MULTILINE,
+)
+
+
+def _is_indexable(path: str) -> bool:
+    parts = path.replace("\\", "/").split("/")
+    if any(part in SKIPPED_DIRECTORIES for part in parts[:-1]):
+        return False
+    return os.path.splitext(path)[1].lower() in SOURCE_LANGUAGES
+
+
+def iter_source_files(path: str, filename: str) -> Iterator[Tuple[str, str]]:
+    """Yield (relative path, text) for each indexable source file.
+
+    Archives are read member by member, so only one source file is held in
+    memory at a time and nothing is extracted to disk.
+    """
+    if filename.lower().endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.infolist():
+                if member.is_dir() or member.file_size > MAX_SOURCE_FILE_SIZE or not _is_indexable(member.filename):
+                    continue
+                with archive.open(member) as f:
+                    yield member.filename, f.read().decode("utf-8", errors="replace")
+        return
+
+    if _is_indexable(filename) and os.path.getsize(path) <= MAX_SOURCE_FILE_SIZE:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            yield filename, f.read()
+
+
+def _python_symbols(relpath: str, text: str) -> List[Dict[str, Any]]:
+    tree = ast.parse(text)
+    lines = text.splitlines()
+    symbols = [{
+        "kind": "module",
+        "name": relpath,
+        "signature": relpath,
+        "docstring": ast.get_docstring(tree) or "",
+        "start_line": 1,
+        "end_line": len(lines),
+        "text": "",
+    }]
+
+    def visit(node: ast.AST, prefix: str) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                qualified = f"{prefix}{child.name}"
+                if isinstance(child, ast.ClassDef):
+                    bases = ", ".join(ast.unparse(base) for base in child.bases)
+                    signature = f"class {child.name}({bases})" if bases else f"class {child.name}"
+                    kind = "class"
+                else:
+                    keyword = "async def" if isinstance(child, ast.AsyncFunctionDef) else "def"
+                    returns = f" -> {ast.unparse(child.returns)}" if child.returns else ""
+                    signature = f"{keyword} {child.name}({ast.unparse(child.args)}){returns}"
+                    kind = "method" if prefix else "function"
+                start = min([d.lineno for d in child.decorator_list] + [child.lineno])
+                end = child.end_lineno or child.lineno
+                symbols.append({
+                    "kind": kind,
+                    "name": qualified,
+                    "signature": signature,
+                    "docstring": ast.get_docstring(child) or "",
+                    "start_line": start,
+                    "end_line": end,
+                    "text": "\n".join(lines[start - 1:end]),
+                })
+                if isinstance(child, ast.ClassDef):
+                    visit(child, f"{qualified}.")
+
+    visit(tree, "")
+
+    # Module and class chunks keep only the lines not covered by their direct children
+    def own_text(parent: Dict[str, Any], children: List[Dict[str, Any]]) -> str:
+        covered = set()
+        for child in children:
+            covered.update(range(child["start_line"], child["end_line"] + 1))
+        return "\n".join(
+            lines[number - 1] for number in range(parent["start_line"], parent["end_line"] + 1)
+            if number not in covered
+        )
+
+    symbols[0]["text"] = own_text(symbols[0], [sym for sym in symbols[1:] if "." not in sym["name"]])
+    for symbol in symbols[1:]:
+        if symbol["kind"] == "class":
+            children = [
+                sym for sym in symbols[1:]
+                if sym["name"].startswith(symbol["name"] + ".") and "." not in sym["name"][len(symbol["name"]) + 1:]
+            ]
+            symbol["text"] = own_text(symbol, children)
+    return symbols
+
+
+def _generic_symbols(relpath: str, text: str) -> List[Dict[str, Any]]:
+    matches = list(_DECLARATION_PATTERN.finditer(text))
+    symbols = [{
+        "kind": "module",
+        "name": relpath,
+        "signature": relpath,
+        "docstring": "",
+        "start_line": 1,
+        "end_line": text.count("\n") + 1,
+        "text": text[:matches[0].start()] if matches else text,
+    }]
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(text)
+        body = text[match.start():end].rstrip()
+        start_line = text.count("\n", 0, match.start()) + 1
+        symbols.append({
+            "kind": match.group("kind"),
+            "name": match.group("name"),
+            "signature": body.splitlines()[0].strip() if body else match.group(0).strip(),
+            "docstring": "",
+            "start_line": start_line,
+            "end_line": start_line + body.count("\n"),
+            "text": body,
+        })
+    return symbols
+
+
+def parse_source_file(relpath: str, text: str) -> List[Dict[str, Any]]:
+    """Split one source file into symbol-level chunks (module, class, function).
+
+    Runs in worker processes, so it only takes and returns plain data.
+    """
+    extension = os.path.splitext(relpath)[1].lower()
+    language = SOURCE_LANGUAGES.get(extension)
+
+    symbols = None
+    if extension == ".py":
+        try:
+            symbols = _python_symbols(relpath, text)
+        except SyntaxError:
+            symbols = None
+    elif language is not None and language != Language.MARKDOWN:
+        symbols = _generic_symbols(relpath, text)
+
+    if symbols is None:
+        symbols = [{
+            "kind": "file", "name": relpath, "signature": relpath, "docstring": "",
+            "start_line": 1, "end_line": text.count("\n") + 1, "text": text,
+        }]
+
+    splitter = (
+        RecursiveCharacterTextSplitter.from_language(language, chunk_size=MAX_SYMBOL_CHARS, chunk_overlap=200)
+        if language is not None
+        else RecursiveCharacterTextSplitter(chunk_size=MAX_SYMBOL_CHARS, chunk_overlap=200)
+    )
+
+    chunks = []
+    for symbol in symbols:
+        header = symbol["signature"]
+        if symbol["docstring"]:
+            header += f"\n{symbol['docstring']}"
+        body = symbol["text"].strip()
+        if not body and symbol["kind"] != "module":
+            continue
+        if not body and not symbol["docstring"]:
+            continue
+        parts = splitter.split_text(body) if len(body) > MAX_SYMBOL_CHARS else [body]
+        for part_index, part in enumerate(parts):
+            chunks.append({
+                "page_content": f"{header}\n\n{part}".strip(),
+                "metadata": {
+                    "source": relpath,
+                    "symbol": symbol["name"],
+                    "symbol_kind": symbol["kind"],
+                    "signature": symbol["signature"],
+                    "start_line": symbol["start_line"],
+                    "end_line": symbol["end_line"],
+                    "part": part_index,
+                },
+            })
+    return chunks
+
+
+def _parse_worker(relpath: str, text: str) -> Tuple[str, List[Dict[str, Any]]]:
+    return relpath, parse_source_file(relpath, text)
+
+
+def project_collection_name(project_name: str) -> str:
+    """Chroma collection holding one project's code (3-63 chars, alphanumeric edges)"""
+    slug = re.sub(r"[^a-zA-Z0-9_-]+", "-", project_name.lower()).strip("-_") or "project"
+    digest = hashlib.sha1(project_name.encode()).hexdigest()[:8]
+    return f"code-{slug[:45]}-{digest}"
+
+
+@dataclass
+class CodeIndexReport:
+    files_seen: int = 0
+    files_indexed: int = 0
+    files_unchanged: int = 0
+    files_removed: int = 0
+    files_failed: Dict[str, str] = field(default_factory=dict)
+    symbols: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "files_seen": self.files_seen,
+            "files_indexed": self.files_indexed,
+            "files_unchanged": self.files_unchanged,
+            "files_removed": self.files_removed,
+            "files_failed": len(self.files_failed),
+            "symbols": self.symbols,
+        }
+
+
+class CodebaseIndexer:
+    """Index uploaded sources into a per-project Chroma collection.
+
+    Files are hashed while they are read; only files whose hash changed since
+    the previous upload are parsed (in a process pool) and re-embedded, and
+    chunks of files that disappeared from a re-uploaded archive are deleted.
+    """
+
+    PARAMS = {"indexer": "symbols-v1", "max_symbol_chars": MAX_SYMBOL_CHARS}
+
+    def __init__(self, vectorstore, manifest: IngestManifest, max_workers: Optional[int] = None) -> None:
+        self._vectorstore = vectorstore
+        self._manifest = manifest
+        self._max_workers = max_workers or int(os.environ.get("CODE_INDEX_WORKERS", os.cpu_count() or 1))
+
+    def index(
+        self,
+        uploads: List[Dict[str, str]],
+        metadata: Dict[str, Any],
+        progress: Optional[Callable[[float, Optional[str]], None]] = None,
+    ) -> CodeIndexReport:
+        """Index `uploads` ({"path", "filename"} dicts); archives are treated as full snapshots"""
+        report = CodeIndexReport()
+        key = params_key({**self.PARAMS, "embedding_model": getattr(self._vectorstore.embeddings, "model_name", None)})
+        prune_missing = any(item["filename"].lower().endswith(".zip") for item in uploads)
+
+        # First pass: hash every member without keeping the text
+        hashes: Dict[str, str] = {}
+        for item in uploads:
+            for relpath, text in iter_source_files(item["path"], item["filename"]):
+                hashes[relpath] = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        report.files_seen = len(hashes)
+
+        plan = self._manifest.plan(list(hashes), key, content_hashes=hashes, prune_missing=prune_missing)
+        report.files_unchanged = len(plan.unchanged)
+        to_index = set(plan.to_ingest)
+
+        if to_index:
+            self._parse_and_store(uploads, to_index, plan, key, metadata, report, progress)
+
+        for source in plan.removed:
+            stale = plan.stale_chunk_ids.get(source, [])
+            if stale:
+                self._vectorstore.delete(ids=stale)
+            self._manifest.forget(source)
+        report.files_removed = len(plan.removed)
+
+        self._manifest.save()
+        logger.info(f"Codebase indexed: {report.as_dict()}")
+        return report
+
+    def _parse_and_store(self, uploads, to_index, plan, key, metadata, report, progress) -> None:
+        in_flight: Dict[Future, str] = {}
+        submitted = set()
+        max_in_flight = self._max_workers * 4
+        done_count = 0
+
+        def collect(done) -> None:
+            nonlocal done_count
+            for future in done:
+                relpath = in_flight.pop(future)
+                done_count += 1
+                try:
+                    _, chunks = future.result()
+                except Exception as e:
+                    logger.warning(f"Could not parse {relpath}: {str(e)}")
+                    report.files_failed[relpath] = str(e)
+                    continue
+                self._store(relpath, chunks, plan, key, metadata)
+                report.files_indexed += 1
+                report.symbols += len(chunks)
+                if progress:
+                    progress(done_count / len(to_index), f"Indexed {relpath}")
+
+        # Spawned workers are safe to start from the API's job threads
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=self._max_workers, mp_context=context) as executor:
+            for item in uploads:
+                for relpath, text in iter_source_files(item["path"], item["filename"]):
+                    if relpath not in to_index or relpath in submitted:
+                        continue
+                    submitted.add(relpath)
+                    # Bound the number of source files held in memory
+                    while len(in_flight) >= max_in_flight:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    in_flight[executor.submit(_parse_worker, relpath, text)] = relpath
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+
+    def _store(self, relpath: str, chunks: List[Dict[str, Any]], plan, key: str, metadata: Dict[str, Any]) -> None:
+        content_hash = plan.content_hashes[relpath]
+        prefix = chunk_id_prefix(relpath, content_hash, key)
+        documents = [
+            LCDocument(page_content=chunk["page_content"], metadata={**metadata, **chunk["metadata"]})
+            for chunk in chunks
+        ]
+        chunk_ids = [f"{prefix}-{index}" for index in range(len(documents))]
+        for document, chunk_id in zip(documents, chunk_ids):
+            document.metadata["chunk_id"] = chunk_id
+
+        if documents:
+            self._vectorstore.add_documents(documents, ids=chunk_ids)
+        current = set(chunk_ids)
+        stale = [cid for cid in plan.stale_chunk_ids.get(relpath, []) if cid not in current]
+        if stale:
+            self._vectorstore.delete(ids=stale)
+        self._manifest.record(relpath, content_hash, key, chunk_ids)
@@ -0,0 +1,162 @@
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional
+import logging
+import math
+import os
+import re
+
+from langchain_core.documents import Document as LCDocument
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SEPARATOR = "\n\n"
+# About 4 characters per token for Gemini on English text
+CHARS_PER_TOKEN = 4
+
+# Sentence ends followed by whitespace; table rows and other lines are split on newlines
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count from the text length"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def text_units(text: str) -> List[str]:
+    """Split text into trimming units: whole table rows, otherwise sentences"""
+    units = []
+    for line in text.splitlines(keepends=True):
+        if line.lstrip().startswith("|"):
+            units.append(line)
+            continue
+        sentences = _SENTENCE_END.split(line)
+        for i, sentence in enumerate(sentences):
+            units.append(sentence if i == len(sentences) - 1 else sentence + " ")
+    return units
+
+
+def trim_to_tokens(text: str, max_tokens: int, count_tokens: Callable[[str], int] = estimate_tokens) -> str:
+    """Longest prefix of `text` within `max_tokens` that ends on a sentence or table-row boundary"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    kept: List[str] = []
+    used = 0
+    for unit in text_units(text):
+        cost = count_tokens(unit)
+        if used + cost > max_tokens:
+            break
+        kept.append(unit)
+        used += cost
+    if kept:
+        return "".join(kept).rstrip()
+    # A single sentence or row larger than the budget: cut it at a word boundary
+    cut = text[:max_tokens * CHARS_PER_TOKEN]
+    return cut[:cut.rfind(" ")] if " " in cut else cut
+
+
+def strip_overlap(text: str, previous: str, min_overlap: int = 20, max_overlap: int = 400) -> str:
+    """Remove text shared with an adjacent chunk of the same source.
+
+    The splitter's chunk_overlap repeats the end of one chunk at the start of
+    the next; either neighbour may have been packed first.
+    """
+    longest = min(max_overlap, len(text), len(previous))
+    for size in range(longest, min_overlap - 1, -1):
+        if previous.endswith(text[:size]):
+            return text[size:].lstrip()
+        if previous.startswith(text[-size:]):
+            return text[:-size].rstrip()
+    return text
+
+
+@dataclass
+class PackedContext:
+    text: str = ""
+    tokens: int = 0
+    budget: int = 0
+    # IDs of the chunks that made it into `text`, used to key cached responses
+    chunk_ids: List[str] = field(default_factory=list)
+    candidates: int = 0
+    trimmed: int = 0
+    dropped: int = 0
+
+
+def _chunk_id(doc: LCDocument) -> Optional[str]:
+    doc_id = doc.metadata.get("chunk_id") or getattr(doc, "id", None)
+    return str(doc_id) if doc_id else None
+
+
+class ContextPacker:
+    """Fill a token budget with retrieved chunks in relevance (retrieval) order.
+
+    Exact duplicates and the overlap between neighbouring chunks are removed,
+    chunks that no longer fit are trimmed at sentence or table-row boundaries
+    when at least `min_chunk_tokens` remain, and smaller later chunks may still
+    fill the leftover space.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 3000,
+        min_chunk_tokens: int = 64,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+    ) -> None:
+        self.max_tokens = max_tokens
+        self.min_chunk_tokens = min_chunk_tokens
+        self.count_tokens = count_tokens
+
+    def pack(self, docs: Iterable[LCDocument]) -> PackedContext:
+        docs = list(docs)
+        packed = PackedContext(budget=self.max_tokens, candidates=len(docs))
+        parts: List[str] = []
+        sources: List[Optional[str]] = []
+        separator_tokens = self.count_tokens(CHUNK_SEPARATOR)
+
+        for doc in docs:
+            text = doc.page_content.strip()
+            source = doc.metadata.get("source")
+            for previous, previous_source in zip(parts, sources):
+                if not text:
+                    break
+                if text in previous:
+                    text = ""
+                elif source == previous_source:
+                    text = strip_overlap(text, previous)
+            if not text:
+                packed.dropped += 1
+                continue
+
+            remaining = self.max_tokens - packed.tokens - (separator_tokens if parts else 0)
+            cost = self.count_tokens(text)
+            if cost > remaining:
+                if remaining < self.min_chunk_tokens:
+                    packed.dropped += 1
+                    continue
+                text = trim_to_tokens(text, remaining, self.count_tokens)
+                cost = self.count_tokens(text)
+                packed.trimmed += 1
+
+            packed.tokens += cost + (separator_tokens if parts else 0)
+            parts.append(text)
+            sources.append(source)
+            chunk_id = _chunk_id(doc)
+            if chunk_id:
+                packed.chunk_ids.append(chunk_id)
+
+        packed.text = CHUNK_SEPARATOR.join(parts)
+        logger.info(
+            f"Packed {len(parts)}/{packed.candidates} chunk(s) into {packed.tokens}/{packed.budget} context tokens "
+            f"({packed.trimmed} trimmed, {packed.dropped} dropped)"
+        )
+        return packed
+
+
+def get_context_packer() -> ContextPacker:
+    return ContextPacker(
+        max_tokens=int(os.environ.get("CONTEXT_MAX_TOKENS", "3000")),
+        min_chunk_tokens=int(os.environ.get("CONTEXT_MIN_CHUNK_TOKENS", "64")),
+    )
+
+
+def pack_context(docs: Iterable[LCDocument]) -> PackedContext:
+    return get_context_packer().pack(docs)
@@ -0,0 +1,122 @@
+from contextlib import contextmanager
+from typing import Iterator, Optional
+import logging
+import os
+import queue
+import threading
+
+from docling.datamodel.base_models import InputFormat
+from docling.document_converter import DocumentConverter
+
+from src.services.metrics import get_metrics, stats_samples
+
+logger = logging.getLogger(__name__)
+
+# Formats whose pipelines are initialized during warm-up
+WARM_UP_FORMATS = [InputFormat.PDF]
+
+
+class ConverterPool:
+    """Bounded pool of warm Docling DocumentConverter instances.
+
+    Building a DocumentConverter loads the layout/OCR models, so instances are
+    created lazily up to `size` and handed out again instead of being rebuilt
+    for every file.
+    """
+
+    def __init__(self, size: int = 1) -> None:
+        if size < 1:
+            raise ValueError("Converter pool size must be at least 1")
+        self._size = size
+        self._idle: "queue.LifoQueue[DocumentConverter]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def created(self) -> int:
+        return self._created
+
+    def _new_converter(self) -> DocumentConverter:
+        converter = DocumentConverter()
+        for input_format in WARM_UP_FORMATS:
+            try:
+                converter.initialize_pipeline(input_format)
+            except Exception as e:
+                logger.warning(f"Could not initialize Docling pipeline for {input_format}: {e}")
+        return converter
+
+    def warm_up(self, count: Optional[int] = None) -> int:
+        """Pre-build converters so the first request does not pay model loading"""
+        target = min(count or self._size, self._size)
+        built = 0
+        while True:
+            with self._lock:
+                if self._created >= target:
+                    break
+                self._created += 1
+            try:
+                self._idle.put(self._new_converter())
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+            built += 1
+
+        logger.info(f"Converter pool warmed up: {self._created}/{self._size} instance(s)")
+        return built
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator[DocumentConverter]:
+        """Borrow a converter, building one if the pool has room, else wait for one"""
+        converter = None
+        try:
+            converter = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self._size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    converter = self._new_converter()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    converter = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    raise TimeoutError("No Docling converter became available in time")
+
+        try:
+            yield converter
+        finally:
+            self._idle.put(converter)
+
+    def convert(self, source, **kwargs):
+        """Convert a single source with a pooled converter"""
+        with self.acquire() as converter:
+            return converter.convert(source, **kwargs)
+
+
+_pool: Optional[ConverterPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_converter_pool() -> ConverterPool:
+    """Process-wide converter pool, sized by DOCLING_POOL_SIZE"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConverterPool(size=int(os.environ.get("DOCLING_POOL_SIZE", "1")))
+                pool = _pool
+                get_metrics().register_collector(
+                    "converter_pool", lambda: stats_samples("converter_pool", {"size": pool.size, "created": pool.created})
+                )
+    return _pool
@@ -0,0 +1,277 @@
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, TypeVar
+import hashlib
+import logging
+import math
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+
+from langchain_core.embeddings import Embeddings
+
+from src.services.metrics import get_metrics, span, stats_samples
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Substrings of upstream errors that mean "slow down and try again"
+RETRYABLE_MARKERS = ("429", "quota", "resource exhausted", "resourceexhausted", "rate limit", "503", "unavailable")
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `rate` tokens per second."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        self._rate = rate
+        self._capacity = capacity or max(1.0, rate)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until `tokens` are available, returning the time spent waiting"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self._rate
+            time.sleep(delay)
+            waited += delay
+
+
+class EmbeddingCache:
+    """On-disk embedding cache in SQLite, keyed by model name and text hash."""
+
+    def __init__(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(hashes), 500):
+            batch = list(hashes[start:start + 500])
+            placeholders = ",".join("?" * len(batch))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+            for text_hash, blob in rows:
+                found[text_hash] = array("f", blob).tolist()
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]) -> None:
+        rows = [(model, text_hash, array("f", vector).tobytes()) for text_hash, vector in vectors.items()]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+
+
+class LocalHashEmbeddings(Embeddings):
+    """Deterministic offline embeddings using the hashing trick over word tokens.
+
+    No model download or network access is needed, which makes it suitable for
+    benchmarking the pipeline offline. It is not meant for retrieval quality.
+    """
+
+    def __init__(self, dimensions: int = 768) -> None:
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for token in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class EmbeddingService(Embeddings):
+    """Batched, rate-limited and cached front end for any LangChain embeddings backend.
+
+    Texts are deduplicated and looked up in the on-disk cache first. The
+    misses are embedded in batches of `batch_size`, at most `max_concurrency`
+    requests in flight and no more than `requests_per_second` started.
+    Quota and availability errors are retried with exponential backoff.
+    Queries go through the backend's own `embed_query`, which may differ from
+    document embedding (task type, instruction prefix), and are cached under
+    a separate key.
+    """
+
+    def __init__(
+        self,
+        backend: Embeddings,
+        model_name: str,
+        cache: Optional[EmbeddingCache] = None,
+        batch_size: int = 100,
+        max_concurrency: int = 4,
+        requests_per_second: float = 5.0,
+        max_retries: int = 5,
+        backoff_seconds: float = 1.0,
+    ) -> None:
+        self.backend = backend
+        self.model_name = model_name
+        self.cache = cache
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._bucket = TokenBucket(requests_per_second)
+        self.stats = {"texts": 0, "cache_hits": 0, "requests": 0, "retries": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        message = f"{type(error).__name__} {error}".lower()
+        return any(marker in message for marker in RETRYABLE_MARKERS)
+
+    def _request(self, call: Callable[[], T]) -> T:
+        attempt = 0
+        while True:
+            self._bucket.acquire()
+            self._count("requests")
+            try:
+                return call()
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+                delay = self.backoff_seconds * (2 ** attempt) * (1 + random.random())
+                logger.warning(f"Embedding request throttled ({e}); retrying in {delay:.1f}s")
+                self._count("retries")
+                time.sleep(delay)
+                attempt += 1
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return self._request(lambda: self.backend.embed_documents(texts))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with span("embed"):
+            return self._embed_documents(texts)
+
+    def _embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._count("texts", len(texts))
+        hashes = [EmbeddingCache.text_hash(text) for text in texts]
+        unique: Dict[str, str] = dict(zip(hashes, texts))
+
+        vectors: Dict[str, List[float]] = {}
+        if self.cache is not None:
+            vectors = self.cache.get_many(self.model_name, list(unique))
+            self._count("cache_hits", sum(1 for h in hashes if h in vectors))
+
+        missing = [h for h in unique if h not in vectors]
+        if missing:
+            batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+                results = executor.map(lambda batch: self._embed_batch([unique[h] for h in batch]), batches)
+                for batch, embedded in zip(batches, results):
+                    fresh = dict(zip(batch, embedded))
+                    vectors.update(fresh)
+                    if self.cache is not None:
+                        self.cache.put_many(self.model_name, fresh)
+
+        return [vectors[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        with span("embed"):
+            self._count("texts")
+            model = f"{self.model_name}:query"
+            text_hash = EmbeddingCache.text_hash(text)
+            if self.cache is not None:
+                cached = self.cache.get_many(model, [text_hash])
+                if text_hash in cached:
+                    self._count("cache_hits")
+                    return cached[text_hash]
+
+            vector = self._request(lambda: self.backend.embed_query(text))
+            if self.cache is not None:
+                self.cache.put_many(model, {text_hash: vector})
+            return vector
+
+
+def build_embeddings(model_name: Optional[str] = None, backend: Optional[str] = None) -> EmbeddingService:
+    """Create the configured embeddings backend wrapped in an EmbeddingService.
+
+    EMBEDDING_BACKEND selects "google" (default), "huggingface" or "local".
+    """
+    backend = (backend or os.environ.get("EMBEDDING_BACKEND", "google")).lower()
+
+    if backend == "google":
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        model_name = model_name or "models/gemini-embedding-001"
+        base: Embeddings = GoogleGenerativeAIEmbeddings(model=model_name)
+    elif backend == "huggingface":
+        from langchain_huggingface import HuggingFaceEmbeddings
+        model_name = model_name or os.environ.get("HF_EMBED_MODEL_ID", "BAAI/bge-small-en-v1.5")
+        base = HuggingFaceEmbeddings(model_name=model_name)
+    elif backend == "local":
+        dimensions = int(os.environ.get("LOCAL_EMBED_DIMENSIONS", "768"))
+        model_name = f"local-hash-{dimensions}"
+        base = LocalHashEmbeddings(dimensions=dimensions)
+    else:
+        raise ValueError(f"Unknown embedding backend '{backend}'. Available: google, huggingface, local")
+
+    cache_path = os.environ.get(
+        "EMBED_CACHE_PATH", os.path.join(os.environ.get("CHROMA_PERSIST_DIR", "./chroma_db"), "embedding_cache.sqlite3")
+    )
+    return EmbeddingService(
+        backend=base,
+        model_name=model_name,
+        cache=EmbeddingCache(cache_path) if cache_path else None,
+        batch_size=int(os.environ.get("EMBED_BATCH_SIZE", "100")),
+        max_concurrency=int(os.environ.get("EMBED_MAX_CONCURRENCY", "4")),
+        requests_per_second=float(os.environ.get("EMBED_REQUESTS_PER_SECOND", "5")),
+    )
+
+
+_embeddings: Optional[EmbeddingService] = None
+_embeddings_lock = threading.Lock()
+
+
+def get_embeddings() -> EmbeddingService:
+    """Process-wide EmbeddingService shared by all collections"""
+    global _embeddings
+    if _embeddings is None:
+        with _embeddings_lock:
+            if _embeddings is None:
+                _embeddings = build_embeddings()
+                service = _embeddings
+                get_metrics().register_collector("embeddings", lambda: stats_samples("embeddings", dict(service.stats)))
+    return _embeddings
@@ -0,0 +1,400 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import logging
+import os
+import re
+import threading
+import time
+
+from docling_core.types.doc import (
+    BoundingBox,
+    CoordOrigin,
+    DocItemLabel,
+    DoclingDocument,
+    ProvenanceItem,
+    Size,
+    TableCell,
+    TableData,
+)
+
+from src.services.converter_pool import ConverterPool
+from src.services.metrics import get_metrics, stats_samples
+
+logger = logging.getLogger(__name__)
+
+# First and last page of a conversion window, 1-based and inclusive like Docling's page_range
+PageRange = Tuple[int, int]
+
+# Routes a file, or a run of PDF pages, can take
+TEXT = "text"            # plain text, split into paragraphs
+MARKDOWN = "markdown"    # Markdown parsed line by line
+PDF_TEXT = "pdf_text"    # born-digital PDF pages read from their text layer
+DOCLING = "docling"      # full Docling pipeline with layout, table and OCR models
+ROUTES = (TEXT, MARKDOWN, PDF_TEXT, DOCLING)
+
+MARKDOWN_EXTENSIONS = {".md", ".markdown"}
+SNIFF_BYTES = 8192
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_LIST_ITEM = re.compile(r"^\s*([-*+]|\d{1,3}[.)])\s+(.*)$")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+_BLANK_LINES = re.compile(r"\n\s*\n")
+# Numbers, amounts and percentages; three or more on one line look like a table row
+_NUMERIC_TOKEN = re.compile(r"(?<!\w)[$€£]?\d[\d,.]*%?(?!\w)")
+
+
+@dataclass
+class RouterSettings:
+    enabled: bool = True
+    # Pages with images and fewer text characters than this are treated as scanned
+    scanned_max_chars: int = 32
+    # Share of unreadable characters (broken font encodings) above which a page needs OCR
+    max_garbage_ratio: float = 0.05
+    # Drawn path objects (table rules, cell borders) from which a page counts as a complex table
+    table_min_paths: int = 20
+    # Lines with several numeric cells from which a page counts as a table
+    table_min_numeric_rows: int = 3
+
+    @classmethod
+    def from_env(cls) -> "RouterSettings":
+        return cls(
+            enabled=os.environ.get("FORMAT_ROUTER", "true").lower() == "true",
+            scanned_max_chars=int(os.environ.get("PDF_SCANNED_MAX_CHARS", "32")),
+            max_garbage_ratio=float(os.environ.get("PDF_MAX_GARBAGE_RATIO", "0.05")),
+            table_min_paths=int(os.environ.get("PDF_TABLE_MIN_PATHS", "20")),
+            table_min_numeric_rows=int(os.environ.get("PDF_TABLE_MIN_NUMERIC_ROWS", "3")),
+        )
+
+
+@dataclass
+class RoutedDocument:
+    """One converted piece of a file: the whole file, or a run of PDF pages that took the same route"""
+    route: str
+    document: Any
+    pages: int
+    seconds: float
+    page_range: Optional[PageRange] = None
+
+    def chunk_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """`metadata` plus the route and page range of this piece"""
+        chunk_metadata = dict(metadata, route=self.route)
+        if self.page_range:
+            chunk_metadata.update(page_start=self.page_range[0], page_end=self.page_range[1])
+        return chunk_metadata
+
+
+@dataclass
+class RouteStats:
+    documents: int = 0
+    pages: int = 0
+    seconds: float = 0.0
+
+    def record(self, pages: int, seconds: float) -> None:
+        self.documents += 1
+        self.pages += pages
+        self.seconds += seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "documents": self.documents,
+            "pages": self.pages,
+            "seconds": round(self.seconds, 3),
+            "seconds_per_page": round(self.seconds / self.pages, 4) if self.pages else 0.0,
+        }
+
+
+class RouteCounters:
+    """Documents, pages and conversion time per route, for the whole process"""
+
+    def __init__(self) -> None:
+        self._stats = {route: RouteStats() for route in ROUTES}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, pages: int, seconds: float) -> None:
+        with self._lock:
+            self._stats.setdefault(route, RouteStats()).record(pages, seconds)
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {route: stats.as_dict() for route, stats in self._stats.items()}
+
+
+_counters = RouteCounters()
+get_metrics().register_collector("format_routes", lambda: stats_samples("format_route", _counters.as_dict(), label="route"))
+
+
+def get_route_counters() -> RouteCounters:
+    return _counters
+
+
+def sniff_format(path: str) -> str:
+    """Route of a whole file from its leading bytes, with PDF_TEXT standing for any PDF"""
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+    if head.startswith(b"%PDF-"):
+        return PDF_TEXT
+    # Zip (docx/pptx/xlsx), OLE (doc/ppt/xls) and anything else binary
+    if head.startswith((b"PK\x03\x04", b"\xd0\xcf\x11\xe0")) or b"\x00" in head:
+        return DOCLING
+    try:
+        # A multi-byte character may be cut off at the end of the sniffed bytes
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        if e.start < len(head) - 3:
+            return DOCLING
+    return MARKDOWN if Path(path).suffix.lower() in MARKDOWN_EXTENSIONS else TEXT
+
+
+def _read_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read().replace("\r\n", "\n")
+
+
+def text_document(name: str, text: str) -> DoclingDocument:
+    """Plain text as one paragraph per blank-line separated block"""
+    dl_doc = DoclingDocument(name=name)
+    for block in _BLANK_LINES.split(text):
+        if block.strip():
+            dl_doc.add_text(label=DocItemLabel.PARAGRAPH, text=block.strip())
+    return dl_doc
+
+
+def _table_row(line: str) -> List[str]:
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def _table_data(rows: List[List[str]]) -> TableData:
+    columns = max(len(row) for row in rows)
+    cells = [
+        TableCell(
+            text=row[c] if c < len(row) else "",
+            start_row_offset_idx=r,
+            end_row_offset_idx=r + 1,
+            start_col_offset_idx=c,
+            end_col_offset_idx=c + 1,
+            column_header=r == 0,
+        )
+        for r, row in enumerate(rows)
+        for c in range(columns)
+    ]
+    return TableData(num_rows=len(rows), num_cols=columns, table_cells=cells)
+
+
+def markdown_document(name: str, text: str) -> DoclingDocument:
+    """Markdown as headings, paragraphs, lists, tables and code blocks, the items Docling's own backend produces"""
+    dl_doc = DoclingDocument(name=name)
+    lines = text.split("\n")
+    paragraph: List[str] = []
+    list_group = None
+    enumerated = False
+
+    def flush_paragraph() -> None:
+        if paragraph:
+            dl_doc.add_text(label=DocItemLabel.PARAGRAPH, text=" ".join(paragraph))
+            paragraph.clear()
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+
+        fence = _FENCE.match(line)
+        if fence:
+            flush_paragraph()
+            list_group = None
+            end = i + 1
+            while end < len(lines) and not lines[end].strip().startswith(fence.group(1)):
+                end += 1
+            dl_doc.add_code(text="\n".join(lines[i + 1:end]))
+            i = end + 1
+            continue
+
+        heading = _HEADING.match(line)
+        if heading:
+            flush_paragraph()
+            list_group = None
+            level = len(heading.group(1))
+            if level == 1:
+                dl_doc.add_title(text=heading.group(2))
+            else:
+                dl_doc.add_heading(text=heading.group(2), level=level - 1)
+            i += 1
+            continue
+
+        if stripped.startswith("|") and i + 1 < len(lines) and _TABLE_SEPARATOR.match(lines[i + 1]):
+            flush_paragraph()
+            list_group = None
+            rows = [_table_row(line)]
+            i += 2
+            while i < len(lines) and lines[i].strip().startswith("|"):
+                rows.append(_table_row(lines[i]))
+                i += 1
+            dl_doc.add_table(data=_table_data(rows))
+            continue
+
+        item = _LIST_ITEM.match(line)
+        if item:
+            flush_paragraph()
+            marker = item.group(1)
+            if list_group is None or enumerated != marker[0].isdigit():
+                list_group = dl_doc.add_list_group()
+                enumerated = marker[0].isdigit()
+            dl_doc.add_list_item(text=item.group(2).strip(), enumerated=enumerated, marker=marker, parent=list_group)
+            i += 1
+            continue
+
+        if not stripped:
+            flush_paragraph()
+            list_group = None
+        elif list_group is not None and line[:1].isspace():
+            # Continuation line of the previous list item
+            last = dl_doc.texts[-1]
+            last.text = f"{last.text} {stripped}"
+            last.orig = last.text
+        else:
+            list_group = None
+            paragraph.append(stripped)
+        i += 1
+
+    flush_paragraph()
+    return dl_doc
+
+
+@dataclass
+class PdfPage:
+    page_no: int
+    route: str
+    text: str
+    width: float
+    height: float
+
+
+def _paragraphs(page_text: str) -> List[str]:
+    # pdfium ends every visual line with \r\n; blank lines separate blocks, other line breaks are wrapping
+    text = page_text.replace("\r\n", "\n").replace("\r", "\n")
+    blocks = []
+    for block in _BLANK_LINES.split(text):
+        joined = re.sub(r"-\n(?=[a-z])", "", block.strip())
+        joined = re.sub(r"\s*\n\s*", " ", joined)
+        if joined:
+            blocks.append(joined)
+    return blocks
+
+
+def classify_pdf_pages(path: str, settings: RouterSettings, page_range: Optional[PageRange] = None) -> List[PdfPage]:
+    """Read the text layer of each page and decide whether it can skip Docling"""
+    # pypdfium2 ships with Docling
+    import pypdfium2 as pdfium
+    import pypdfium2.raw as pdfium_c
+
+    pdf = pdfium.PdfDocument(path)
+    try:
+        first, last = page_range or (1, len(pdf))
+        pages = []
+        for page_no in range(first, min(last, len(pdf)) + 1):
+            page = pdf[page_no - 1]
+            try:
+                textpage = page.get_textpage()
+                try:
+                    text = textpage.get_text_range()
+                finally:
+                    textpage.close()
+                width, height = page.get_size()
+                paths = images = 0
+                for obj in page.get_objects(max_depth=2):
+                    paths += obj.type == pdfium_c.FPDF_PAGEOBJ_PATH
+                    images += obj.type == pdfium_c.FPDF_PAGEOBJ_IMAGE
+            finally:
+                page.close()
+
+            chars = len(text.strip())
+            garbage = sum(ch == "�" or (not ch.isprintable() and not ch.isspace()) for ch in text)
+            numeric_rows = sum(len(_NUMERIC_TOKEN.findall(line)) >= 3 for line in text.splitlines())
+            if images and chars < settings.scanned_max_chars:
+                route = DOCLING
+            elif chars and garbage / chars > settings.max_garbage_ratio:
+                route = DOCLING
+            elif paths >= settings.table_min_paths or numeric_rows >= settings.table_min_numeric_rows:
+                route = DOCLING
+            else:
+                route = PDF_TEXT
+            pages.append(PdfPage(page_no, route, text, width, height))
+        return pages
+    finally:
+        pdf.close()
+
+
+def pdf_text_document(name: str, pages: List[PdfPage]) -> DoclingDocument:
+    """Text-layer pages as paragraphs with page provenance, so chunks keep their page range"""
+    dl_doc = DoclingDocument(name=name)
+    for page in pages:
+        dl_doc.add_page(page_no=page.page_no, size=Size(width=page.width, height=page.height))
+        bbox = BoundingBox(l=0, t=page.height, r=page.width, b=0, coord_origin=CoordOrigin.BOTTOMLEFT)
+        for paragraph in _paragraphs(page.text):
+            prov = ProvenanceItem(page_no=page.page_no, bbox=bbox, charspan=(0, len(paragraph)))
+            dl_doc.add_text(label=DocItemLabel.PARAGRAPH, text=paragraph, prov=prov)
+    return dl_doc
+
+
+def _runs(pages: List[PdfPage]) -> Iterator[Tuple[str, List[PdfPage]]]:
+    run: List[PdfPage] = []
+    for page in pages:
+        if run and page.route != run[-1].route:
+            yield run[-1].route, run
+            run = []
+        run.append(page)
+    if run:
+        yield run[-1].route, run
+
+
+def convert_routed(
+    pool: ConverterPool,
+    source: str,
+    page_range: Optional[PageRange] = None,
+    settings: Optional[RouterSettings] = None,
+) -> Iterator[RoutedDocument]:
+    """Convert `source` (or one page window of it) by the cheapest route that can handle it.
+
+    Plain text and Markdown never reach Docling. PDF pages with a usable text
+    layer are read directly; scanned pages, pages with broken text encodings
+    and pages that look like tables are converted by Docling in runs of
+    consecutive pages. Pieces are yielded in page order.
+    """
+    settings = settings or RouterSettings.from_env()
+    source = str(source)
+    name = Path(source).stem
+    route = sniff_format(source) if settings.enabled else DOCLING
+
+    if route in (TEXT, MARKDOWN):
+        started = time.perf_counter()
+        text = _read_text(source)
+        build = markdown_document if route == MARKDOWN else text_document
+        yield RoutedDocument(route, build(name, text), 1, time.perf_counter() - started)
+        return
+
+    classify_seconds = 0.0
+    if route == PDF_TEXT:
+        started = time.perf_counter()
+        pages = classify_pdf_pages(source, settings, page_range)
+        classify_seconds = time.perf_counter() - started
+        if any(page.route == PDF_TEXT for page in pages):
+            for run_route, run in _runs(pages):
+                run_range = (run[0].page_no, run[-1].page_no)
+                # Classification is shared out over the runs by page count
+                share = classify_seconds * len(run) / len(pages)
+                started = time.perf_counter()
+                if run_route == PDF_TEXT:
+                    dl_doc = pdf_text_document(name, run)
+                else:
+                    dl_doc = pool.convert(source, page_range=run_range).document
+                yield RoutedDocument(run_route, dl_doc, len(run), share + time.perf_counter() - started, run_range)
+            return
+        logger.debug(f"No text-layer pages in {source}; converting with Docling")
+
+    started = time.perf_counter()
+    kwargs = {"page_range": page_range} if page_range else {}
+    dl_doc = pool.convert(source, **kwargs).document
+    pages = page_range[1] - page_range[0] + 1 if page_range else max(len(getattr(dl_doc, "pages", {}) or {}), 1)
+    yield RoutedDocument(DOCLING, dl_doc, pages, classify_seconds + time.perf_counter() - started, page_range)
@@ -0,0 +1,231 @@
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+
+from langchain_core.language_models import BaseLLM
+from langchain_core.prompts import PromptTemplate
+from langchain_core.retrievers import BaseRetriever
+
+from src.services.context_packer import PackedContext, estimate_tokens, pack_context
+from src.services.metrics import count_llm_tokens, span
+from src.services.response_cache import ResponseCache, llm_params
+
+logger = logging.getLogger(__name__)
+
+SECTION_PROMPT = PromptTemplate.from_template("""
+You are writing the "{section}" section of a {document_title}.
+
+Request details:
+{details}
+
+Relevant information from uploaded transcripts, codebases and wireframes:
+{context}
+
+{instruction}
+Write only the content of this section, without a heading.
+""")
+
+# (event name, payload) pairs produced while a document is generated
+GenerationEvent = Tuple[str, Dict[str, Any]]
+
+# Marks the end of one section task on the shared event queue
+_SECTION_DONE = object()
+
+
+@dataclass
+class SectionSpec:
+    name: str
+    fallback: Any
+    # Sections without an instruction are copied from `fallback` as-is
+    instruction: Optional[str] = None
+    parse: Optional[Callable[[str], Any]] = None
+    # Retrieval query for this section; defaults to the plan query plus the section name
+    query: Optional[str] = None
+
+
+@dataclass
+class DocumentPlan:
+    title: str
+    details: str
+    query: str
+    sections: List[SectionSpec] = field(default_factory=list)
+
+
+def parse_list(text: str) -> List[str]:
+    """Turn a bulleted or numbered LLM answer into a list of items"""
+    items = []
+    for line in text.splitlines():
+        item = line.strip().lstrip("-*•").strip()
+        if item[:1].isdigit():
+            item = item.lstrip("0123456789").lstrip(".)").strip()
+        if item:
+            items.append(item)
+    return items
+
+
+async def retrieve_context(retriever: Optional[BaseRetriever], query: str) -> PackedContext:
+    """Context for `query` packed into the token budget, with the IDs of the chunks it was built from"""
+    if retriever is None:
+        return PackedContext()
+    try:
+        with span("retrieve"):
+            docs = await retriever.ainvoke(query)
+        return pack_context(docs)
+    except Exception as e:
+        logger.warning(f"Context retrieval failed, generating without context: {str(e)}")
+        return PackedContext()
+
+
+def _semantic_text(plan: DocumentPlan, spec: SectionSpec) -> str:
+    # The request-specific part of the prompt; the retrieved context is matched by ID instead
+    return f"{plan.title}\n{spec.name}\n{plan.details}\n{spec.instruction}"
+
+
+async def _run_cache(cache: ResponseCache, method: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    # The semantic tier embeds the prompt, which must not block the event loop
+    if cache.semantic_enabled:
+        return await asyncio.to_thread(method, *args, **kwargs)
+    return method(*args, **kwargs)
+
+
+async def _cached_completion(
+    cache: Optional[ResponseCache],
+    llm: BaseLLM,
+    prompt: str,
+    doc_ids: List[str],
+    plan: DocumentPlan,
+    spec: SectionSpec,
+) -> Optional[str]:
+    if cache is None:
+        return None
+    hit = await _run_cache(cache, cache.lookup, prompt, doc_ids, llm_params(llm),
+                           semantic_text=_semantic_text(plan, spec))
+    return hit.value if hit is not None else None
+
+
+def default_concurrency() -> int:
+    return int(os.environ.get("GENERATION_MAX_CONCURRENCY", "8"))
+
+
+async def _generate_section(
+    plan: DocumentPlan,
+    spec: SectionSpec,
+    llm: BaseLLM,
+    retriever: Optional[BaseRetriever],
+    semaphore: asyncio.Semaphore,
+    events: "asyncio.Queue[Any]",
+    content: Dict[str, Any],
+    cache: Optional[ResponseCache] = None,
+) -> None:
+    """Retrieve context for one section and stream its LLM output onto `events`"""
+    try:
+        async with semaphore:
+            await events.put(("section_start", {"section": spec.name}))
+            packed = await retrieve_context(
+                retriever, spec.query or f"{plan.query} {spec.name.replace('_', ' ')}"
+            )
+            doc_ids = packed.chunk_ids
+            prompt = SECTION_PROMPT.format(
+                section=spec.name.replace("_", " "),
+                document_title=plan.title,
+                details=plan.details,
+                context=packed.text or "No additional context available.",
+                instruction=spec.instruction,
+            )
+            text = await _cached_completion(cache, llm, prompt, doc_ids, plan, spec)
+            if text is None:
+                parts: List[str] = []
+                with span("llm"):
+                    async with aclosing(llm.astream(prompt)) as tokens:
+                        async for token in tokens:
+                            parts.append(token)
+                            await events.put(("token", {"section": spec.name, "text": token}))
+
+                text = "".join(parts).strip()
+                count_llm_tokens(estimate_tokens(prompt), estimate_tokens(text))
+                if cache is not None:
+                    await _run_cache(cache, cache.store, prompt, doc_ids, llm_params(llm), text,
+                                     semantic_text=_semantic_text(plan, spec))
+            else:
+                await events.put(("token", {"section": spec.name, "text": text, "cached": True}))
+
+            content[spec.name] = spec.parse(text) if spec.parse else text
+            await events.put((
+                "section_end",
+                {"section": spec.name, "content": content[spec.name], "context_tokens": packed.tokens}
+            ))
+    except Exception as e:
+        await events.put((_SECTION_DONE, e))
+    else:
+        await events.put((_SECTION_DONE, None))
+
+
+async def stream_document(
+    plan: DocumentPlan,
+    llm: Optional[BaseLLM] = None,
+    retriever: Optional[BaseRetriever] = None,
+    max_concurrency: Optional[int] = None,
+    cache: Optional[ResponseCache] = None,
+) -> AsyncIterator[GenerationEvent]:
+    """Generate the sections of `plan` concurrently, yielding events as output is produced.
+
+    Each generated section does its own retrieval and LLM call; at most
+    `max_concurrency` sections run at once, so the document takes roughly as
+    long as its slowest sections rather than their sum. Events of different
+    sections interleave (`section_start`, `token`, `section_end`, all tagged
+    with the section name); the final `document` event holds every section in
+    plan order. Without an LLM the fallback values are used. With a `cache`,
+    a section whose prompt, context chunks and model parameters were seen
+    before is sent as a single cached token instead of calling the LLM.
+    Closing this generator cancels the running sections and their LLM streams.
+    """
+    content: Dict[str, Any] = {}
+    generated = []
+    for spec in plan.sections:
+        if spec.instruction is None or llm is None:
+            content[spec.name] = spec.fallback
+        else:
+            generated.append(spec)
+
+    if generated:
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or default_concurrency()))
+        events: "asyncio.Queue[Any]" = asyncio.Queue()
+        tasks = [
+            asyncio.create_task(_generate_section(plan, spec, llm, retriever, semaphore, events, content, cache))
+            for spec in generated
+        ]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                event, data = await events.get()
+                if event is _SECTION_DONE:
+                    if data is not None:
+                        raise data
+                    remaining -= 1
+                    continue
+                yield event, data
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    yield "document", {spec.name: content[spec.name] for spec in plan.sections}
+
+
+async def generate_document(
+    plan: DocumentPlan,
+    llm: Optional[BaseLLM] = None,
+    retriever: Optional[BaseRetriever] = None,
+    max_concurrency: Optional[int] = None,
+    cache: Optional[ResponseCache] = None,
+) -> Dict[str, Any]:
+    """Run `stream_document` to completion and return the assembled document"""
+    document: Dict[str, Any] = {}
+    async with aclosing(stream_document(plan, llm, retriever, max_concurrency, cache)) as events:
+        async for event, data in events:
+            if event == "document":
+                document = data
+    return document
@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Sequence
+import asyncio
+import hashlib
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document as LCDocument
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from src.services.bm25 import BM25Index
+from src.services.metrics import span
+
+# Shared by all retrievers for the sparse side of synchronous queries
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid-retriever")
+
+
+def document_key(doc: LCDocument) -> str:
+    """Identity used to merge the same chunk coming from both searches"""
+    key = doc.metadata.get("chunk_id") or getattr(doc, "id", None)
+    return str(key) if key else hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[LCDocument]], k: int = 60) -> List[LCDocument]:
+    """Fuse ranked lists: score(d) = sum over lists of 1 / (k + rank)"""
+    scores: Dict[str, float] = {}
+    documents: Dict[str, LCDocument] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = document_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(key, doc)
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    fused = []
+    for key in ordered:
+        doc = documents[key]
+        doc.metadata["rrf_score"] = round(scores[key], 6)
+        fused.append(doc)
+    return fused
+
+
+class HybridRetriever(BaseRetriever):
+    """Dense (vector store) + sparse (BM25) retrieval fused with reciprocal-rank fusion.
+
+    Both searches run concurrently, each fetching `fetch_k` candidates; the
+    fused top `k` are returned.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorstore: Any
+    bm25_index: BM25Index
+    k: int = 6
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    def _dense(self, query: str) -> List[LCDocument]:
+        with span("vector_search"):
+            return self.vectorstore.similarity_search(query, k=self.fetch_k)
+
+    def _sparse(self, query: str) -> List[LCDocument]:
+        with span("bm25_search"):
+            return [doc for doc, _ in self.bm25_index.search(query, k=self.fetch_k)]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[LCDocument]:
+        sparse = _executor.submit(self._sparse, query)
+        dense = self._dense(query)
+        return reciprocal_rank_fusion([dense, sparse.result()], k=self.rrf_k)[:self.k]
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[LCDocument]:
+        dense, sparse = await asyncio.gather(
+            asyncio.to_thread(self._dense, query),
+            asyncio.to_thread(self._sparse, query),
+        )
+        return reciprocal_rank_fusion([dense, sparse], k=self.rrf_k)[:self.k]
@@ -0,0 +1,105 @@
+from typing import Any, Iterable, List, Optional, Tuple
+import logging
+import uuid
+
+from langchain_core.documents import Document as LCDocument
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from src.services.bm25 import BM25Index
+from src.services.response_cache import get_response_cache
+
+logger = logging.getLogger(__name__)
+
+
+class IndexedVectorStore(VectorStore):
+    """Any LangChain vector store plus a BM25 index that mirrors every write.
+
+    All write paths (add_documents, add_texts, delete) go through the two
+    overridden methods, so the sparse index is updated incrementally alongside
+    the dense one and both share the same chunk ids. Writes are sent to the
+    backend in bulk upserts of `upsert_batch_size`. Cached LLM responses built
+    from replaced or deleted chunks are invalidated by the same writes, in
+    this process directly and in others through the BM25 change log.
+    """
+
+    def __init__(self, store: VectorStore, bm25_index: BM25Index, upsert_batch_size: int = 1000) -> None:
+        self.store = store
+        self.bm25_index = bm25_index
+        self.upsert_batch_size = upsert_batch_size
+        if len(bm25_index) == 0 and self.stored_count() > 0:
+            self.rebuild_sparse_index()
+        get_response_cache().watch(bm25_index)
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self.store.embeddings
+
+    def stored_count(self) -> int:
+        collection = getattr(self.store, "_collection", None)
+        return collection.count() if collection is not None else len(self.store)
+
+    def rebuild_sparse_index(self, batch_size: int = 1000) -> None:
+        """Backfill the BM25 index from the chunks already stored in the backend"""
+        total = self.stored_count()
+        logger.info(f"Building BM25 index for {total} existing chunk(s)")
+        for offset in range(0, total, batch_size):
+            batch = self.store.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+            self.bm25_index.add(batch["ids"], batch["documents"], batch["metadatas"])
+        self.bm25_index.optimize()
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        metadatas = list(metadatas) if metadatas else [{} for _ in texts]
+        for start in range(0, len(texts), self.upsert_batch_size):
+            end = start + self.upsert_batch_size
+            self.store.add_texts(texts[start:end], metadatas=metadatas[start:end], ids=ids[start:end], **kwargs)
+            self.bm25_index.add(ids[start:end], texts[start:end], metadatas[start:end])
+        get_response_cache().invalidate_documents(ids)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> None:
+        self.store.delete(ids=ids, **kwargs)
+        if ids:
+            self.bm25_index.delete(ids)
+            get_response_cache().invalidate_documents(ids)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[LCDocument]:
+        return self.store.similarity_search(query, k=k, **kwargs)
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[LCDocument, float]]:
+        return self.store.similarity_search_with_score(query, k=k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[LCDocument]:
+        return self.store.similarity_search_by_vector(embedding, k=k, **kwargs)
+
+    def _select_relevance_score_fn(self):
+        return self.store._select_relevance_score_fn()
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        collection_name: Optional[str] = None,
+        directory: Optional[str] = None,
+        backend: Optional[str] = None,
+        **kwargs: Any,
+    ) -> "IndexedVectorStore":
+        """Open a collection with open_vectorstore (default collection, directory and backend) and add `texts`"""
+        # vectorstore imports this module
+        from src.services.vectorstore import DEFAULT_COLLECTION, open_vectorstore
+
+        store = open_vectorstore(collection_name or DEFAULT_COLLECTION, embedding, directory, backend)
+        store.add_texts(texts, metadatas=metadatas, ids=ids, **kwargs)
+        return store
@@ -0,0 +1,334 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from langchain_core.documents import Document as LCDocument
+
+from src.services.chunker import StructureChunker
+from src.services.format_router import RouteStats, get_route_counters
+from src.services.loader import PageRange, default_page_window, page_windows
+from src.services.metrics import observe_stage
+from src.services.manifest import IngestManifest, IngestPlan, chunk_id_prefix, params_key
+
+logger = logging.getLogger(__name__)
+
+# Common document extensions supported by Docling; plain text and Markdown bypass it
+SUPPORTED_EXTENSIONS = {'.pdf', '.docx', '.doc', '.pptx', '.ppt', '.xlsx', '.xls', '.txt', '.md'}
+
+_STOP = object()
+
+# (route, pages, seconds) of one converted piece of a file
+RouteTiming = Tuple[str, int, float]
+
+
+def find_supported_files(directory: Path) -> List[str]:
+    """List files in `directory` that Docling can convert"""
+    return sorted(
+        str(path) for path in directory.iterdir()
+        if path.is_file() and path.suffix.lower() in SUPPORTED_EXTENSIONS
+    )
+
+
+def _init_worker() -> None:
+    # Each worker process loads the Docling models once and keeps them warm
+    from src.services.converter_pool import get_converter_pool
+    get_converter_pool().warm_up()
+
+
+def _convert_file(
+    file_path: str, chunker: StructureChunker, page_range: Optional[PageRange] = None
+) -> Tuple[str, List[LCDocument], float, float, List[RouteTiming]]:
+    """Convert and chunk one file, or one page window of it, inside a worker process"""
+    from src.services.converter_pool import get_converter_pool
+    from src.services.format_router import convert_routed
+
+    metadata = {"source": file_path}
+    if page_range:
+        metadata.update(page_start=page_range[0], page_end=page_range[1])
+
+    chunks: List[LCDocument] = []
+    routes: List[RouteTiming] = []
+    split_seconds = 0.0
+    # Timings are returned rather than counted here, since this runs in a worker process
+    for routed in convert_routed(get_converter_pool(), file_path, page_range):
+        routes.append((routed.route, routed.pages, routed.seconds))
+        started = time.perf_counter()
+        chunks.extend(chunker.chunk(routed.document, routed.chunk_metadata(metadata)))
+        split_seconds += time.perf_counter() - started
+    return file_path, chunks, sum(seconds for _, _, seconds in routes), split_seconds, routes
+
+
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    busy_seconds: float = 0.0
+
+    def record(self, items: int, seconds: float) -> None:
+        self.items += items
+        self.busy_seconds += seconds
+
+    def throughput(self) -> float:
+        return self.items / self.busy_seconds if self.busy_seconds else 0.0
+
+
+@dataclass
+class IngestionReport:
+    files_total: int = 0
+    files_loaded: int = 0
+    files_failed: Dict[str, str] = field(default_factory=dict)
+    chunk_ids: Dict[str, List[str]] = field(default_factory=dict)
+    chunks: int = 0
+    wall_seconds: float = 0.0
+    stages: Dict[str, StageStats] = field(default_factory=lambda: {
+        name: StageStats(name) for name in ("convert", "split", "embed")
+    })
+    # Conversion broken down by format route (text, markdown, pdf_text, docling)
+    routes: Dict[str, RouteStats] = field(default_factory=dict)
+
+    def record_routes(self, routes: List[RouteTiming]) -> None:
+        for route, pages, seconds in routes:
+            self.routes.setdefault(route, RouteStats()).record(pages, seconds)
+            get_route_counters().record(route, pages, seconds)
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "files_total": self.files_total,
+            "files_loaded": self.files_loaded,
+            "files_failed": len(self.files_failed),
+            "chunks": self.chunks,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "stages": {
+                name: {
+                    "items": stats.items,
+                    "busy_seconds": round(stats.busy_seconds, 3),
+                    "items_per_second": round(stats.throughput(), 2),
+                }
+                for name, stats in self.stages.items()
+            },
+            "routes": {route: stats.as_dict() for route, stats in self.routes.items()},
+        }
+
+
+class IngestionPipeline:
+    """Convert, chunk and embed documents as a streaming pipeline.
+
+    Conversion and structure-aware chunking run in a process pool. PDFs longer
+    than `page_window` pages are converted as separate page windows, so one
+    huge file is spread over several workers and its first chunks are embedded
+    long before its last page is converted. The chunks of each file or window
+    go, as soon as it is done, through a bounded queue to an embedding thread
+    that writes them in batches with `sink`. When the embedding side falls
+    behind, the queue fills up and no new conversions are submitted until it
+    drains.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[List[LCDocument]], object],
+        chunker: Optional[StructureChunker] = None,
+        max_workers: Optional[int] = None,
+        max_pending_chunks: int = 512,
+        embed_batch_size: int = 64,
+        page_window: Optional[int] = None,
+    ) -> None:
+        self._sink = sink
+        self._chunker = chunker or StructureChunker()
+        self._max_workers = max_workers or int(os.environ.get("INGEST_WORKERS", os.cpu_count() or 1))
+        self._max_pending_chunks = max_pending_chunks
+        self._embed_batch_size = embed_batch_size
+        self._page_window = default_page_window() if page_window is None else page_window
+
+    def run(self, file_paths: List[str], id_prefixes: Optional[Dict[str, str]] = None) -> IngestionReport:
+        """Ingest `file_paths`; chunks of files with an ID prefix get IDs `<prefix>-<n>`"""
+        report = IngestionReport(files_total=len(file_paths))
+        started = time.perf_counter()
+        chunk_queue: "queue.Queue[object]" = queue.Queue(maxsize=self._max_pending_chunks)
+        embed_errors: List[BaseException] = []
+
+        embedder = threading.Thread(
+            target=self._embed_loop,
+            args=(chunk_queue, report, embed_errors),
+            name="ingest-embed",
+            daemon=True,
+        )
+        embedder.start()
+
+        try:
+            self._convert_and_split(file_paths, id_prefixes or {}, chunk_queue, report, embed_errors)
+        finally:
+            chunk_queue.put(_STOP)
+            embedder.join()
+
+        report.wall_seconds = time.perf_counter() - started
+        if embed_errors:
+            raise embed_errors[0]
+
+        logger.info(f"Ingestion finished: {report.summary()}")
+        return report
+
+    def _convert_and_split(
+        self,
+        file_paths: List[str],
+        id_prefixes: Dict[str, str],
+        chunk_queue: "queue.Queue[object]",
+        report: IngestionReport,
+        embed_errors: List[BaseException],
+    ) -> None:
+        pending_tasks: List[Tuple[str, Optional[PageRange]]] = []
+        windows_left: Dict[str, int] = {}
+        for file_path in file_paths:
+            try:
+                windows = page_windows(file_path, self._page_window)
+            except Exception as e:
+                logger.warning(f"Error loading {Path(file_path).name}: {e}")
+                report.files_failed[file_path] = str(e)
+                continue
+            windows_left[file_path] = len(windows)
+            pending_tasks.extend((file_path, window) for window in windows)
+        pending_tasks.reverse()
+
+        in_flight: Dict[Future, Tuple[str, Optional[PageRange]]] = {}
+        max_in_flight = self._max_workers * 2
+
+        # The embedder thread is already running; forked workers could inherit its held locks
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=self._max_workers, initializer=_init_worker, mp_context=context) as executor:
+            while pending_tasks or in_flight:
+                if embed_errors:
+                    for future in in_flight:
+                        future.cancel()
+                    return
+
+                while pending_tasks and len(in_flight) < max_in_flight:
+                    file_path, window = pending_tasks.pop()
+                    in_flight[executor.submit(_convert_file, file_path, self._chunker, window)] = (file_path, window)
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path, window = in_flight.pop(future)
+                    name = Path(file_path).name
+                    windows_left[file_path] -= 1
+                    try:
+                        _, chunks, convert_seconds, split_seconds, routes = future.result()
+                    except Exception as e:
+                        pages = f" (pages {window[0]}-{window[1]})" if window else ""
+                        logger.warning(f"Error loading {name}{pages}: {e}")
+                        report.files_failed.setdefault(file_path, str(e))
+                        continue
+                    if file_path in report.files_failed:
+                        continue
+
+                    report.stages["convert"].record(1, convert_seconds)
+                    observe_stage("convert", convert_seconds)
+                    observe_stage("split", split_seconds)
+                    report.record_routes(routes)
+                    prefix = id_prefixes.get(file_path)
+                    if prefix:
+                        # Window-qualified IDs stay unique whatever order the windows finish in
+                        chunk_prefix = f"{prefix}-p{window[0]}" if window else prefix
+                        for index, chunk in enumerate(chunks):
+                            chunk.metadata["chunk_id"] = f"{chunk_prefix}-{index}"
+                        report.chunk_ids.setdefault(file_path, []).extend(
+                            chunk.metadata["chunk_id"] for chunk in chunks
+                        )
+                    report.stages["split"].record(len(chunks), split_seconds)
+                    if window:
+                        logger.info(f"Loaded {name} pages {window[0]}-{window[1]}: {len(chunks)} chunk(s)")
+                    if windows_left[file_path] == 0:
+                        report.files_loaded += 1
+                        logger.info(f"Loaded {name}: {len(report.chunk_ids.get(file_path, chunks))} chunk(s)")
+
+                    # Blocks while the embedding stage is behind, which holds back new submissions
+                    for chunk in chunks:
+                        chunk_queue.put(chunk)
+
+    def _embed_loop(
+        self,
+        chunk_queue: "queue.Queue[object]",
+        report: IngestionReport,
+        embed_errors: List[BaseException],
+    ) -> None:
+        batch: List[LCDocument] = []
+        while True:
+            item = chunk_queue.get()
+            if item is not _STOP:
+                batch.append(item)
+            if batch and (item is _STOP or len(batch) >= self._embed_batch_size or chunk_queue.empty()):
+                if not embed_errors:
+                    try:
+                        embed_started = time.perf_counter()
+                        self._sink(batch)
+                        report.stages["embed"].record(len(batch), time.perf_counter() - embed_started)
+                        report.chunks += len(batch)
+                    except BaseException as e:
+                        logger.error(f"Embedding batch failed: {e}")
+                        embed_errors.append(e)
+                batch = []
+            if item is _STOP:
+                return
+
+
+def ingest_incrementally(
+    file_paths: List[str],
+    vectorstore,
+    manifest: IngestManifest,
+    params: Dict[str, object],
+    chunker: Optional[StructureChunker] = None,
+    **pipeline_kwargs,
+) -> Tuple[IngestPlan, Optional[IngestionReport]]:
+    """Bring `vectorstore` in line with `file_paths` using the ingest manifest.
+
+    Unchanged files are skipped without conversion or embedding, changed files
+    are re-ingested and their previous chunks deleted, and vectors of files
+    that no longer exist are removed. Cached LLM responses built from deleted
+    chunks are invalidated.
+    """
+    key = params_key(params)
+    plan = manifest.plan(file_paths, key)
+    report = None
+
+    if plan.to_ingest:
+        id_prefixes = {
+            source: chunk_id_prefix(source, plan.content_hashes[source], key)
+            for source in plan.to_ingest
+        }
+
+        def sink(docs: List[LCDocument]) -> None:
+            vectorstore.add_documents(docs, ids=[doc.metadata["chunk_id"] for doc in docs])
+
+        pipeline = IngestionPipeline(sink=sink, chunker=chunker, **pipeline_kwargs)
+        report = pipeline.run(plan.to_ingest, id_prefixes=id_prefixes)
+
+        # Windows of a file that failed part-way may already have been stored
+        for source in report.files_failed:
+            partial = report.chunk_ids.pop(source, [])
+            if partial:
+                vectorstore.delete(ids=partial)
+
+        for source, chunk_ids in report.chunk_ids.items():
+            current = set(chunk_ids)
+            stale = [cid for cid in plan.stale_chunk_ids.get(source, []) if cid not in current]
+            if stale:
+                vectorstore.delete(ids=stale)
+            manifest.record(source, plan.content_hashes[source], key, chunk_ids)
+
+    for source in plan.removed:
+        stale = plan.stale_chunk_ids.get(source, [])
+        if stale:
+            vectorstore.delete(ids=stale)
+        manifest.forget(source)
+
+    manifest.save()
+    logger.info(
+        f"Incremental ingest: {len(plan.to_ingest)} ingested, "
+        f"{len(plan.unchanged)} unchanged, {len(plan.removed)} removed"
+    )
+    return plan, report
@@ -0,0 +1,359 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+# Called by handlers to report progress: fraction in [0, 1] and an optional message
+ProgressCallback = Callable[[float, Optional[str]], None]
+JobHandler = Callable[[Dict[str, Any], ProgressCallback], Optional[Dict[str, Any]]]
+
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Register the function that processes jobs of `kind`"""
+    def decorator(fn: JobHandler) -> JobHandler:
+        _handlers[kind] = fn
+        return fn
+    return decorator
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    payload: Dict[str, Any]
+    status: str
+    progress: float
+    message: Optional[str]
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    attempts: int
+    max_attempts: int
+    created_at: float
+    updated_at: float
+    run_after: float
+    owner: Optional[str] = None
+    lease_expires: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "owner": self.owner,
+        }
+
+
+class JobStore:
+    """SQLite-backed persistent job table.
+
+    Several processes may share one database. A worker claims a job by
+    switching it from QUEUED to RUNNING in a single conditional UPDATE and
+    then holds a lease on it, which it renews while the job runs; only jobs
+    whose lease has expired are handed to another worker.
+    """
+
+    def __init__(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL, "
+            "progress REAL NOT NULL DEFAULT 0, message TEXT, result TEXT, error TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL, run_after REAL NOT NULL, "
+            "owner TEXT, lease_expires REAL)"
+        )
+        # Databases created before leases were recorded
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("lease_expires", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, run_after)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Job:
+        return Job(
+            id=row["id"],
+            kind=row["kind"],
+            payload=json.loads(row["payload"]),
+            status=row["status"],
+            progress=row["progress"],
+            message=row["message"],
+            result=json.loads(row["result"]) if row["result"] else None,
+            error=row["error"],
+            attempts=row["attempts"],
+            max_attempts=row["max_attempts"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            run_after=row["run_after"],
+            owner=row["owner"],
+            lease_expires=row["lease_expires"],
+        )
+
+    def insert(self, kind: str, payload: Dict[str, Any], max_attempts: int) -> Job:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, max_attempts, created_at, updated_at, run_after) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), QUEUED, max_attempts, now, now, now),
+            )
+            self._conn.commit()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Job]:
+        query, args = "SELECT * FROM jobs", []
+        if status:
+            query += " WHERE status = ?"
+            args.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def claim_next(self, owner: str, lease_seconds: float) -> Optional[Job]:
+        """Atomically move the oldest runnable job to RUNNING under a lease held by `owner`"""
+        with self._lock:
+            while True:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? AND run_after <= ? ORDER BY run_after LIMIT 1",
+                    (QUEUED, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                # Another process may have claimed the job since the SELECT;
+                # the status condition makes only one UPDATE succeed
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, owner = ?, lease_expires = ?, updated_at = ? "
+                    "WHERE id = ? AND status = ?",
+                    (RUNNING, owner, now + lease_seconds, now, row["id"], QUEUED),
+                )
+                self._conn.commit()
+                if cursor.rowcount == 1:
+                    break
+        return self.get(row["id"])
+
+    def next_run_after(self) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(run_after) AS run_after FROM jobs WHERE status = ?", (QUEUED,)
+            ).fetchone()
+        return row["run_after"] if row else None
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        for key in ("payload", "result"):
+            if key in fields and fields[key] is not None:
+                fields[key] = json.dumps(fields[key])
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", [*fields.values(), job_id])
+            self._conn.commit()
+
+    def renew_leases(self, owner: str, lease_seconds: float) -> int:
+        """Extend the leases of all jobs `owner` is running"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE owner = ? AND status = ?",
+                (time.time() + lease_seconds, owner, RUNNING),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def requeue_expired(self) -> int:
+        """Jobs whose worker stopped renewing their lease (crash, shutdown) are queued again"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, lease_expires = NULL, message = ?, updated_at = ? "
+                "WHERE status = ? AND (lease_expires IS NULL OR lease_expires < ?)",
+                (QUEUED, "Requeued after its worker stopped", now, RUNNING, now),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+
+class JobQueue:
+    """Persistent job queue processed by a pool of in-process worker threads.
+
+    Handlers run on worker threads, never on the asyncio event loop. Failed
+    jobs are retried with exponential backoff up to `max_attempts`; files
+    listed in a payload's `spool_paths` are removed once the job finishes.
+    A lease thread renews the leases of running jobs every third of
+    `lease_seconds` and requeues jobs abandoned by other workers.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int = 2,
+        max_attempts: int = 3,
+        backoff_seconds: float = 5.0,
+        lease_seconds: float = 60.0,
+    ) -> None:
+        self.store = store
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stopping.clear()
+        self._requeue_expired()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._maintain_leases, name="job-leases", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        logger.info(f"Job queue started with {self.workers} worker(s) as {self.owner}")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, kind: str, payload: Dict[str, Any], max_attempts: Optional[int] = None) -> Job:
+        if kind not in _handlers:
+            raise ValueError(f"No job handler registered for '{kind}'")
+        job = self.store.insert(kind, payload, max_attempts or self.max_attempts)
+        with self._wakeup:
+            self._wakeup.notify()
+        logger.info(f"Job queued: {job.id} ({kind})")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    def _wait_for_work(self) -> None:
+        next_run = self.store.next_run_after()
+        timeout = 1.0 if next_run is None else min(1.0, max(0.0, next_run - time.time()))
+        with self._wakeup:
+            self._wakeup.wait(timeout)
+
+    def _requeue_expired(self) -> None:
+        requeued = self.store.requeue_expired()
+        if requeued:
+            logger.info(f"Requeued {requeued} job(s) with an expired lease")
+            with self._wakeup:
+                self._wakeup.notify_all()
+
+    def _maintain_leases(self) -> None:
+        while not self._stopping.wait(self.lease_seconds / 3):
+            try:
+                self.store.renew_leases(self.owner, self.lease_seconds)
+                self._requeue_expired()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not renew job leases: {str(e)}")
+
+    def _worker(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = self.store.claim_next(self.owner, self.lease_seconds)
+            except sqlite3.OperationalError as e:
+                # e.g. "database is locked" while another process writes
+                logger.warning(f"Could not claim a job: {str(e)}")
+                job = None
+            if job is None:
+                self._wait_for_work()
+                continue
+            self._run(job)
+
+    def _run(self, job: Job) -> None:
+        handler = _handlers.get(job.kind)
+
+        def progress(fraction: float, message: Optional[str] = None) -> None:
+            fields: Dict[str, Any] = {"progress": max(0.0, min(1.0, fraction))}
+            if message is not None:
+                fields["message"] = message
+            self.store.update(job.id, **fields)
+
+        try:
+            if handler is None:
+                raise RuntimeError(f"No job handler registered for '{job.kind}'")
+            result = handler(job.payload, progress)
+        except Exception as e:
+            if job.attempts < job.max_attempts:
+                delay = self.backoff_seconds * (2 ** (job.attempts - 1))
+                logger.warning(f"Job {job.id} failed (attempt {job.attempts}/{job.max_attempts}), retrying in {delay:.0f}s: {str(e)}")
+                self.store.update(
+                    job.id, status=QUEUED, error=str(e), run_after=time.time() + delay, owner=None, lease_expires=None
+                )
+                return
+            logger.error(f"Job {job.id} failed permanently: {str(e)}")
+            self.store.update(job.id, status=FAILED, error=str(e), message="Failed", lease_expires=None)
+        else:
+            self.store.update(
+                job.id, status=SUCCEEDED, progress=1.0, result=result or {}, error=None, message="Completed", lease_expires=None
+            )
+            logger.info(f"Job completed: {job.id} ({job.kind})")
+
+        for path in job.payload.get("spool_paths", []):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide job queue configured from JOBS_* variables"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue(
+                    JobStore(os.environ.get("JOBS_DB_PATH", "./data/jobs.sqlite3")),
+                    workers=int(os.environ.get("JOBS_WORKERS", "2")),
+                    max_attempts=int(os.environ.get("JOBS_MAX_ATTEMPTS", "3")),
+                    backoff_seconds=float(os.environ.get("JOBS_RETRY_BACKOFF_SECONDS", "5")),
+                    lease_seconds=float(os.environ.get("JOBS_LEASE_SECONDS", "60")),
+                )
+    return _queue
@@ -0,0 +1,25 @@
+from typing import Optional
+import os
+import threading
+
+from langchain_core.language_models import BaseLLM
+
+_llm: Optional[BaseLLM] = None
+_llm_lock = threading.Lock()
+
+
+def get_llm() -> Optional[BaseLLM]:
+    """Process-wide Gemini client, or None when GOOGLE_API_KEY is not configured"""
+    global _llm
+    if _llm is None:
+        if not os.environ.get("GOOGLE_API_KEY"):
+            return None
+        with _llm_lock:
+            if _llm is None:
+                from langchain_google_genai import GoogleGenerativeAI
+                _llm = GoogleGenerativeAI(
+                    model=os.environ.get("GEMINI_MODEL", "gemini-1.5-flash"),
+                    google_api_key=os.environ.get("GOOGLE_API_KEY"),
+                    temperature=0.7
+                )
+    return _llm
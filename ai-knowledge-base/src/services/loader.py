@@ -0,0 +1,116 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Deque, Iterator, List, Optional
+import os
+
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document as LCDocument
+
+from src.services.chunker import StructureChunker
+from src.services.converter_pool import ConverterPool, get_converter_pool
+from src.services.format_router import PageRange, convert_routed, get_route_counters
+from src.services.metrics import observe_stage, span
+
+
+def default_page_window() -> int:
+    """Pages converted per window for PDFs (DOCLING_PAGE_WINDOW); 0 converts whole files"""
+    return int(os.environ.get("DOCLING_PAGE_WINDOW", "0"))
+
+
+def pdf_page_count(path: str) -> int:
+    # pypdfium2 ships with Docling and only reads the page tree here
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def page_windows(path: str, window: int) -> List[Optional[PageRange]]:
+    """Page ranges to convert `path` in; [None] means the whole file at once"""
+    if window <= 0 or Path(path).suffix.lower() != ".pdf":
+        return [None]
+    pages = pdf_page_count(path)
+    if pages <= window:
+        return [None]
+    return [(start, min(start + window - 1, pages)) for start in range(1, pages + 1, window)]
+
+
+def convert_documents(
+    pool: ConverterPool,
+    source: str,
+    chunker: Optional[StructureChunker] = None,
+    page_range: Optional[PageRange] = None,
+) -> List[LCDocument]:
+    """Convert `source` (or one page window of it) into LangChain documents.
+
+    The format router decides per file, and per run of PDF pages, whether
+    Docling is needed at all; see `convert_routed`.
+    """
+    metadata = {"source": str(source)}
+    if page_range:
+        metadata.update(page_start=page_range[0], page_end=page_range[1])
+    documents: List[LCDocument] = []
+    markdown: List[str] = []
+    for routed in convert_routed(pool, source, page_range):
+        get_route_counters().record(routed.route, routed.pages, routed.seconds)
+        observe_stage("convert", routed.seconds)
+        if chunker is not None:
+            with span("split"):
+                documents.extend(chunker.chunk(routed.document, routed.chunk_metadata(metadata)))
+        else:
+            markdown.append(routed.document.export_to_markdown())
+    if chunker is not None:
+        return documents
+    return [LCDocument(page_content="\n\n".join(markdown), metadata=metadata)]
+
+
+class DoclingLoader(BaseLoader):
+    """Document loader using Docling for various document formats.
+
+    With a `chunker`, structure-aware chunks are yielded instead of one
+    Markdown document per file. With a `page_window`, PDFs longer than the
+    window are converted `page_window` pages at a time, up to `max_workers`
+    windows in parallel, and each window is yielded as soon as it and the
+    ones before it are done, so memory is bounded by the window size rather
+    than the page count.
+    """
+
+    def __init__(
+        self,
+        file_path: str | list[str],
+        pool: Optional[ConverterPool] = None,
+        chunker: Optional[StructureChunker] = None,
+        page_window: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        self._file_paths = file_path if isinstance(file_path, list) else [file_path]
+        self._pool = pool or get_converter_pool()
+        self._chunker = chunker
+        self._page_window = default_page_window() if page_window is None else page_window
+        # Each window holds a pooled converter while it runs
+        self._max_workers = max_workers or self._pool.size
+
+    def lazy_load(self) -> Iterator[LCDocument]:
+        for source in self._file_paths:
+            windows = page_windows(str(source), self._page_window)
+            if windows == [None]:
+                yield from convert_documents(self._pool, source, self._chunker)
+            else:
+                yield from self._load_windows(source, windows)
+
+    def _load_windows(self, source: str, windows: List[Optional[PageRange]]) -> Iterator[LCDocument]:
+        pending = deque(windows)
+        in_flight: Deque = deque()
+        with ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="docling-window") as executor:
+            try:
+                while pending or in_flight:
+                    while pending and len(in_flight) < self._max_workers:
+                        window = pending.popleft()
+                        in_flight.append(executor.submit(convert_documents, self._pool, source, self._chunker, window))
+                    yield from in_flight.popleft().result()
+            finally:
+                for future in in_flight:
+                    future.cancel()
@@ -0,0 +1,566 @@
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import fcntl
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+
+import numpy as np
+from langchain_core.documents import Document as LCDocument
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per block, which bounds the temporary arrays of a scan
+SCAN_BLOCK_ROWS = 16384
+
+QUANTIZATIONS = ("none", "int8", "pq")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _update_centroids(
+    data: np.ndarray, labels: np.ndarray, centroids: np.ndarray, rng: np.random.Generator
+) -> np.ndarray:
+    """Mean of each cluster; empty clusters are re-seeded with a random point"""
+    k = len(centroids)
+    counts = np.bincount(labels, minlength=k)
+    sums = np.stack([np.bincount(labels, weights=data[:, j], minlength=k) for j in range(data.shape[1])], axis=1)
+    updated = (sums / np.maximum(counts, 1)[:, None]).astype(centroids.dtype)
+    empty = np.flatnonzero(counts == 0)
+    updated[empty] = data[rng.integers(len(data), size=len(empty))]
+    return updated
+
+
+def int8_encode(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-vector int8 codes and the scale that maps them back"""
+    scales = np.abs(vectors).max(axis=1)
+    scales[scales == 0] = 1.0
+    codes = np.round(vectors / scales[:, None] * 127).astype(np.int8)
+    return codes, (scales / 127).astype(np.float32)
+
+
+def pq_subspaces(dim: int, requested: int = 0) -> int:
+    """Number of PQ subspaces: `requested` if it divides `dim`, else about 8 dimensions each"""
+    target = requested or max(1, dim // 8)
+    for m in range(min(target, dim), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def pq_train(data: np.ndarray, subspaces: int, rng: np.random.Generator, iterations: int = 10) -> np.ndarray:
+    """Per-subspace k-means codebooks, shape (subspaces, centroids, dim / subspaces)"""
+    n, dim = data.shape
+    dsub = dim // subspaces
+    ks = min(256, n)
+    codebooks = np.zeros((subspaces, ks, dsub), dtype=np.float32)
+    for m in range(subspaces):
+        x = np.ascontiguousarray(data[:, m * dsub:(m + 1) * dsub])
+        centroids = x[rng.choice(n, size=ks, replace=False)].copy()
+        x_norms = (x ** 2).sum(axis=1)[:, None]
+        for _ in range(iterations):
+            labels = np.argmin(x_norms - 2 * x @ centroids.T + (centroids ** 2).sum(axis=1)[None, :], axis=1)
+            centroids = _update_centroids(x, labels, centroids, rng)
+        codebooks[m] = centroids
+    return codebooks
+
+
+def pq_encode(vectors: np.ndarray, codebooks: np.ndarray) -> np.ndarray:
+    subspaces, _, dsub = codebooks.shape
+    codes = np.zeros((len(vectors), subspaces), dtype=np.uint8)
+    for m in range(subspaces):
+        x = np.ascontiguousarray(vectors[:, m * dsub:(m + 1) * dsub])
+        centroids = codebooks[m]
+        codes[:, m] = np.argmin((centroids ** 2).sum(axis=1)[None, :] - 2 * x @ centroids.T, axis=1)
+    return codes
+
+
+def _top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    if len(scores) > k:
+        keep = np.argpartition(-scores, k - 1)[:k]
+        rows, scores = rows[keep], scores[keep]
+    order = np.argsort(-scores)
+    return rows[order], scores[order]
+
+
+class LocalVectorStore(VectorStore):
+    """Vector store on memory-mapped files with an optional IVF index.
+
+    Normalized float32 vectors are appended to `vectors.f32`, and chunk text,
+    metadata and the chunk-id -> row mapping live in SQLite. Replaced or
+    deleted chunks leave tombstoned rows behind. Once `min_train` live vectors
+    exist, an IVF index (spherical k-means centroids plus a per-row list
+    assignment) is trained and searches only score the `nprobe` closest lists.
+    It is retrained when the collection doubles.
+
+    With `quantization`, searches scan compact codes instead of the float32
+    vectors: "int8" (one byte per dimension plus a per-vector scale) or "pq"
+    (product quantization, one byte per subspace, trained together with the
+    IVF lists). The best `k * rescore_factor` candidates are then re-scored
+    with the full-precision vectors, so only those rows of the float32 file
+    are read.
+
+    The files are mapped shared, so every API worker process reads the same
+    page-cache copy. Writers serialize on a lock file, and readers pick up
+    other processes' writes through a version number in SQLite.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        embedding_function: Embeddings,
+        index_type: str = "ivf",
+        nlist: int = 0,
+        nprobe: int = 16,
+        min_train: int = 10000,
+        quantization: str = "none",
+        pq_subspaces: int = 0,
+        rescore_factor: int = 4,
+    ) -> None:
+        if index_type not in ("ivf", "flat"):
+            raise ValueError(f"Unknown local index type '{index_type}'. Available: ivf, flat")
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization '{quantization}'. Available: {', '.join(QUANTIZATIONS)}")
+        os.makedirs(directory, exist_ok=True)
+        self._dir = directory
+        self._embedding = embedding_function
+        self.index_type = index_type
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train = min_train
+        self.quantization = quantization
+        self.pq_subspaces = pq_subspaces
+        self.rescore_factor = max(1, rescore_factor)
+
+        self._db = sqlite3.connect(os.path.join(directory, "rows.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS rows (
+                row INTEGER PRIMARY KEY, chunk_id TEXT NOT NULL, content TEXT NOT NULL, metadata TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS live (chunk_id TEXT PRIMARY KEY, row INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+        self._db.commit()
+        self._lock = threading.RLock()
+
+        self._dim: Optional[int] = None
+        self._count = 0
+        self._version = -1
+        self._ivf_version = 0
+        self._pq_version = 0
+        self._pq_m: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
+        self._assign: Optional[np.memmap] = None
+        self._codes: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._codebooks: Optional[np.ndarray] = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._refresh()
+
+    # -- storage ---------------------------------------------------------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self._dir, name)
+
+    def _meta(self) -> Dict[str, int]:
+        return {key: int(value) for key, value in self._db.execute("SELECT key, value FROM meta")}
+
+    def _set_meta(self, **values: int) -> None:
+        self._db.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [(k, str(v)) for k, v in values.items()]
+        )
+
+    def _map(self, name: str, dtype: Any, width: int) -> Optional[np.memmap]:
+        path = self._path(name)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return None
+        capacity = os.path.getsize(path) // (np.dtype(dtype).itemsize * width)
+        shape = (capacity, width) if width > 1 else (capacity,)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def _files(self) -> List[Tuple[str, int]]:
+        """Mapped files and their bytes per row"""
+        files = [("vectors.f32", 4 * self._dim), ("assign.i32", 4)]
+        if self.quantization == "int8":
+            files += [("codes.i8", self._dim), ("scales.f32", 4)]
+        elif self.quantization == "pq" and self._pq_m:
+            files.append(("codes.pq", self._pq_m))
+        return files
+
+    def _remap(self) -> None:
+        self._vectors = self._map("vectors.f32", np.float32, self._dim)
+        self._assign = self._map("assign.i32", np.int32, 1)
+        if self.quantization == "int8":
+            self._codes = self._map("codes.i8", np.int8, self._dim)
+            self._scales = self._map("scales.f32", np.float32, 1)
+        elif self.quantization == "pq" and self._pq_m:
+            self._codes = self._map("codes.pq", np.uint8, self._pq_m)
+
+    def _refresh(self) -> None:
+        """Catch up with writes made by other processes"""
+        with self._lock:
+            meta = self._meta()
+            if meta.get("version", 0) == self._version:
+                return
+            self._dim = meta.get("dim") or None
+            self._count = meta.get("count", 0)
+            if self.quantization == "pq" and meta.get("pq_version", 0) != self._pq_version:
+                self._pq_version = meta.get("pq_version", 0)
+                self._pq_m = meta.get("pq_subspaces") or None
+                self._codebooks = np.load(self._path("pq_codebooks.npy")) if self._pq_version else None
+            if self._dim:
+                self._remap()
+            self._alive = np.zeros(self._count, dtype=bool)
+            rows = [row for (row,) in self._db.execute("SELECT row FROM live")]
+            self._alive[rows] = True
+            if meta.get("ivf_version", 0) != self._ivf_version:
+                self._ivf_version = meta.get("ivf_version", 0)
+                self._centroids = np.load(self._path("centroids.npy")) if self._ivf_version else None
+            self._lists = None
+            self._version = meta.get("version", 0)
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        with self._lock, open(self._path("write.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _reserve(self, rows: int) -> None:
+        """Grow the mapped files so that `rows` rows fit"""
+        capacity = len(self._vectors) if self._vectors is not None else 0
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2, 1024)
+        self._resize_files(capacity)
+
+    def _resize_files(self, capacity: int) -> None:
+        for name, row_bytes in self._files():
+            with open(self._path(name), "ab") as f:
+                f.truncate(capacity * row_bytes)
+        self._remap()
+
+    def _encode(self, start: int, vectors: np.ndarray) -> None:
+        """Write the quantized codes of rows starting at `start`"""
+        end = start + len(vectors)
+        if self.quantization == "int8" and (self._codes is None or len(self._codes) < len(self._vectors)):
+            # Quantization was switched on for an existing store: encode the rows written before
+            self._resize_files(len(self._vectors))
+            for block in range(0, start, SCAN_BLOCK_ROWS):
+                block_end = min(block + SCAN_BLOCK_ROWS, start)
+                self._codes[block:block_end], self._scales[block:block_end] = int8_encode(
+                    np.asarray(self._vectors[block:block_end])
+                )
+        if self.quantization == "int8":
+            self._codes[start:end], self._scales[start:end] = int8_encode(vectors)
+        elif self.quantization == "pq" and self._codebooks is not None:
+            self._codes[start:end] = pq_encode(vectors, self._codebooks)
+        else:
+            return
+        self._codes.flush()
+
+    def _bump_version(self, **values: int) -> None:
+        self._version += 1
+        self._set_meta(version=self._version, **values)
+        self._db.commit()
+
+    # -- IVF -------------------------------------------------------------
+
+    def _nearest_centroids(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def _maybe_train(self) -> None:
+        live = int(self._alive.sum())
+        trained_on = self._meta().get("trained_on", 0)
+        if (self.index_type != "ivf" and self.quantization != "pq") or live < self.min_train:
+            return
+        if self._centroids is not None and live < 2 * trained_on:
+            return
+        self.train()
+
+    def _save_array(self, name: str, array: np.ndarray) -> None:
+        tmp = self._path(f"{name}.tmp.npy")
+        np.save(tmp, array)
+        os.replace(tmp, self._path(f"{name}.npy"))
+
+    def train(self, iterations: int = 10, seed: int = 0) -> None:
+        """(Re)build the IVF lists and/or PQ codebooks on a sample and re-encode every row"""
+        with self._write_lock():
+            rows = np.flatnonzero(self._alive)
+            rng = np.random.default_rng(seed)
+            trained = {"trained_on": len(rows)}
+            if self.index_type == "ivf":
+                self._train_ivf(rows, rng, iterations)
+                trained["ivf_version"] = self._ivf_version
+            if self.quantization == "pq":
+                self._train_pq(rows, rng, iterations)
+                trained.update(pq_version=self._pq_version, pq_subspaces=self._pq_m)
+            self._lists = None
+            self._bump_version(**trained)
+
+    def _train_pq(self, rows: np.ndarray, rng: np.random.Generator, iterations: int) -> None:
+        sample = np.sort(rng.choice(rows, size=min(len(rows), 256 * 32), replace=False))
+        subspaces = pq_subspaces(self._dim, self.pq_subspaces)
+        self._codebooks = pq_train(np.asarray(self._vectors[sample]), subspaces, rng, iterations)
+        self._pq_m = subspaces
+        self._resize_files(len(self._vectors))
+        for start in range(0, self._count, SCAN_BLOCK_ROWS):
+            end = min(start + SCAN_BLOCK_ROWS, self._count)
+            self._encode(start, np.asarray(self._vectors[start:end]))
+        self._save_array("pq_codebooks", self._codebooks)
+        self._pq_version += 1
+        logger.info(f"Trained PQ codebooks with {subspaces} subspace(s) on {len(sample)} vector(s)")
+
+    def _train_ivf(self, rows: np.ndarray, rng: np.random.Generator, iterations: int) -> None:
+        nlist = self.nlist or max(1, int(np.sqrt(len(rows))))
+        sample = np.sort(rng.choice(rows, size=min(len(rows), nlist * 64), replace=False))
+        data = np.asarray(self._vectors[sample])
+        centroids = data[rng.choice(len(data), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(data @ centroids.T, axis=1)
+            centroids = _normalize(_update_centroids(data, labels, centroids, rng))
+
+        self._centroids = centroids.astype(np.float32)
+        for start in range(0, self._count, SCAN_BLOCK_ROWS):
+            end = min(start + SCAN_BLOCK_ROWS, self._count)
+            self._assign[start:end] = self._nearest_centroids(np.asarray(self._vectors[start:end]))
+        self._assign.flush()
+        self._save_array("centroids", self._centroids)
+        self._ivf_version += 1
+        logger.info(f"Trained IVF index with {nlist} list(s) on {len(rows)} vector(s)")
+
+    def _candidate_rows(self, query: np.ndarray) -> Optional[np.ndarray]:
+        if self._centroids is None:
+            return None
+        if self._lists is None:
+            assign = np.asarray(self._assign[:self._count])
+            order = np.argsort(assign, kind="stable")
+            self._lists = (order, assign[order])
+        order, sorted_lists = self._lists
+        probes = np.argsort(-(self._centroids @ query))[:self.nprobe]
+        parts = [
+            order[np.searchsorted(sorted_lists, c, "left"):np.searchsorted(sorted_lists, c, "right")]
+            for c in probes
+        ]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    # -- VectorStore API -------------------------------------------------
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.add_embeddings(texts, self._embedding.embed_documents(texts), metadatas=metadatas, ids=ids)
+
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: Any,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """Bulk upsert of precomputed vectors"""
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        metadatas = list(metadatas) if metadatas else [{} for _ in texts]
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+
+        with self._write_lock():
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+            start, end = self._count, self._count + len(texts)
+            self._reserve(end)
+            self._vectors[start:end] = vectors
+            self._vectors.flush()
+            self._assign[start:end] = self._nearest_centroids(vectors) if self._centroids is not None else -1
+            self._assign.flush()
+            self._encode(start, vectors)
+
+            replaced = self._live_rows(ids)
+            self._db.executemany(
+                "INSERT INTO rows (row, chunk_id, content, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (start + i, chunk_id, text, json.dumps(metadata or {}, default=str))
+                    for i, (chunk_id, text, metadata) in enumerate(zip(ids, texts, metadatas))
+                ],
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO live (chunk_id, row) VALUES (?, ?)",
+                [(chunk_id, start + i) for i, chunk_id in enumerate(ids)],
+            )
+            alive = np.zeros(end, dtype=bool)
+            alive[:start] = self._alive[:start]
+            alive[replaced] = False
+            alive[start:end] = True
+            # Later duplicates of an id within the batch replace earlier ones
+            if len(set(ids)) != len(ids):
+                last = {chunk_id: start + i for i, chunk_id in enumerate(ids)}
+                alive[start:end] = False
+                alive[list(last.values())] = True
+            self._alive = alive
+            self._count = end
+            self._lists = None
+            self._bump_version(dim=self._dim, count=end)
+
+        self._maybe_train()
+        return ids
+
+    def _live_rows(self, ids: List[str]) -> List[int]:
+        rows: List[int] = []
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            rows.extend(row for (row,) in self._db.execute(
+                f"SELECT row FROM live WHERE chunk_id IN ({','.join('?' * len(batch))})", batch
+            ))
+        return rows
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> None:
+        if not ids:
+            return
+        with self._write_lock():
+            rows = self._live_rows(list(ids))
+            self._db.executemany("DELETE FROM live WHERE chunk_id = ?", [(chunk_id,) for chunk_id in ids])
+            self._alive[rows] = False
+            self._bump_version()
+
+    def _approx_scorer(self, query: np.ndarray) -> Optional[Callable[[np.ndarray], np.ndarray]]:
+        """Scores from the quantized codes, or None when searching the float32 vectors directly"""
+        codes = self._codes
+        if self.quantization == "int8" and codes is not None:
+            scales = self._scales
+            return lambda rows: (np.asarray(codes[rows], dtype=np.float32) @ query) * scales[rows]
+        if self.quantization == "pq" and self._codebooks is not None and codes is not None:
+            subspaces, _, dsub = self._codebooks.shape
+            # Asymmetric distance: one lookup table of query/centroid products per subspace
+            table = np.einsum("mkd,md->mk", self._codebooks, query.reshape(subspaces, dsub))
+            columns = np.arange(subspaces)
+            return lambda rows: table[columns, np.asarray(codes[rows])].sum(axis=1)
+        return None
+
+    def _search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        self._refresh()
+        with self._lock:
+            vectors, alive, count = self._vectors, self._alive, self._count
+            candidates = self._candidate_rows(query) if vectors is not None else None
+            approx = self._approx_scorer(query) if vectors is not None else None
+        if vectors is None or count == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        def exact(rows: np.ndarray) -> np.ndarray:
+            return np.asarray(vectors[rows]) @ query
+
+        if candidates is not None:
+            candidates = np.sort(candidates[alive[candidates]])
+            blocks = (candidates[i:i + SCAN_BLOCK_ROWS] for i in range(0, len(candidates), SCAN_BLOCK_ROWS))
+        else:
+            blocks = (
+                np.arange(start, min(start + SCAN_BLOCK_ROWS, count))[alive[start:start + SCAN_BLOCK_ROWS]]
+                for start in range(0, count, SCAN_BLOCK_ROWS)
+            )
+
+        fetch = k * self.rescore_factor if approx is not None else k
+        best_rows, best_scores = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        for rows in blocks:
+            scores = (approx or exact)(rows)
+            best_rows, best_scores = _top_k(
+                np.concatenate([best_rows, rows]), np.concatenate([best_scores, scores]), fetch
+            )
+        if approx is None:
+            return best_rows, best_scores
+        # Re-score the shortlist with the full-precision vectors
+        best_rows = np.sort(best_rows)
+        return _top_k(best_rows, exact(best_rows), k)
+
+    def footprint(self) -> Dict[str, int]:
+        """Bytes of the float32 vectors and of the codes scanned per query"""
+        self._refresh()
+        dim = self._dim or 0
+        code_bytes = {"int8": dim + 4, "pq": self._pq_m or 0}.get(self.quantization, 0)
+        return {
+            "vectors": self._count,
+            "float32_bytes": self._count * dim * 4,
+            "code_bytes": self._count * code_bytes,
+            "scanned_bytes_per_vector": code_bytes or dim * 4,
+        }
+
+    def _documents(self, rows: np.ndarray) -> Dict[int, LCDocument]:
+        if len(rows) == 0:
+            return {}
+        found = self._db.execute(
+            f"SELECT row, chunk_id, content, metadata FROM rows WHERE row IN ({','.join('?' * len(rows))})",
+            [int(row) for row in rows],
+        )
+        return {
+            row: LCDocument(page_content=content, metadata=json.loads(metadata), id=chunk_id)
+            for row, chunk_id, content, metadata in found
+        }
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[LCDocument, float]]:
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        rows, scores = self._search(query, k)
+        documents = self._documents(rows)
+        return [(documents[int(row)], float(score)) for row, score in zip(rows, scores) if int(row) in documents]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[LCDocument, float]]:
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k=k)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[LCDocument]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k=k)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[LCDocument]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k)]
+
+    def _select_relevance_score_fn(self):
+        # Cosine similarity in [-1, 1] mapped to [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    def get(self, limit: Optional[int] = None, offset: int = 0, include: Optional[List[str]] = None) -> Dict[str, list]:
+        """Live chunks in insertion order, shaped like Chroma's get()"""
+        found = self._db.execute(
+            "SELECT r.chunk_id, r.content, r.metadata FROM live l JOIN rows r ON r.row = l.row "
+            "ORDER BY l.row LIMIT ? OFFSET ?",
+            (limit if limit is not None else -1, offset),
+        ).fetchall()
+        return {
+            "ids": [chunk_id for chunk_id, _, _ in found],
+            "documents": [content for _, content, _ in found],
+            "metadatas": [json.loads(metadata) for _, _, metadata in found],
+        }
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM live").fetchone()[0]
+
+    @classmethod
+    def from_texts(
+        cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, **kwargs: Any
+    ) -> "LocalVectorStore":
+        ids = kwargs.pop("ids", None)
+        store = cls(embedding_function=embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
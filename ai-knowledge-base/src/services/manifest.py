@@ -0,0 +1,126 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file's content, read in fixed-size chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def params_key(params: Dict[str, Any]) -> str:
+    """Stable short key for the chunking/embedding parameters"""
+    encoded = json.dumps(params, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def chunk_id_prefix(source: str, content_hash: str, key: str) -> str:
+    """Deterministic prefix for a file's chunk IDs, so re-writes upsert in place"""
+    return hashlib.sha1(f"{source}\0{content_hash}\0{key}".encode()).hexdigest()[:24]
+
+
+@dataclass
+class IngestPlan:
+    to_ingest: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    content_hashes: Dict[str, str] = field(default_factory=dict)
+    # Chunk IDs previously written for each changed or removed file
+    stale_chunk_ids: Dict[str, List[str]] = field(default_factory=dict)
+
+
+class IngestManifest:
+    """Persistent record of what has been ingested into the vector store.
+
+    Each entry is keyed by source path and stores the content hash, the
+    chunking parameters key and the chunk IDs written for that file, which is
+    enough to skip unchanged files and to remove the vectors of changed or
+    deleted ones.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = Path(path)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self._path.exists():
+            return
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f).get("files", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable ingest manifest {self._path}: {e}")
+            self._entries = {}
+
+    def save(self) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._path.parent, prefix=".manifest-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "files": self._entries}, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self._path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, source: str) -> Optional[Dict[str, Any]]:
+        return self._entries.get(source)
+
+    def plan(
+        self,
+        file_paths: List[str],
+        key: str,
+        content_hashes: Optional[Dict[str, str]] = None,
+        prune_missing: bool = True,
+    ) -> IngestPlan:
+        """Compare the given sources with the manifest.
+
+        Hashes are read from disk unless `content_hashes` provides them; with
+        `prune_missing=False`, sources absent from `file_paths` are kept.
+        """
+        plan = IngestPlan()
+        current = set(file_paths)
+
+        for source in file_paths:
+            content_hash = (content_hashes or {}).get(source) or hash_file(source)
+            plan.content_hashes[source] = content_hash
+            entry = self._entries.get(source)
+            if entry and entry.get("content_hash") == content_hash and entry.get("params_key") == key:
+                plan.unchanged.append(source)
+                continue
+            plan.to_ingest.append(source)
+            if entry:
+                plan.stale_chunk_ids[source] = entry.get("chunk_ids", [])
+
+        for source, entry in self._entries.items():
+            if prune_missing and source not in current:
+                plan.removed.append(source)
+                plan.stale_chunk_ids[source] = entry.get("chunk_ids", [])
+
+        return plan
+
+    def record(self, source: str, content_hash: str, key: str, chunk_ids: List[str]) -> None:
+        self._entries[source] = {
+            "content_hash": content_hash,
+            "params_key": key,
+            "chunk_ids": chunk_ids,
+            "ingested_at": time.time(),
+        }
+
+    def forget(self, source: str) -> None:
+        self._entries.pop(source, None)
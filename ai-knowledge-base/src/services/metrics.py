@@ -0,0 +1,307 @@
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers cache hits and local lookups up to multi-minute Docling conversions
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# (metric name, labels, value) reported by a collector at scrape time
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic count per label values"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. requests in progress"""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, *label_values: str) -> None:
+        self.inc(-amount, *label_values)
+
+
+class Histogram:
+    """Observations counted into fixed buckets per label values, with their sum and count.
+
+    Observing is a bisect and a few additions under a lock; cumulative
+    bucket counts are only built when the metrics are rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *label_values: str) -> "_Timer":
+        return _Timer(self, label_values)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        lines = []
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                labels = _format_labels((*self.labels, "le"), (*key, _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class _Timer:
+    """Context manager observing the time spent inside it; works in sync and async code"""
+
+    __slots__ = ("_histogram", "_labels", "_started")
+
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]) -> None:
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._histogram.observe(time.perf_counter() - self._started, *self._labels)
+
+
+class MetricsRegistry:
+    """Metrics of this process, rendered in the Prometheus text exposition format.
+
+    Counters, gauges and histograms are updated where the work happens.
+    Collectors are callables that report samples of statistics kept
+    elsewhere (cache hit counts, embedding requests, ...) at scrape time,
+    so those code paths pay nothing extra.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Any] = {}
+        self._collectors: Dict[str, Callable[[], Iterable[Sample]]] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls: type, name: str, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric '{name}' is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labels)
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labels)
+
+    def histogram(
+        self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labels, buckets)
+
+    def register_collector(self, name: str, collector: Callable[[], Iterable[Sample]]) -> None:
+        """Add (or replace) a collector; its samples are exposed as gauges"""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.items())
+
+        lines: List[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+
+        collected: Dict[str, List[str]] = {}
+        for collector_name, collector in collectors:
+            try:
+                samples = list(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector '{collector_name}' failed: {str(e)}")
+                continue
+            for name, labels, value in samples:
+                collected.setdefault(name, []).append(
+                    f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}"
+                )
+        for name, samples in collected.items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def stats_samples(prefix: str, stats: Dict[str, Any], label: Optional[str] = None) -> List[Sample]:
+    """Numeric entries of a stats dict as `<prefix>_<key>` samples.
+
+    With `label`, `stats` maps label values to such dicts, e.g. per-route
+    counters become `<prefix>_<key>{<label>="<route>"}`.
+    """
+    samples: List[Sample] = []
+    if label is not None:
+        for label_value, nested in stats.items():
+            samples.extend(
+                (name, {label: str(label_value), **labels}, value)
+                for name, labels, value in stats_samples(prefix, nested)
+            )
+        return samples
+    for key, value in stats.items():
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            samples.append((f"{prefix}_{key}", {}, float(value)))
+    return samples
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Process-wide metrics registry"""
+    return _registry
+
+
+HTTP_REQUEST_SECONDS = _registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency until the last body byte, by method, route template and status",
+    ("method", "route", "status"),
+)
+HTTP_REQUESTS_IN_PROGRESS = _registry.gauge("http_requests_in_progress", "HTTP requests being handled")
+STAGE_SECONDS = _registry.histogram(
+    "stage_duration_seconds",
+    "Time spent in a pipeline stage: upload_read, convert, split, embed, vector_search, bm25_search, retrieve, rerank, llm",
+    ("stage",),
+)
+LLM_TOKENS = _registry.counter(
+    "llm_tokens_total", "LLM tokens (about 4 characters each) by kind: prompt or completion", ("kind",)
+)
+
+
+def span(stage: str) -> _Timer:
+    """Time a block of work as `stage`: `with span("embed"): ...`"""
+    return STAGE_SECONDS.time(stage)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Record a stage duration measured elsewhere, e.g. in an ingestion worker process"""
+    STAGE_SECONDS.observe(seconds, stage)
+
+
+def count_llm_tokens(prompt_tokens: int, completion_tokens: int) -> None:
+    LLM_TOKENS.inc(prompt_tokens, "prompt")
+    LLM_TOKENS.inc(completion_tokens, "completion")
+
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """Path template of the route that handled a request, so `/validate/abc` counts as `/validate/{doc_id}`"""
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    path = scope.get("path", "")
+    try:
+        matched = getattr(route, "path_format", template).format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    # Routes of included routers may only know the part of the path after their prefix
+    if matched != path and path.endswith(matched):
+        return path[:len(path) - len(matched)] + template
+    return template
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording the latency of every HTTP request by route template.
+
+    Streaming responses are timed until their last chunk is sent.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started, scope["method"], route_template(scope), str(status)
+            )
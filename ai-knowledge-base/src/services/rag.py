@@ -0,0 +1,87 @@
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+import asyncio
+
+from langchain_core.documents import Document as LCDocument
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import Runnable, RunnableGenerator, RunnablePassthrough
+
+from src.services.context_packer import estimate_tokens, pack_context
+from src.services.metrics import count_llm_tokens, span
+from src.services.response_cache import ResponseCache, llm_params
+
+RAG_PROMPT = PromptTemplate.from_template("""
+You are a helpful AI assistant that answers questions based on provided documents. 
+
+Here is the relevant information from the documents:
+{context}
+
+Based on the information above, please answer the following question. If the answer is not found in the provided context, please say so clearly. Be specific and cite relevant details when possible.
+
+Question: {question}
+
+Answer: """)
+
+
+def format_docs(docs: Iterable[LCDocument]) -> str:
+    """Retrieved chunks packed into the CONTEXT_MAX_TOKENS budget"""
+    return pack_context(docs).text
+
+
+def build_rag_chain(retriever: Runnable, llm: Runnable, cache: Optional[ResponseCache] = None) -> Runnable:
+    """Question-answering chain; supports .invoke() as well as .stream()/.astream()
+
+    With a `cache`, answers are looked up by prompt, retrieved chunk IDs and
+    model parameters before Gemini is called, and stored afterwards.
+    """
+    answer_chain = RAG_PROMPT | llm | StrOutputParser()
+    if cache is None:
+        return {"context": retriever | format_docs, "question": RunnablePassthrough()} | answer_chain
+
+    params = llm_params(llm)
+
+    def prepare(inputs: Dict[str, Any]) -> Tuple[str, str, str, List[str]]:
+        packed = pack_context(inputs["docs"])
+        prompt = RAG_PROMPT.format(context=packed.text, question=inputs["question"])
+        return prompt, packed.text, inputs["question"], packed.chunk_ids
+
+    def answer(chunks: Iterator[Dict[str, Any]]) -> Iterator[str]:
+        inputs: Dict[str, Any] = {}
+        for chunk in chunks:
+            inputs.update(chunk)
+        prompt, context, question, ids = prepare(inputs)
+
+        hit = cache.lookup(prompt, ids, params, semantic_text=question)
+        if hit is not None:
+            yield hit.value
+            return
+
+        parts = []
+        with span("llm"):
+            for token in answer_chain.stream({"context": context, "question": question}):
+                parts.append(token)
+                yield token
+        count_llm_tokens(estimate_tokens(prompt), estimate_tokens("".join(parts)))
+        cache.store(prompt, ids, params, "".join(parts), semantic_text=question)
+
+    async def aanswer(chunks: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+        inputs: Dict[str, Any] = {}
+        async for chunk in chunks:
+            inputs.update(chunk)
+        prompt, context, question, ids = prepare(inputs)
+
+        # The semantic tier embeds the question, which must not block the event loop
+        hit = await asyncio.to_thread(cache.lookup, prompt, ids, params, semantic_text=question)
+        if hit is not None:
+            yield hit.value
+            return
+
+        parts = []
+        with span("llm"):
+            async for token in answer_chain.astream({"context": context, "question": question}):
+                parts.append(token)
+                yield token
+        count_llm_tokens(estimate_tokens(prompt), estimate_tokens("".join(parts)))
+        await asyncio.to_thread(cache.store, prompt, ids, params, "".join(parts), semantic_text=question)
+
+    return {"docs": retriever, "question": RunnablePassthrough()} | RunnableGenerator(answer, aanswer)
@@ -0,0 +1,232 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document as LCDocument
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from src.services.metrics import get_metrics, span, stats_samples
+
+logger = logging.getLogger(__name__)
+
+# Reranking runs here so a request can stop waiting for it at its deadline
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="reranker")
+
+
+class RerankBudgetExceeded(Exception):
+    """Raised when reranking runs past its per-request latency budget"""
+
+
+def _check_deadline(deadline: Optional[float]) -> None:
+    if deadline is not None and time.monotonic() > deadline:
+        raise RerankBudgetExceeded()
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _normalize(scores: List[float]) -> List[float]:
+    low, high = min(scores), max(scores)
+    if high == low:
+        return [1.0 for _ in scores]
+    return [(score - low) / (high - low) for score in scores]
+
+
+class CrossEncoderScorer:
+    """Local CPU cross-encoder (sentence-transformers) scoring query/chunk pairs in batches"""
+
+    def __init__(self, model_name: str, batch_size: int = 16, max_length: int = 512) -> None:
+        from sentence_transformers import CrossEncoder
+        self.model = CrossEncoder(model_name, device="cpu", max_length=max_length)
+        self.batch_size = batch_size
+
+    def score(self, query: str, docs: Sequence[LCDocument], deadline: Optional[float] = None) -> List[float]:
+        scores: List[float] = []
+        for start in range(0, len(docs), self.batch_size):
+            _check_deadline(deadline)
+            pairs = [(query, doc.page_content) for doc in docs[start:start + self.batch_size]]
+            scores.extend(float(score) for score in self.model.predict(pairs, batch_size=self.batch_size))
+        return scores
+
+
+def mmr_select(
+    doc_vectors: Sequence[Sequence[float]],
+    relevance: Sequence[float],
+    top_n: int,
+    lambda_mult: float = 0.7,
+    duplicate_threshold: float = 0.95,
+) -> List[int]:
+    """Greedy maximal marginal relevance over precomputed relevance scores.
+
+    Each step picks the candidate maximising
+    lambda * relevance - (1 - lambda) * max similarity to already selected ones.
+    Candidates at least `duplicate_threshold` similar to a selected chunk are
+    dropped outright.
+    """
+    remaining = list(range(len(doc_vectors)))
+    selected: List[int] = []
+    similarity: Dict[tuple, float] = {}
+    while remaining and len(selected) < top_n:
+        best, best_score = None, -math.inf
+        for i in list(remaining):
+            redundancy = 0.0
+            for j in selected:
+                key = (min(i, j), max(i, j))
+                if key not in similarity:
+                    similarity[key] = _cosine(doc_vectors[i], doc_vectors[j])
+                redundancy = max(redundancy, similarity[key])
+            if redundancy >= duplicate_threshold:
+                remaining.remove(i)
+                continue
+            score = lambda_mult * relevance[i] - (1 - lambda_mult) * redundancy
+            if score > best_score:
+                best, best_score = i, score
+        if best is None:
+            break
+        selected.append(best)
+        remaining.remove(best)
+    return selected
+
+
+class Reranker:
+    """Rerank retrieved chunks: optional cross-encoder scoring, then MMR deduplication.
+
+    Without a cross-encoder the retriever's order is the relevance signal and
+    only MMR is applied. The whole stage must finish within `budget_seconds`;
+    if it does not, or it fails, the first `top_n` chunks are returned in
+    their original order as soon as the budget is spent. The abandoned run
+    stops at its next deadline check (between scoring batches).
+    """
+
+    def __init__(
+        self,
+        embeddings: Optional[Embeddings] = None,
+        scorer: Optional[CrossEncoderScorer] = None,
+        top_n: int = 4,
+        lambda_mult: float = 0.7,
+        budget_seconds: Optional[float] = 0.25,
+    ) -> None:
+        self.embeddings = embeddings
+        self.scorer = scorer
+        self.top_n = top_n
+        self.lambda_mult = lambda_mult
+        self.budget_seconds = budget_seconds
+        self.stats = {"requests": 0, "fallbacks": 0, "candidates": 0, "selected": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, **amounts: int) -> None:
+        with self._stats_lock:
+            for key, amount in amounts.items():
+                self.stats[key] += amount
+
+    def _rerank(self, query: str, docs: List[LCDocument], deadline: Optional[float]) -> Tuple[List[int], List[float]]:
+        """Indices of the chunks to keep, best first, and the relevance of every chunk"""
+        # Runs queued behind others may already be too late
+        _check_deadline(deadline)
+        if self.scorer is not None:
+            relevance = _normalize(self.scorer.score(query, docs, deadline))
+        else:
+            relevance = [1.0 - rank / len(docs) for rank in range(len(docs))]
+
+        if self.embeddings is None or self.lambda_mult >= 1.0:
+            order = sorted(range(len(docs)), key=lambda i: relevance[i], reverse=True)[:self.top_n]
+        else:
+            _check_deadline(deadline)
+            # Chunks were embedded at ingest time, so these are normally cache hits
+            doc_vectors = self.embeddings.embed_documents([doc.page_content for doc in docs])
+            _check_deadline(deadline)
+            order = mmr_select(doc_vectors, relevance, self.top_n, self.lambda_mult)
+        return order, relevance
+
+    def rerank(self, query: str, docs: List[LCDocument]) -> List[LCDocument]:
+        if len(docs) <= 1:
+            return docs
+        with span("rerank"):
+            return self._rerank_within_budget(query, docs)
+
+    def _rerank_within_budget(self, query: str, docs: List[LCDocument]) -> List[LCDocument]:
+        started = time.monotonic()
+        deadline = started + self.budget_seconds if self.budget_seconds else None
+        future = _executor.submit(self._rerank, query, docs, deadline)
+        try:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, _ = wait([future], timeout=remaining)
+            if not done:
+                future.cancel()
+                raise RerankBudgetExceeded()
+            order, relevance = future.result()
+            for i in order:
+                docs[i].metadata["rerank_score"] = round(relevance[i], 4)
+            self._count(requests=1, candidates=len(docs), selected=len(order))
+            return [docs[i] for i in order]
+        except Exception as e:
+            reason = "latency budget exceeded" if isinstance(e, RerankBudgetExceeded) else str(e)
+            logger.warning(f"Reranking skipped after {time.monotonic() - started:.3f}s ({reason}); using retriever order")
+            self._count(requests=1, fallbacks=1, candidates=len(docs), selected=min(len(docs), self.top_n))
+            return docs[:self.top_n]
+
+
+class RerankingRetriever(BaseRetriever):
+    """Fetches candidates from `base_retriever` and passes them through a Reranker"""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    base_retriever: BaseRetriever
+    reranker: Any
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[LCDocument]:
+        docs = self.base_retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        return self.reranker.rerank(query, docs)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[LCDocument]:
+        docs = await self.base_retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
+        # Scoring is CPU-bound; keep it off the event loop
+        return await asyncio.to_thread(self.reranker.rerank, query, docs)
+
+
+_reranker: Optional[Reranker] = None
+_reranker_lock = threading.Lock()
+
+
+def get_reranker() -> Optional[Reranker]:
+    """Process-wide reranker selected by RERANKER: "mmr" (default), "cross-encoder" or "none" """
+    global _reranker
+    mode = os.environ.get("RERANKER", "mmr").lower()
+    if mode == "none":
+        return None
+    if _reranker is None:
+        with _reranker_lock:
+            if _reranker is None:
+                from src.services.embeddings import get_embeddings
+                scorer = None
+                if mode == "cross-encoder":
+                    scorer = CrossEncoderScorer(
+                        os.environ.get("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+                        batch_size=int(os.environ.get("RERANKER_BATCH_SIZE", "16")),
+                    )
+                elif mode != "mmr":
+                    raise ValueError(f"Unknown reranker '{mode}'. Available: mmr, cross-encoder, none")
+                budget_ms = float(os.environ.get("RERANK_BUDGET_MS", "250"))
+                _reranker = Reranker(
+                    embeddings=get_embeddings(),
+                    scorer=scorer,
+                    top_n=int(os.environ.get("RERANK_TOP_N", "4")),
+                    lambda_mult=float(os.environ.get("RERANK_MMR_LAMBDA", "0.7")),
+                    budget_seconds=budget_ms / 1000 if budget_ms > 0 else None,
+                )
+                reranker = _reranker
+                get_metrics().register_collector("reranker", lambda: stats_samples("reranker", dict(reranker.stats)))
+    return _reranker
@@ -0,0 +1,306 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Set, Tuple
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+import weakref
+
+from langchain_core.embeddings import Embeddings
+
+from src.services.metrics import get_metrics, stats_samples
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so cosmetic differences still hit the exact tier"""
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+class ChangeFeed(Protocol):
+    """Source of replaced or deleted chunk ids, such as a BM25Index"""
+
+    def change_seq(self) -> int:
+        ...
+
+    def changes_since(self, seq: int) -> Tuple[int, Optional[List[str]]]:
+        ...
+
+
+def llm_params(llm: Any) -> Dict[str, Any]:
+    """Model parameters that change the output and therefore belong in the cache key"""
+    params = dict(getattr(llm, "_identifying_params", {}) or {})
+    params["class"] = type(llm).__name__
+    return params
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+@dataclass
+class CacheHit:
+    value: str
+    tier: str  # "exact" or "semantic"
+    similarity: float = 1.0
+
+
+@dataclass
+class _Entry:
+    value: str
+    namespace: str
+    context_ids: Set[str]
+    created_at: float
+    vector: Optional[List[float]] = None
+
+
+@dataclass
+class CacheMetrics:
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.exact_hits + self.semantic_hits) / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+class ResponseCache:
+    """Two-tier cache for LLM responses.
+
+    The exact tier is keyed on the normalized prompt, the IDs of the retrieved
+    context chunks and the model parameters. The optional semantic tier embeds
+    the prompt and returns a stored response whose prompt is at least
+    `similarity_threshold` cosine-similar, but only among entries built from
+    the same context chunks and model parameters. Entries expire after
+    `ttl_seconds`, the least recently used ones are evicted beyond
+    `max_entries`, and `invalidate_documents` drops every entry that used a
+    changed or deleted chunk. Stores written by other processes are followed
+    through their change feeds (`watch`), which are read on every lookup.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = 3600.0,
+        embeddings: Optional[Embeddings] = None,
+        similarity_threshold: Optional[float] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.metrics = CacheMetrics()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._by_document: Dict[str, Set[str]] = {}
+        self._feeds: "weakref.WeakKeyDictionary[ChangeFeed, int]" = weakref.WeakKeyDictionary()
+        self._lock = threading.RLock()
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.embeddings is not None and self.similarity_threshold is not None
+
+    @staticmethod
+    def _namespace(context_ids: Iterable[str], params: Dict[str, Any]) -> str:
+        return _digest({"context": sorted(context_ids), "params": params})
+
+    @staticmethod
+    def _key(prompt: str, namespace: str) -> str:
+        return _digest({"prompt": normalize_prompt(prompt), "namespace": namespace})
+
+    def _embed(self, text: str) -> Optional[List[float]]:
+        try:
+            vector = self.embeddings.embed_query(normalize_prompt(text))
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed: {str(e)}")
+            return None
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return self.ttl_seconds is not None and now - entry.created_at > self.ttl_seconds
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for doc_id in entry.context_ids:
+            keys = self._by_document.get(doc_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_document[doc_id]
+
+    def watch(self, feed: ChangeFeed) -> None:
+        """Invalidate entries whose chunks `feed` reports as replaced or deleted from now on"""
+        latest = feed.change_seq()
+        with self._lock:
+            self._feeds.setdefault(feed, latest)
+
+    def _sync(self) -> None:
+        with self._lock:
+            feeds = list(self._feeds.items())
+        for feed, seq in feeds:
+            try:
+                latest, doc_ids = feed.changes_since(seq)
+            except Exception as e:
+                logger.warning(f"Response cache could not read a change feed: {str(e)}")
+                continue
+            if latest == seq:
+                continue
+            if doc_ids is None:
+                self.clear()
+            else:
+                self.invalidate_documents(doc_ids)
+            with self._lock:
+                self._feeds[feed] = latest
+
+    def lookup(
+        self,
+        prompt: str,
+        context_ids: Iterable[str],
+        params: Dict[str, Any],
+        semantic_text: Optional[str] = None,
+    ) -> Optional[CacheHit]:
+        context_ids = set(context_ids)
+        namespace = self._namespace(context_ids, params)
+        key = self._key(prompt, namespace)
+        now = time.time()
+        self._sync()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._expired(entry, now):
+                    self._remove(key)
+                    self.metrics.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.metrics.exact_hits += 1
+                    return CacheHit(entry.value, "exact")
+
+            if not self.semantic_enabled:
+                self.metrics.misses += 1
+                return None
+
+        vector = self._embed(semantic_text or prompt)
+        if vector is None:
+            with self._lock:
+                self.metrics.misses += 1
+            return None
+
+        with self._lock:
+            best_key, best_score = None, -1.0
+            for candidate_key, candidate in list(self._entries.items()):
+                if candidate.namespace != namespace or candidate.vector is None:
+                    continue
+                if self._expired(candidate, now):
+                    self._remove(candidate_key)
+                    self.metrics.expirations += 1
+                    continue
+                score = sum(a * b for a, b in zip(vector, candidate.vector))
+                if score > best_score:
+                    best_key, best_score = candidate_key, score
+
+            if best_key is not None and best_score >= self.similarity_threshold:
+                self._entries.move_to_end(best_key)
+                self.metrics.semantic_hits += 1
+                return CacheHit(self._entries[best_key].value, "semantic", best_score)
+
+            self.metrics.misses += 1
+            return None
+
+    def store(
+        self,
+        prompt: str,
+        context_ids: Iterable[str],
+        params: Dict[str, Any],
+        value: str,
+        semantic_text: Optional[str] = None,
+    ) -> None:
+        context_ids = set(context_ids)
+        namespace = self._namespace(context_ids, params)
+        key = self._key(prompt, namespace)
+        vector = self._embed(semantic_text or prompt) if self.semantic_enabled else None
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = _Entry(value, namespace, context_ids, time.time(), vector)
+            for doc_id in context_ids:
+                self._by_document.setdefault(doc_id, set()).add(key)
+            self.metrics.stores += 1
+
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.metrics.evictions += 1
+
+    def invalidate_documents(self, doc_ids: Iterable[str]) -> int:
+        """Drop every cached response that was generated from any of `doc_ids`"""
+        removed = 0
+        with self._lock:
+            for doc_id in doc_ids:
+                for key in list(self._by_document.get(doc_id, ())):
+                    self._remove(key)
+                    removed += 1
+            self.metrics.invalidations += removed
+        if removed:
+            logger.info(f"Response cache invalidated {removed} entr{'y' if removed == 1 else 'ies'}")
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self.metrics.invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_document.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide response cache configured from RESPONSE_CACHE_* variables"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                threshold = os.environ.get("RESPONSE_CACHE_SEMANTIC_THRESHOLD")
+                ttl = os.environ.get("RESPONSE_CACHE_TTL_SECONDS", "3600")
+                embeddings = None
+                if threshold:
+                    from src.services.embeddings import get_embeddings
+                    embeddings = get_embeddings()
+                _cache = ResponseCache(
+                    max_entries=int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "1024")),
+                    ttl_seconds=float(ttl) if ttl else None,
+                    embeddings=embeddings,
+                    similarity_threshold=float(threshold) if threshold else None,
+                )
+                cache = _cache
+                get_metrics().register_collector(
+                    "response_cache", lambda: stats_samples("response_cache", cache.metrics.as_dict())
+                )
+    return _cache
@@ -0,0 +1,52 @@
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+import asyncio
+import json
+import logging
+
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(data: Any, event: Optional[str] = None) -> str:
+    """Encode one Server-Sent Event"""
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    payload = json.dumps(data, default=str)
+    lines.extend(f"data: {line}" for line in payload.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+def sse_response(
+    events: AsyncIterator[Tuple[str, Dict[str, Any]]],
+    finalize: Callable[[Dict[str, Any]], Dict[str, Any]],
+) -> StreamingResponse:
+    """Stream generation events as SSE.
+
+    The closing `document` event is passed through `finalize` and sent as the
+    final `done` event. If the client disconnects, Starlette cancels this
+    stream and `events` is closed, which stops the upstream LLM call.
+    """
+
+    async def body() -> AsyncIterator[str]:
+        try:
+            async with aclosing(events) as stream:
+                async for event, data in stream:
+                    if event == "document":
+                        yield format_sse(finalize(data), event="done")
+                    else:
+                        yield format_sse(data, event=event)
+        except asyncio.CancelledError:
+            logger.info("Client disconnected, generation stream cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Error while streaming generation: {str(e)}")
+            yield format_sse({"detail": f"Generation failed: {str(e)}"}, event="error")
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,431 @@
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+import codecs
+import io
+import json
+import logging
+import os
+import re
+
+from langchain_core.documents import Document as LCDocument
+
+from src.services.context_packer import estimate_tokens, text_units
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("vtt", "srt", "json", "text")
+
+_READ_SIZE = 1 << 16
+# SRT/VTT text is parsed in pieces of about this many characters, cut at blank lines
+_WINDOW_SIZE = 1 << 20
+
+_CUE_TIME = r"(?:(\d+):)?(\d{1,2}):(\d{2})(?:[.,](\d{1,3}))?"
+# A cue block: a blank line, an optional identifier, the timing line and the non-blank lines under it.
+# Header/NOTE/STYLE blocks never match, and starting with a literal newline lets the regex engine skip
+# ahead instead of trying every position.
+_CUE = re.compile(
+    rf"\n[^\S\n]*\n(?:(?:(?!-->)[^\n])*\n)?[^\S\n]*{_CUE_TIME}[^\S\n]+-->[^\S\n]+{_CUE_TIME}[^\n]*"
+    r"(?:\n([^\S\n]*\S[^\n]*(?:\n[^\S\n]*\S[^\n]*)*))?"
+)
+# Timestamp fields by their digits, so each cue is converted with dict lookups instead of int() calls
+_CLOCK = {"": 0, **{str(n): n for n in range(10)}, **{f"{n:02d}": n for n in range(100)}}
+_FRACTION = {"": 0.0, **{f"{n:0{width}d}": n / 10 ** width for width in (1, 2, 3) for n in range(10 ** width)}}
+# "MM:SS" of every second of an hour; every rendered transcript line carries a timestamp
+_MINUTES_SECONDS = [f"{n // 60:02d}:{n % 60:02d}" for n in range(3600)]
+_TAG = re.compile(r"<[^>]*>")
+_VOICE = re.compile(r"<v(?:\.[^ >]*)?\s+([^>]+)>")
+# "Alice: ...", "Bob Smith (PM): ..."; short names only, so ordinary sentences with a colon are left alone
+_SPEAKER_PREFIX = re.compile(r"^([A-Za-z][\w.'() -]{0,40}?):\s+(.*)$")
+# Plain-text exports: "[00:01:02] Alice: ...", "00:01:02 Alice: ...", "Alice (00:01:02): ..." and
+# Otter's "Alice  0:01" header line followed by the paragraph
+_TEXT_TIMESTAMP = re.compile(r"^\[?(\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d+)?)\]?\s+(.*)$")
+_SPEAKER_TIMESTAMP = re.compile(r"^([A-Za-z][\w.' -]{0,40}?)\s+(\()?(\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d+)?)\)?:?\s*(.*)$")
+# Keys under which JSON transcript exports keep their segment list
+_SEGMENT_KEYS = re.compile(r'"(?:segments|utterances|entries|results|monologues|transcript|turns)"\s*:\s*\[')
+
+
+@dataclass
+class Turn:
+    """One timestamped utterance; `start`/`end` are seconds from the start of the recording"""
+    text: str
+    speaker: Optional[str] = None
+    start: Optional[float] = None
+    end: Optional[float] = None
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    """Seconds from "HH:MM:SS,mmm", "MM:SS.mmm" or a plain number"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().replace(",", ".")
+    try:
+        seconds = 0.0
+        for part in text.split(":"):
+            seconds = seconds * 60 + float(part)
+        return seconds
+    except ValueError:
+        return None
+
+
+def format_timestamp(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return ""
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{_MINUTES_SECONDS[seconds % 3600]}"
+
+
+def _split_speaker(text: str, speaker: Optional[str]) -> Tuple[Optional[str], str]:
+    if speaker is None and ":" in text:
+        match = _SPEAKER_PREFIX.match(text)
+        if match:
+            return match.group(1).strip(), match.group(2)
+    return speaker, text
+
+
+def _decoded_lines(stream: BinaryIO) -> Iterator[str]:
+    """Lines of a UTF-8 (optionally BOM-prefixed) byte stream, without line endings"""
+    reader = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace")
+    try:
+        for line in reader:
+            yield line.rstrip("\n")
+    finally:
+        # Leave the caller's stream open
+        reader.detach()
+
+
+def _iter_windows(stream: BinaryIO) -> Iterator[str]:
+    """Text of a UTF-8 (optionally BOM-prefixed) byte stream in large pieces that end at a blank line"""
+    reader = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace")
+    try:
+        pending = ""
+        while True:
+            more = reader.read(_WINDOW_SIZE)
+            if not more:
+                break
+            pending += more
+            cut = pending.rfind("\n\n")
+            if cut >= 0:
+                yield pending[:cut + 1]
+                pending = pending[cut + 2:]
+        if pending.strip():
+            yield pending
+    finally:
+        # Leave the caller's stream open
+        reader.detach()
+
+
+def _iter_cues(windows: Iterator[str]) -> Iterator[Turn]:
+    """SRT and WebVTT cues: an optional identifier, a timing line, then the cue text.
+
+    Blocks without a timing line (the WEBVTT header, NOTE, STYLE and REGION
+    blocks) are skipped.
+    """
+    for window in windows:
+        # This loop runs once per cue (100k for an hour-long call), so the timestamps are converted inline
+        for start_h, start_m, start_s, start_f, end_h, end_m, end_s, end_f, body in _CUE.findall("\n\n" + window):
+            cue = _cue_text(body)
+            if cue is None:
+                continue
+            yield Turn(
+                cue[1],
+                cue[0],
+                (_CLOCK[start_h] if start_h in _CLOCK else int(start_h)) * 3600
+                + _CLOCK[start_m] * 60 + _CLOCK[start_s] + _FRACTION[start_f],
+                (_CLOCK[end_h] if end_h in _CLOCK else int(end_h)) * 3600
+                + _CLOCK[end_m] * 60 + _CLOCK[end_s] + _FRACTION[end_f],
+            )
+
+
+def _cue_text(body: str) -> Optional[Tuple[Optional[str], str]]:
+    """Speaker and text of a cue body, with line breaks and markup removed"""
+    text = body.strip()
+    if "\n" in text:
+        text = " ".join(line.strip() for line in text.split("\n"))
+    speaker = None
+    if "<" in text:
+        # The common "<v Name>text</v>" cue without a regex; anything else goes through _VOICE/_TAG
+        if text.startswith("<v ") and text.endswith("</v>") and text.count("<") == 2:
+            close = text.find(">")
+            speaker, text = text[3:close].strip(), text[close + 1:-4].strip()
+        else:
+            voice = _VOICE.search(text)
+            if voice:
+                speaker = voice.group(1).strip()
+            text = _TAG.sub("", text).strip()
+    if not text:
+        return None
+    return _split_speaker(text, speaker)
+
+
+def _iter_text(lines: Iterator[str]) -> Iterator[Turn]:
+    """Plain-text transcripts: "[timestamp] Speaker: text" lines, otherwise paragraphs"""
+    current: Optional[Turn] = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            # A header line keeps its turn open until the paragraph under it
+            if current is not None and current.text:
+                yield current
+                current = None
+            continue
+
+        start = None
+        match = _TEXT_TIMESTAMP.match(line)
+        if match:
+            start, line = parse_timestamp(match.group(1)), match.group(2)
+        else:
+            match = _SPEAKER_TIMESTAMP.match(line)
+            if match and (match.group(2) or not match.group(4)):
+                start, line = parse_timestamp(match.group(3)), f"{match.group(1)}: {match.group(4)}"
+        speaker, body = _split_speaker(line, None)
+
+        if speaker is None and start is None and current is not None:
+            current.text = f"{current.text} {body}".strip()
+            continue
+        if current is not None and current.text:
+            yield current
+        current = Turn(text=body, speaker=speaker, start=start)
+    if current is not None and current.text:
+        yield current
+
+
+def _first_value(record: Dict[str, Any], keys: Tuple[str, ...]) -> Any:
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def json_turn(record: Any) -> Optional[Turn]:
+    """Turn from one segment of a JSON export (Whisper, Otter, Zoom and similar field names)"""
+    if not isinstance(record, dict):
+        return None
+    text = _first_value(record, ("text", "transcript", "content", "sentence", "words"))
+    if isinstance(text, list):
+        text = " ".join(
+            str(word.get("text") or word.get("word") or "") if isinstance(word, dict) else str(word) for word in text
+        )
+    if not text or not str(text).strip():
+        return None
+    speaker = _first_value(record, ("speaker", "speaker_name", "speakerName", "participant", "name", "speaker_label"))
+    if isinstance(speaker, dict):
+        speaker = speaker.get("name") or speaker.get("id")
+    return Turn(
+        text=" ".join(str(text).split()),
+        speaker=str(speaker) if speaker is not None else None,
+        start=parse_timestamp(_first_value(record, ("start", "start_time", "startTime", "begin", "timestamp"))),
+        end=parse_timestamp(_first_value(record, ("end", "end_time", "endTime", "stop"))),
+    )
+
+
+class _JsonArrayReader:
+    """Decode the items of a JSON array one at a time from a text stream"""
+
+    def __init__(self, reader: io.TextIOBase, buffer: str, pos: int) -> None:
+        self._reader = reader
+        self._buffer = buffer
+        self._pos = pos
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        more = self._reader.read(_READ_SIZE)
+        if not more:
+            return False
+        self._buffer = self._buffer[self._pos:] + more
+        self._pos = 0
+        return True
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            while True:
+                while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n,":
+                    self._pos += 1
+                if self._pos < len(self._buffer) or not self._fill():
+                    break
+            if self._pos >= len(self._buffer) or self._buffer[self._pos] == "]":
+                return
+            try:
+                item, self._pos = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # The item continues past the buffered text
+                if not self._fill():
+                    raise
+                continue
+            yield item
+
+
+def _iter_json(stream: BinaryIO) -> Iterator[Turn]:
+    """JSON transcripts: a top-level segment array, an object with a segment list, or JSON lines"""
+    reader = codecs.getreader("utf-8-sig")(stream, errors="replace")
+    buffer = reader.read(_READ_SIZE)
+    stripped = buffer.lstrip()
+
+    if stripped.startswith("["):
+        records: Iterable[Any] = _JsonArrayReader(reader, stripped, 1)
+    elif stripped.startswith("{") and "\n" in stripped and _is_json_object(stripped.split("\n", 1)[0]):
+        records = (json.loads(line) for line in _json_lines(buffer, reader) if line.strip())
+    else:
+        # An object: stream the first segment list, reading ahead until its key shows up
+        match = _SEGMENT_KEYS.search(buffer)
+        while match is None:
+            more = reader.read(_READ_SIZE)
+            if not more:
+                break
+            buffer += more
+            match = _SEGMENT_KEYS.search(buffer)
+        if match is not None:
+            records = _JsonArrayReader(reader, buffer, match.end())
+        else:
+            records = [json.loads(buffer)] if buffer.strip() else []
+
+    for record in records:
+        turn = json_turn(record)
+        if turn is not None:
+            yield turn
+
+
+def _is_json_object(line: str) -> bool:
+    try:
+        return isinstance(json.loads(line), dict)
+    except json.JSONDecodeError:
+        return False
+
+
+def _json_lines(buffer: str, reader: io.TextIOBase) -> Iterator[str]:
+    pending = buffer
+    while True:
+        *lines, pending = pending.split("\n")
+        yield from lines
+        more = reader.read(_READ_SIZE)
+        if not more:
+            break
+        pending += more
+    yield pending
+
+
+def transcript_format(filename: str = "", content_type: str = "", head: bytes = b"") -> str:
+    """Detect the transcript format from the extension, the content type or the first bytes"""
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension in (".vtt", ".srt", ".json"):
+        return extension[1:]
+    content_type = (content_type or "").lower()
+    if "vtt" in content_type:
+        return "vtt"
+    if "srt" in content_type or "subrip" in content_type:
+        return "srt"
+    if "json" in content_type:
+        return "json"
+    head = head.lstrip(b"\xef\xbb\xbf").lstrip()
+    if head.startswith(b"WEBVTT"):
+        return "vtt"
+    if head[:1] in (b"[", b"{"):
+        return "json"
+    if b"-->" in head.split(b"\n\n", 1)[0]:
+        return "srt"
+    return "text"
+
+
+def iter_turns(stream: BinaryIO, fmt: str) -> Iterator[Turn]:
+    """Stream the speaker turns of a binary transcript file; only the current cue or segment is held in memory"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown transcript format '{fmt}'. Available: {', '.join(FORMATS)}")
+    if fmt == "json":
+        return _iter_json(stream)
+    if fmt == "text":
+        return _iter_text(_decoded_lines(stream))
+    return _iter_cues(_iter_windows(stream))
+
+
+@dataclass
+class _Line:
+    """Consecutive turns of one speaker within a chunk; the texts are joined when the chunk is rendered"""
+    speaker: Optional[str]
+    start: Optional[float]
+    end: Optional[float]
+    texts: List[str]
+
+
+class TranscriptChunker:
+    """Merge speaker turns into time- and token-bounded chunks.
+
+    Consecutive turns of one speaker (captions split a sentence over several
+    cues) are joined into one line prefixed with the speaker and start time.
+    A chunk is closed before it would exceed `max_tokens` or span more than
+    `max_seconds` of the recording; a single turn above the token budget is
+    split at sentence boundaries. Chunks carry the start/end time and the
+    speakers as metadata and are yielded as soon as they are complete.
+    """
+
+    def __init__(self, max_tokens: int = 300, max_seconds: float = 180.0) -> None:
+        self.max_tokens = max_tokens
+        self.max_seconds = max_seconds
+
+    def _pieces(self, turn: Turn) -> Iterator[Tuple[Turn, int]]:
+        """A turn above the token budget in sentence-aligned parts, each with its token estimate"""
+        part: List[str] = []
+        used = 0
+        for unit in text_units(turn.text):
+            cost = estimate_tokens(unit)
+            if part and used + cost > self.max_tokens:
+                piece = Turn(text="".join(part).strip(), speaker=turn.speaker, start=turn.start, end=turn.end)
+                yield piece, estimate_tokens(piece.text)
+                part, used = [], 0
+            part.append(unit)
+            used += cost
+        if part:
+            piece = Turn(text="".join(part).strip(), speaker=turn.speaker, start=turn.start, end=turn.end)
+            yield piece, estimate_tokens(piece.text)
+
+    def _make_chunk(self, lines: List[_Line], metadata: Dict[str, Any]) -> LCDocument:
+        starts = [line.start for line in lines if line.start is not None]
+        ends = [value for line in lines for value in (line.end, line.start) if value is not None]
+        speakers = list(dict.fromkeys(line.speaker for line in lines if line.speaker))
+        content = "\n".join([_render(line.speaker, line.start, " ".join(line.texts)) for line in lines])
+        chunk_metadata = {**metadata, "speakers": ", ".join(speakers), "turns": len(lines)}
+        if starts:
+            chunk_metadata.update(start_seconds=min(starts), timestamp=format_timestamp(min(starts)))
+        if ends:
+            chunk_metadata["end_seconds"] = max(ends)
+        return LCDocument(page_content=content, metadata=chunk_metadata)
+
+    def chunk(self, turns: Iterable[Turn], metadata: Optional[Dict[str, Any]] = None) -> Iterator[LCDocument]:
+        metadata = metadata or {}
+        max_tokens, max_seconds = self.max_tokens, self.max_seconds
+        lines: List[_Line] = []
+        last: Optional[_Line] = None
+        used = 0
+        chunk_start: Optional[float] = None
+
+        for turn in turns:
+            cost = estimate_tokens(turn.text)
+            for piece, cost in ((turn, cost),) if cost <= max_tokens else self._pieces(turn):
+                start = piece.start
+                too_long = chunk_start is not None and start is not None and start - chunk_start > max_seconds
+                if last is not None and (used + cost > max_tokens or too_long):
+                    yield self._make_chunk(lines, metadata)
+                    lines, last, used, chunk_start = [], None, 0, None
+
+                if last is not None and last.speaker == piece.speaker:
+                    last.texts.append(piece.text)
+                    if piece.end is not None:
+                        last.end = piece.end
+                else:
+                    last = _Line(piece.speaker, start, piece.end, [piece.text])
+                    lines.append(last)
+                used += cost
+                if chunk_start is None:
+                    chunk_start = start
+
+        if lines:
+            yield self._make_chunk(lines, metadata)
+
+
+def _render(speaker: Optional[str], start: Optional[float], text: str) -> str:
+    if start is None:
+        return f"{speaker}: {text}" if speaker else text
+    if speaker:
+        return f"{speaker} [{format_timestamp(start)}]: {text}"
+    return f"[{format_timestamp(start)}]: {text}"
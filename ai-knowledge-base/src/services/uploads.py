@@ -0,0 +1,233 @@
+from contextlib import aclosing
+from dataclasses import dataclass
+from fastapi import HTTPException, Request, Response, UploadFile
+from fastapi.routing import APIRoute
+from starlette.datastructures import FormData
+from starlette.formparsers import MultiPartException, MultiPartParser
+from starlette.types import Message
+from typing import Any, Callable, Coroutine, Optional
+import asyncio
+import hashlib
+import os
+import threading
+import uuid
+
+from src.services.metrics import span
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def spool_dir() -> str:
+    path = os.environ.get("UPLOAD_SPOOL_DIR", "./data/uploads")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def max_request_bytes() -> int:
+    return int(os.environ.get("UPLOAD_MAX_REQUEST_BYTES", str(1024 * 1024 * 1024)))
+
+
+def max_inflight_bytes() -> int:
+    return int(os.environ.get("UPLOAD_MAX_INFLIGHT_BYTES", str(4 * 1024 * 1024 * 1024)))
+
+
+class _InflightBudget:
+    """Bytes currently being spooled across all requests of this process"""
+
+    def __init__(self) -> None:
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: int) -> bool:
+        with self._lock:
+            if self.used + amount > max_inflight_bytes():
+                return False
+            self.used += amount
+            return True
+
+    def release(self, amount: int) -> None:
+        with self._lock:
+            self.used -= amount
+
+
+_inflight = _InflightBudget()
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail="Upload exceeds the request size limit")
+
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Server is receiving too many uploads, please retry later",
+        headers={"Retry-After": "5"}
+    )
+
+
+class SpoolFile:
+    """File in the spool directory that hashes the data written to it.
+
+    It is removed on close unless `keep()` was called, so files of rejected
+    requests do not accumulate.
+    """
+
+    def __init__(self, suffix: str = "") -> None:
+        self.path = os.path.join(spool_dir(), f"{uuid.uuid4().hex}{suffix}")
+        self._file = open(self.path, "w+b")
+        self._digest = hashlib.sha256()
+        self._kept = False
+
+    @property
+    def sha256(self) -> str:
+        return self._digest.hexdigest()
+
+    def write(self, data: bytes) -> int:
+        self._digest.update(data)
+        return self._file.write(data)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def keep(self) -> None:
+        self._kept = True
+
+    def close(self) -> None:
+        self._file.close()
+        if not self._kept:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+class _SpoolingMultiPartParser(MultiPartParser):
+    """Writes file parts straight into the spool directory rather than to temporary files"""
+
+    # Relies on MultiPartParser internals (_current_part, _files_to_close_on_error); see the
+    # starlette pin in requirements.txt
+    def on_headers_finished(self) -> None:
+        super().on_headers_finished()
+        upload = self._current_part.file
+        if upload is not None:
+            self._files_to_close_on_error.remove(upload.file)
+            upload.file.close()
+            upload.file = SpoolFile(os.path.splitext(upload.filename or "")[1])
+            self._files_to_close_on_error.append(upload.file)
+
+
+class UploadRoute(APIRoute):
+    """Route class for upload endpoints: admits a request before its body is read.
+
+    Requests over UPLOAD_MAX_REQUEST_BYTES are rejected with 413 and, while
+    the process is already receiving UPLOAD_MAX_INFLIGHT_BYTES, new ones with
+    503 so the client can retry later. Both limits are checked against
+    Content-Length up front and against the bytes actually received. The
+    multipart body is then parsed once, with files written to the spool
+    directory, where `spool_upload` keeps them.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def admit_upload(request: Request) -> Response:
+            limit = max_request_bytes()
+            declared = request.headers.get("content-length", "")
+            reserved = int(declared) if declared.isdigit() else 0
+            if reserved > limit:
+                raise _too_large()
+            if not _inflight.reserve(reserved):
+                raise _busy()
+            received = 0
+
+            async def receive() -> Message:
+                nonlocal received, reserved
+                message = await request.receive()
+                if message["type"] == "http.request":
+                    received += len(message.get("body", b""))
+                    if received > limit:
+                        raise _too_large()
+                    if received > reserved:
+                        if not _inflight.reserve(received - reserved):
+                            raise _busy()
+                        reserved = received
+                return message
+
+            form: Optional[FormData] = None
+            try:
+                admitted = Request(request.scope, receive)
+                if admitted.headers.get("content-type", "").startswith("multipart/form-data"):
+                    try:
+                        with span("upload_read"):
+                            async with aclosing(admitted.stream()) as stream:
+                                form = await _SpoolingMultiPartParser(admitted.headers, stream).parse()
+                    except MultiPartException as e:
+                        raise HTTPException(status_code=400, detail=e.message)
+                    # Request.form() returns the parsed form instead of reading the body again
+                    admitted._form = form
+                return await handler(admitted)
+            finally:
+                _inflight.release(reserved)
+                if form is not None:
+                    await form.close()
+
+        return admit_upload
+
+
+@dataclass
+class SpooledUpload:
+    path: str
+    size: int
+    sha256: str
+
+
+async def spool_upload(file: UploadFile, max_bytes: Optional[int] = None) -> SpooledUpload:
+    """Keep an upload in the spool directory and return its path, size and hash.
+
+    Files parsed by UploadRoute are already there and hashed. Others are
+    streamed there in fixed-size chunks, so only one chunk is held in memory
+    at a time. Uploads larger than `max_bytes` (default
+    UPLOAD_MAX_REQUEST_BYTES) are rejected with 413.
+    """
+    limit = max_request_bytes() if max_bytes is None else max_bytes
+    if isinstance(file.file, SpoolFile):
+        spooled = file.file
+        if file.size > limit:
+            await file.close()
+            raise _too_large()
+        spooled.keep()
+        await file.close()
+        return SpooledUpload(path=spooled.path, size=file.size, sha256=spooled.sha256)
+
+    suffix = os.path.splitext(file.filename or "")[1]
+    path = os.path.join(spool_dir(), f"{uuid.uuid4().hex}{suffix}")
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        with span("upload_read"), open(path, "wb") as out:
+            while True:
+                chunk = await file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    raise _too_large()
+                digest.update(chunk)
+                await asyncio.to_thread(out.write, chunk)
+    except BaseException:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        raise
+    finally:
+        await file.close()
+
+    return SpooledUpload(path=path, size=size, sha256=digest.hexdigest())
@@ -0,0 +1,129 @@
+from typing import Dict, Optional
+import logging
+import os
+import threading
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+from src.services.bm25 import BM25Index
+from src.services.chroma_client import chroma_server, collection_metadata, get_chroma_client
+from src.services.embeddings import get_embeddings
+from src.services.hybrid_retriever import HybridRetriever
+from src.services.indexed_store import IndexedVectorStore
+from src.services.reranker import RerankingRetriever, get_reranker
+
+logger = logging.getLogger(__name__)
+
+_collections: Dict[str, IndexedVectorStore] = {}
+_vectorstore_lock = threading.Lock()
+
+DEFAULT_COLLECTION = "langchain"
+
+BACKENDS = ("chroma", "chroma-http", "local")
+
+
+def persist_directory() -> str:
+    return os.environ.get("CHROMA_PERSIST_DIR", "./chroma_db")
+
+
+def vector_backend() -> str:
+    """VECTOR_BACKEND, defaulting to the Chroma server when one is configured"""
+    backend = os.environ.get("VECTOR_BACKEND") or ("chroma-http" if chroma_server() else "chroma")
+    backend = backend.lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown vector backend '{backend}'. Available: {', '.join(BACKENDS)}")
+    return backend
+
+
+def bm25_index_path(collection_name: str, directory: Optional[str] = None) -> str:
+    directory = os.environ.get("BM25_INDEX_DIR") or os.path.join(directory or persist_directory(), "bm25")
+    return os.path.join(directory, f"{collection_name}.sqlite3")
+
+
+def _backend_store(backend: str, collection_name: str, embedding_function: Embeddings, directory: str) -> VectorStore:
+    if backend == "local":
+        from src.services.local_vectorstore import LocalVectorStore
+        return LocalVectorStore(
+            os.path.join(directory, "local", collection_name),
+            embedding_function,
+            index_type=os.environ.get("LOCAL_INDEX_TYPE", "ivf"),
+            nlist=int(os.environ.get("LOCAL_IVF_NLIST", "0")),
+            nprobe=int(os.environ.get("LOCAL_IVF_NPROBE", "16")),
+            min_train=int(os.environ.get("LOCAL_IVF_MIN_TRAIN", "10000")),
+            quantization=os.environ.get("LOCAL_QUANTIZATION", "none"),
+            pq_subspaces=int(os.environ.get("LOCAL_PQ_SUBSPACES", "0")),
+            rescore_factor=int(os.environ.get("LOCAL_RESCORE_FACTOR", "4")),
+        )
+
+    from langchain_chroma import Chroma
+    client = get_chroma_client("http" if backend == "chroma-http" else "persistent", directory)
+    return Chroma(
+        collection_name=collection_name,
+        embedding_function=embedding_function,
+        client=client,
+        collection_metadata=collection_metadata(),
+    )
+
+
+def open_vectorstore(
+    collection_name: str = DEFAULT_COLLECTION,
+    embedding_function: Optional[Embeddings] = None,
+    directory: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> IndexedVectorStore:
+    """Collection on the configured backend with its BM25 index, persisted under `directory`"""
+    directory = directory or persist_directory()
+    store = _backend_store(backend or vector_backend(), collection_name, embedding_function or get_embeddings(), directory)
+    return IndexedVectorStore(
+        store,
+        BM25Index(bm25_index_path(collection_name, directory)),
+        upsert_batch_size=int(os.environ.get("VECTOR_UPSERT_BATCH_SIZE", "1000")),
+    )
+
+
+def get_vectorstore(collection_name: str = DEFAULT_COLLECTION) -> IndexedVectorStore:
+    """Process-wide collection persisted under CHROMA_PERSIST_DIR"""
+    vectorstore = _collections.get(collection_name)
+    if vectorstore is None:
+        with _vectorstore_lock:
+            vectorstore = _collections.get(collection_name)
+            if vectorstore is None:
+                vectorstore = open_vectorstore(collection_name)
+                _collections[collection_name] = vectorstore
+    return vectorstore
+
+
+def warm_up_vectorstore() -> None:
+    """Open the backend client once at startup so the first request does not pay for it"""
+    backend = vector_backend()
+    if backend == "local":
+        return
+    try:
+        get_chroma_client("http" if backend == "chroma-http" else "persistent", persist_directory()).heartbeat()
+    except Exception as e:
+        logger.warning(f"Vector store warm-up failed: {str(e)}")
+
+
+def hybrid_retriever(vectorstore: IndexedVectorStore, k: Optional[int] = None) -> HybridRetriever:
+    """Dense + BM25 retriever over a collection, sized by RETRIEVER_K / RETRIEVER_FETCH_K"""
+    return HybridRetriever(
+        vectorstore=vectorstore,
+        bm25_index=vectorstore.bm25_index,
+        k=k or int(os.environ.get("RETRIEVER_K", "4")),
+        fetch_k=int(os.environ.get("RETRIEVER_FETCH_K", "20")),
+    )
+
+
+def build_retriever(vectorstore: IndexedVectorStore) -> BaseRetriever:
+    """Hybrid retrieval followed by the configured reranking stage, if any"""
+    reranker = get_reranker()
+    if reranker is None:
+        return hybrid_retriever(vectorstore)
+    candidates = int(os.environ.get("RERANK_CANDIDATES", "12"))
+    return RerankingRetriever(base_retriever=hybrid_retriever(vectorstore, k=candidates), reranker=reranker)
+
+
+def get_retriever(collection_name: str = DEFAULT_COLLECTION) -> BaseRetriever:
+    return build_retriever(get_vectorstore(collection_name))
@@ -0,0 +1,381 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import logging
+import os
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+RASTER_TYPES = ("image/png", "image/jpeg", "image/jpg")
+
+# Long side the perceptual hash is computed from
+HASH_SIDE = 64
+
+# A page number, its size and a function rendering it at a given long side
+LazyPage = Tuple[int, Tuple[float, float], Callable[[int], Image.Image]]
+
+# Gemini bills an image of up to 384px per side as one 258-token tile and
+# crops larger images into 768x768 tiles of 258 tokens each
+VISION_TILE_TOKENS = 258
+
+
+@dataclass
+class VisionSettings:
+    """Size limits for the images sent to the vision model"""
+    overview_side: int = 768
+    tile_size: int = 768
+    tile_overlap: int = 64
+    max_tiles: int = 4
+    max_pdf_pages: int = 20
+
+    @classmethod
+    def from_env(cls) -> "VisionSettings":
+        return cls(
+            overview_side=int(os.environ.get("WIREFRAME_OVERVIEW_SIDE", "768")),
+            tile_size=int(os.environ.get("WIREFRAME_TILE_SIZE", "768")),
+            tile_overlap=int(os.environ.get("WIREFRAME_TILE_OVERLAP", "64")),
+            max_tiles=int(os.environ.get("WIREFRAME_MAX_TILES", "4")),
+            max_pdf_pages=int(os.environ.get("WIREFRAME_MAX_PDF_PAGES", "20")),
+        )
+
+
+def _svg_length(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    for unit in ("px", "pt", "mm", "cm", "in"):
+        value = value[:-len(unit)] if value.endswith(unit) else value
+    try:
+        return float(value)
+    except ValueError:
+        # Percentages and other relative lengths
+        return None
+
+
+def svg_dimensions(path: str) -> Optional[Tuple[int, int]]:
+    """Width and height of an SVG from its root element (width/height, else viewBox)"""
+    for _, element in ElementTree.iterparse(path, events=("start",)):
+        width, height = _svg_length(element.get("width")), _svg_length(element.get("height"))
+        if (width is None or height is None) and element.get("viewBox"):
+            parts = element.get("viewBox").replace(",", " ").split()
+            if len(parts) == 4:
+                width, height = width or float(parts[2]), height or float(parts[3])
+        return (round(width), round(height)) if width and height else None
+    return None
+
+
+def read_dimensions(path: str, content_type: str) -> Optional[Tuple[int, int]]:
+    """Image size from the file header; pixel data is never decoded.
+
+    Raises ValueError for files that are not valid images of their type.
+    """
+    if content_type == "image/svg+xml":
+        try:
+            return svg_dimensions(path)
+        except ElementTree.ParseError as e:
+            raise ValueError(f"Invalid SVG: {str(e)}")
+    if content_type in RASTER_TYPES:
+        try:
+            # Image.open only parses the header
+            with Image.open(path) as image:
+                return image.size
+        except Exception as e:
+            raise ValueError(f"Invalid image: {str(e)}")
+    return None
+
+
+def open_scaled(path: str, max_side: int) -> Image.Image:
+    """Decode an image at (close to) the size it is needed at.
+
+    JPEGs are decoded by libjpeg at 1/2, 1/4 or 1/8 scale via draft(), so a
+    20-megapixel export never exists at full size in memory.
+    """
+    with Image.open(path) as image:
+        if image.format == "JPEG":
+            image.draft("RGB", (max_side, max_side))
+        image = image.convert("RGB") if image.mode not in ("RGB", "L") else image.copy()
+    if max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.LANCZOS, reducing_gap=2.0)
+    return image
+
+
+def iter_pdf_pages(path: str, max_pages: int = 0) -> Iterator[LazyPage]:
+    """PDF pages as lazy handles; a page is only rasterized when its handle is called, at the size asked for"""
+    # pypdfium2 ships with Docling
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(path)
+    try:
+        count = len(pdf) if not max_pages else min(len(pdf), max_pages)
+        for index in range(count):
+            page = pdf[index]
+            try:
+                width, height = page.get_size()
+
+                def render(side: int, page=page, longest=max(width, height, 1)) -> Image.Image:
+                    return page.render(scale=side / longest).to_pil().convert("RGB")
+
+                yield index + 1, (width, height), render
+            finally:
+                page.close()
+    finally:
+        pdf.close()
+
+
+def dhash(image: Image.Image, size: int = 8) -> int:
+    """64-bit difference hash: the sign of horizontal gradients on a 9x8 grayscale thumbnail"""
+    small = np.asarray(image.convert("L").resize((size + 1, size), Image.BILINEAR), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return np.unpackbits(values.view(np.uint8)).reshape(len(values), -1).sum(axis=1)
+
+
+def _to_signed(value: int) -> int:
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+@dataclass
+class VisionImage:
+    """One image prepared for the vision model"""
+    kind: str
+    page: int
+    width: int
+    height: int
+    path: str
+    box: Optional[Tuple[int, int, int, int]] = None
+
+    @property
+    def tokens(self) -> int:
+        return VISION_TILE_TOKENS
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "page": self.page,
+            "width": self.width,
+            "height": self.height,
+            "path": self.path,
+            "box": list(self.box) if self.box else None,
+        }
+
+
+@dataclass
+class PreparedWireframe:
+    pages: int = 0
+    duplicate_pages: Dict[int, str] = field(default_factory=dict)
+    images: List[VisionImage] = field(default_factory=list)
+    # (page, perceptual hash) of the new pages, recorded once the upload is indexed
+    hashes: List[Tuple[int, int]] = field(default_factory=list)
+
+    @property
+    def is_duplicate(self) -> bool:
+        return self.pages > 0 and len(self.duplicate_pages) == self.pages
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "pages": self.pages,
+            "duplicate_pages": len(self.duplicate_pages),
+            "duplicate_of": sorted(set(self.duplicate_pages.values())),
+            "vision_images": len(self.images),
+            "vision_tokens": sum(image.tokens for image in self.images),
+        }
+
+
+class PerceptualHashIndex:
+    """Perceptual hashes of every wireframe page already prepared for analysis.
+
+    Hashes are stored in SQLite so all worker processes share them; each
+    process keeps them in a numpy array and only reads rows added since its
+    last lookup. A lookup is one XOR and popcount over that array.
+    """
+
+    def __init__(self, path: str, max_distance: int = 6) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_distance = max_distance
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                id INTEGER PRIMARY KEY, hash INTEGER NOT NULL, sha256 TEXT, source TEXT NOT NULL,
+                page INTEGER NOT NULL, created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS hashes_sha256 ON hashes (sha256);
+        """)
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._hashes = np.zeros(0, dtype=np.uint64)
+        self._labels: List[str] = []
+        self._last_id = 0
+
+    def _refresh(self) -> None:
+        rows = self._db.execute(
+            "SELECT id, hash, source, page FROM hashes WHERE id > ? ORDER BY id", (self._last_id,)
+        ).fetchall()
+        if rows:
+            new = np.array([value for _, value, _, _ in rows], dtype=np.int64).view(np.uint64)
+            self._hashes = np.concatenate([self._hashes, new])
+            self._labels.extend(f"{source}#page={page}" if page else source for _, _, source, page in rows)
+            self._last_id = rows[-1][0]
+
+    def find(self, value: int) -> Optional[str]:
+        """The closest stored page within `max_distance` bits, if any"""
+        with self._lock:
+            self._refresh()
+            if not len(self._hashes):
+                return None
+            distances = _popcount(self._hashes ^ np.uint64(value))
+            best = int(np.argmin(distances))
+            return self._labels[best] if distances[best] <= self.max_distance else None
+
+    def find_file(self, sha256: str) -> Optional[str]:
+        """A previously indexed upload with exactly the same bytes"""
+        with self._lock:
+            row = self._db.execute("SELECT source FROM hashes WHERE sha256 = ? LIMIT 1", (sha256,)).fetchone()
+        return row[0] if row else None
+
+    def add(self, value: int, source: str, page: int = 0, sha256: Optional[str] = None) -> None:
+        self.add_many([(page, value)], source, sha256)
+
+    def add_many(self, hashes: Sequence[Tuple[int, int]], source: str, sha256: Optional[str] = None) -> None:
+        """Record the (page, hash) pairs of one upload in a single transaction"""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO hashes (hash, sha256, source, page, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(_to_signed(value), sha256, source, page, now) for page, value in hashes],
+            )
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+
+
+_hash_index: Optional[PerceptualHashIndex] = None
+_hash_index_lock = threading.Lock()
+
+
+def get_hash_index() -> PerceptualHashIndex:
+    global _hash_index
+    if _hash_index is None:
+        with _hash_index_lock:
+            if _hash_index is None:
+                path = os.environ.get("WIREFRAME_HASH_INDEX") or os.path.join(
+                    os.environ.get("CHROMA_PERSIST_DIR", "./chroma_db"), "wireframe_hashes.sqlite3"
+                )
+                _hash_index = PerceptualHashIndex(path, int(os.environ.get("WIREFRAME_DEDUPE_DISTANCE", "6")))
+    return _hash_index
+
+
+def tile_boxes(width: int, height: int, tile: int, overlap: int) -> List[Tuple[int, int, int, int]]:
+    """Overlapping tile boxes covering a width x height image"""
+    def starts(length: int) -> List[int]:
+        if length <= tile:
+            return [0]
+        step = tile - overlap
+        positions = list(range(0, length - tile, step))
+        return positions + [length - tile]
+
+    return [(x, y, min(x + tile, width), min(y + tile, height)) for y in starts(height) for x in starts(width)]
+
+
+class WireframePreprocessor:
+    """Turn an uploaded wireframe into the few, small images worth sending to the vision model.
+
+    Every image or PDF page becomes one overview scaled to `overview_side`.
+    Pages with more detail than the overview can show are also cut into
+    `tile_size` tiles at the highest resolution that fits in `max_tiles`.
+    Pages whose perceptual hash is within the index's distance of an
+    already prepared page are skipped, so re-exported and near-identical
+    designs are not analyzed again.
+    """
+
+    def __init__(self, output_dir: str, hash_index: PerceptualHashIndex, settings: Optional[VisionSettings] = None) -> None:
+        self.output_dir = output_dir
+        self.hash_index = hash_index
+        self.settings = settings or VisionSettings()
+
+    def detail_side(self, width: float, height: float) -> int:
+        """Long side of the largest image of this aspect ratio that `max_tiles` tiles cover"""
+        s = self.settings
+        side = s.tile_size * s.max_tiles
+        ratio = min(width, height) / max(width, height, 1)
+        while side > s.overview_side and len(tile_boxes(side, int(side * ratio), s.tile_size, s.tile_overlap)) > s.max_tiles:
+            side = int(side * 0.9)
+        return max(side, s.overview_side)
+
+    def _save(self, image: Image.Image, name: str) -> str:
+        path = os.path.join(self.output_dir, name)
+        image.save(path, format="PNG")
+        return path
+
+    def _page_images(self, page: int, image: Image.Image) -> List[VisionImage]:
+        s = self.settings
+        overview = image.copy()
+        overview.thumbnail((s.overview_side, s.overview_side), Image.LANCZOS, reducing_gap=2.0)
+        images = [VisionImage("overview", page, *overview.size, self._save(overview, f"page-{page}-overview.png"))]
+
+        # Detail the overview cannot show; `image` is already at the tile budget's resolution
+        boxes = tile_boxes(*image.size, s.tile_size, s.tile_overlap)
+        if len(boxes) > 1:
+            for index, box in enumerate(boxes):
+                tile = image.crop(box)
+                images.append(VisionImage(
+                    "tile", page, *tile.size, self._save(tile, f"page-{page}-tile-{index}.png"), box=box
+                ))
+        return images
+
+    def _pages(self, path: str, content_type: str) -> Iterator[LazyPage]:
+        if content_type == "application/pdf":
+            yield from iter_pdf_pages(path, self.settings.max_pdf_pages)
+        elif content_type in RASTER_TYPES:
+            yield 0, read_dimensions(path, content_type), lambda side: open_scaled(path, side)
+        # No rasterizer for SVG; the dimensions from its header are all we get
+
+    def prepare(self, path: str, content_type: str, source: str, sha256: Optional[str] = None) -> PreparedWireframe:
+        """Hash each page from a tiny render and only render new pages at full detail.
+
+        Nothing is written to the hash index here: the caller records the new
+        pages with `record` once the upload is indexed, so a retried job is not
+        taken for a duplicate of its own failed attempt.
+        """
+        result = PreparedWireframe()
+        duplicate = self.hash_index.find_file(sha256) if sha256 else None
+        os.makedirs(self.output_dir, exist_ok=True)
+        for page, size, render in self._pages(path, content_type):
+            result.pages += 1
+            if duplicate:
+                result.duplicate_pages[page] = duplicate
+                continue
+            value = dhash(render(HASH_SIDE))
+            match = self.hash_index.find(value)
+            if match is None:
+                # Near-identical pages within this upload
+                match = next((
+                    f"{source}#page={seen}" if seen else source for seen, other in result.hashes
+                    if bin(other ^ value).count("1") <= self.hash_index.max_distance
+                ), None)
+            if match is not None:
+                result.duplicate_pages[page] = match
+                continue
+            result.images.extend(self._page_images(page, render(self.detail_side(*size))))
+            result.hashes.append((page, value))
+        logger.info(f"Wireframe prepared: {source} {result.as_dict()}")
+        return result
+
+    def record(self, result: PreparedWireframe, source: str, sha256: Optional[str] = None) -> None:
+        """Add the new pages of a prepared upload to the hash index"""
+        if result.hashes:
+            self.hash_index.add_many(result.hashes, source, sha256)
@@ -0,0 +1,40 @@
+"""Selective-term BM25 search on small and filtered corpora."""
+import os
+
+from src.services.bm25 import BM25Index
+
+
+def make_index(tmp_path, chunks, **kwargs) -> BM25Index:
+    index = BM25Index(os.path.join(tmp_path, "bm25.sqlite3"), **kwargs)
+    index.add([f"chunk-{i}" for i in range(len(chunks))], chunks)
+    return index
+
+
+def test_small_corpus_keeps_every_query_term(tmp_path):
+    index = make_index(tmp_path, [
+        "Ms. Hubert's afterschool program survey results",
+        "Survey of parents about the afterschool schedule",
+        "Quarterly budget review",
+    ])
+    results = index.search("Ms. Hubert", k=5)
+    assert [document.id for document, _ in results] == ["chunk-0"]
+
+
+def test_terms_missing_from_the_index_do_not_displace_common_ones(tmp_path):
+    chunks = [f"Hubert met the client about ticket {i}" if i % 5 == 0 else f"Routine note number {i}" for i in range(100)]
+    # Filter even this small corpus: "hubert" is in 20% of the chunks, above the 10% threshold
+    index = make_index(tmp_path, chunks, max_term_doc_fraction=0.1, min_filtered_docs=0)
+    results = index.search("Hubert xyzzy", k=50)
+    assert sorted(document.id for document, _ in results) == sorted(f"chunk-{i}" for i in range(0, 100, 5))
+
+
+def test_common_terms_are_dropped_in_favour_of_selective_ones(tmp_path):
+    chunks = [f"project update {i}" for i in range(99)] + ["project kickoff with Hubert"]
+    index = make_index(tmp_path, chunks, max_term_doc_fraction=0.1, min_filtered_docs=0)
+    results = index.search("project Hubert", k=5)
+    assert [document.id for document, _ in results] == ["chunk-99"]
+
+
+def test_query_without_indexed_terms_returns_nothing(tmp_path):
+    index = make_index(tmp_path, [f"note {i}" for i in range(10)], min_filtered_docs=0)
+    assert index.search("xyzzy plugh", k=5) == []
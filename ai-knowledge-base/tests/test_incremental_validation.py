@@ -0,0 +1,65 @@
+"""Re-validation reuses the outcomes of rules and reviews of unchanged sections."""
+import asyncio
+import random
+
+from langchain_core.language_models.fake import FakeListLLM
+
+from src.modules.validate.incremental import IncrementalValidator, SectionReviewer
+from src.modules.validate.rules import RuleEngine, default_rule_sets
+
+KEYS = ["executive_summary", "project_overview", "scope_of_work", "timeline", "budget_estimate", "notes"]
+VALUES = ["", None, [], "text", ["item"], 3]
+
+
+def validate(validator, *args, **kwargs):
+    result = asyncio.run(validator.validate(*args, **kwargs))
+    return result, result.pop("incremental")
+
+
+def test_edits_give_the_same_result_as_a_full_validation():
+    engine = RuleEngine(default_rule_sets())
+    validator = IncrementalValidator(engine)
+    rng = random.Random(0)
+    content = {}
+    for _ in range(300):
+        key = rng.choice(KEYS)
+        if key in content and rng.random() < 0.3:
+            del content[key]
+        else:
+            content[key] = rng.choice(VALUES)
+        result, _ = validate(validator, "doc-1", "proposal", dict(content))
+        assert result == engine.validate("proposal", content), content
+
+
+def test_unchanged_sections_reuse_rule_outcomes():
+    validator = IncrementalValidator(RuleEngine(default_rule_sets()))
+    content = {key: "text" for key in KEYS}
+    _, first = validate(validator, "doc-1", "proposal", content)
+    assert not first["cached"] and first["rules_reused"] == 0
+
+    _, same = validate(validator, "doc-1", "proposal", dict(content))
+    assert same["cached"] and same["changed_sections"] == [] and same["rules_evaluated"] == 0
+
+    result, edited = validate(validator, "doc-1", "proposal", {**content, "timeline": ""})
+    assert edited["changed_sections"] == ["timeline"]
+    assert 0 < edited["rules_evaluated"] < first["rules_evaluated"]
+    assert not result["is_valid"]
+
+
+def test_another_document_type_is_not_served_from_the_cache():
+    validator = IncrementalValidator(RuleEngine(default_rule_sets()))
+    validate(validator, "doc-1", "proposal", {"summary": "text"})
+    _, other = validate(validator, "doc-1", "jira_ticket", {"summary": "text"})
+    assert not other["cached"]
+
+
+def test_only_changed_sections_are_reviewed_again():
+    llm = FakeListLLM(responses=["OK", "The timeline has no dates."] * 10)
+    validator = IncrementalValidator(RuleEngine(default_rule_sets()), reviewer=SectionReviewer(llm))
+    content = {"executive_summary": "We build a portal.", "timeline": "Soon."}
+    _, first = validate(validator, "doc-1", "proposal", content)
+    assert first["reviews_run"] == 2
+
+    _, edited = validate(validator, "doc-1", "proposal", {**content, "timeline": "Q3, then Q4."})
+    assert edited["reviews_run"] == 1
+    assert validator.metrics.reviews_reused == 1
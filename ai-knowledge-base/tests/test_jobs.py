@@ -0,0 +1,83 @@
+"""Job claims, leases and retries on a store shared by several workers."""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import time
+
+from src.services.jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue, JobStore, job_handler
+
+attempts = []
+
+
+@job_handler("test-flaky")
+def flaky(payload, progress):
+    attempts.append(payload["name"])
+    if len(attempts) < payload["fail_times"] + 1:
+        raise RuntimeError("temporary failure")
+    return {"name": payload["name"]}
+
+
+def make_store(tmp_path) -> JobStore:
+    return JobStore(os.path.join(tmp_path, "jobs.sqlite3"))
+
+
+def test_each_job_is_claimed_by_exactly_one_worker(tmp_path):
+    store = make_store(tmp_path)
+    for i in range(20):
+        store.insert("test-flaky", {"name": f"job-{i}"}, max_attempts=1)
+
+    # One connection per worker, as separate processes would have
+    stores = [make_store(tmp_path) for _ in range(4)]
+
+    def drain(worker_store):
+        claimed = []
+        while True:
+            job = worker_store.claim_next(f"worker-{id(worker_store)}", lease_seconds=60)
+            if job is None:
+                return claimed
+            claimed.append(job.id)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        claims = [job_id for claimed in executor.map(drain, stores) for job_id in claimed]
+    assert len(claims) == len(set(claims)) == 20
+    assert all(job.status == RUNNING and job.attempts == 1 for job in store.list(limit=20))
+
+
+def test_only_jobs_with_an_expired_lease_are_requeued(tmp_path):
+    store = make_store(tmp_path)
+    alive = store.insert("test-flaky", {"name": "alive"}, max_attempts=1)
+    crashed = store.insert("test-flaky", {"name": "crashed"}, max_attempts=1)
+    store.claim_next("worker-a", lease_seconds=60)
+    store.claim_next("worker-b", lease_seconds=0.01)
+    time.sleep(0.05)
+
+    assert store.renew_leases("worker-a", lease_seconds=60) == 1
+    assert store.requeue_expired() == 1
+    assert store.get(alive.id).status == RUNNING
+    requeued = store.get(crashed.id)
+    assert (requeued.status, requeued.owner) == (QUEUED, None)
+
+    # The requeued job is claimed again, counting a second attempt
+    assert store.claim_next("worker-a", lease_seconds=60).attempts == 2
+
+
+def test_failed_job_is_retried_until_it_succeeds(tmp_path):
+    attempts.clear()
+    queue = JobQueue(make_store(tmp_path), backoff_seconds=0)
+    job = queue.submit("test-flaky", {"name": "retry", "fail_times": 2}, max_attempts=3)
+
+    for _ in range(3):
+        queue._run(queue.store.claim_next(queue.owner, queue.lease_seconds))
+    job = queue.get(job.id)
+    assert (job.status, job.attempts, job.result) == (SUCCEEDED, 3, {"name": "retry"})
+
+
+def test_job_fails_after_max_attempts(tmp_path):
+    attempts.clear()
+    queue = JobQueue(make_store(tmp_path), backoff_seconds=0)
+    job = queue.submit("test-flaky", {"name": "broken", "fail_times": 5}, max_attempts=2)
+
+    for _ in range(2):
+        queue._run(queue.store.claim_next(queue.owner, queue.lease_seconds))
+    job = queue.get(job.id)
+    assert (job.status, job.attempts, job.error) == (FAILED, 2, "temporary failure")
+    assert queue.store.claim_next(queue.owner, queue.lease_seconds) is None
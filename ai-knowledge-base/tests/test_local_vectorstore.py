@@ -0,0 +1,73 @@
+"""The memory-mapped local store keeps its index, codes and deletes across reopens."""
+import numpy as np
+import pytest
+from langchain_core.embeddings import FakeEmbeddings
+
+from src.services.local_vectorstore import LocalVectorStore
+
+DIM = 32
+ROWS = 1200
+CONFIGS = [("flat", "none"), ("ivf", "none"), ("ivf", "int8"), ("ivf", "pq")]
+
+
+def open_store(directory, index_type, quantization) -> LocalVectorStore:
+    return LocalVectorStore(
+        str(directory), FakeEmbeddings(size=DIM), index_type=index_type, nlist=8, nprobe=8, min_train=500,
+        quantization=quantization,
+    )
+
+
+def populate(store: LocalVectorStore) -> np.ndarray:
+    vectors = np.random.default_rng(0).standard_normal((ROWS, DIM)).astype(np.float32)
+    ids = [f"chunk-{i}" for i in range(ROWS)]
+    store.add_embeddings([f"text {i}" for i in range(ROWS)], vectors, [{"n": i} for i in range(ROWS)], ids)
+    return vectors
+
+
+def nearest(store: LocalVectorStore, vector: np.ndarray, k: int = 1):
+    return [document.id for document, _ in store.similarity_search_with_score_by_vector(vector.tolist(), k=k)]
+
+
+@pytest.mark.parametrize("index_type,quantization", CONFIGS)
+def test_reopened_store_finds_the_same_neighbours(tmp_path, index_type, quantization):
+    store = open_store(tmp_path, index_type, quantization)
+    vectors = populate(store)
+    footprint = store.footprint()
+    before = [nearest(store, vectors[i], k=5) for i in range(0, ROWS, 97)]
+
+    reopened = open_store(tmp_path, index_type, quantization)
+    assert len(reopened) == ROWS
+    assert reopened.footprint() == footprint
+    assert [nearest(reopened, vectors[i], k=5) for i in range(0, ROWS, 97)] == before
+    assert all(nearest(reopened, vectors[i]) == [f"chunk-{i}"] for i in range(0, ROWS, 97))
+    if index_type == "ivf":
+        assert reopened._centroids is not None
+    if quantization == "pq":
+        assert reopened._codebooks is not None
+
+
+@pytest.mark.parametrize("index_type,quantization", CONFIGS)
+def test_deletes_and_replacements_survive_a_reopen(tmp_path, index_type, quantization):
+    store = open_store(tmp_path, index_type, quantization)
+    vectors = populate(store)
+    store.delete([f"chunk-{i}" for i in range(0, 100)])
+    # chunk-200 moves to the position of chunk-300
+    store.add_embeddings(["moved"], vectors[300:301], [{"n": 200}], ["chunk-200"])
+
+    reopened = open_store(tmp_path, index_type, quantization)
+    assert len(reopened) == ROWS - 100
+    for i in range(0, 100, 9):
+        assert f"chunk-{i}" not in nearest(reopened, vectors[i], k=10)
+    assert nearest(reopened, vectors[200], k=ROWS).count("chunk-200") == 1
+    assert set(nearest(reopened, vectors[300], k=2)) == {"chunk-200", "chunk-300"}
+    assert reopened.get(limit=1)["ids"] == ["chunk-100"]
+
+
+def test_other_instances_see_writes(tmp_path):
+    writer, reader = open_store(tmp_path, "ivf", "int8"), open_store(tmp_path, "ivf", "int8")
+    vectors = populate(writer)
+    assert nearest(reader, vectors[42]) == ["chunk-42"]
+
+    writer.delete(["chunk-42"])
+    assert "chunk-42" not in nearest(reader, vectors[42], k=10)
+    assert len(reader) == ROWS - 1
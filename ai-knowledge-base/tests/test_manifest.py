@@ -0,0 +1,95 @@
+"""Incremental ingest skips unchanged files and removes the chunks of changed or deleted ones."""
+import os
+
+import pytest
+from langchain_core.embeddings import FakeEmbeddings
+
+from src.services.local_vectorstore import LocalVectorStore
+from src.services.manifest import IngestManifest, chunk_id_prefix, hash_file, params_key
+
+KEY = params_key({"chunker": "structure", "chunk_size": 1000})
+
+
+def write(path, text: str) -> str:
+    with open(path, "w") as f:
+        f.write(text)
+    return str(path)
+
+
+def test_plan_sorts_sources_into_unchanged_changed_and_removed(tmp_path):
+    same = write(tmp_path / "same.md", "# Same\n\nUnchanged text.\n")
+    edited = write(tmp_path / "edited.md", "# Edited\n\nFirst version.\n")
+    gone = str(tmp_path / "gone.md")
+    manifest = IngestManifest(str(tmp_path / "manifest.json"))
+    for source, chunk_ids in ((same, ["s-0"]), (edited, ["e-0", "e-1"]), (gone, ["g-0"])):
+        manifest.record(source, hash_file(source) if os.path.exists(source) else "deleted", KEY, chunk_ids)
+    manifest.save()
+
+    write(edited, "# Edited\n\nSecond version.\n")
+    new = write(tmp_path / "new.md", "# New\n")
+    plan = IngestManifest(str(tmp_path / "manifest.json")).plan([same, edited, new], KEY)
+
+    assert plan.unchanged == [same]
+    assert plan.to_ingest == [edited, new]
+    assert plan.removed == [gone]
+    assert plan.stale_chunk_ids == {edited: ["e-0", "e-1"], gone: ["g-0"]}
+    assert plan.content_hashes[edited] == hash_file(edited)
+
+
+def test_changed_parameters_reingest_everything(tmp_path):
+    source = write(tmp_path / "a.md", "# A\n")
+    manifest = IngestManifest(str(tmp_path / "manifest.json"))
+    manifest.record(source, hash_file(source), KEY, ["a-0"])
+
+    plan = manifest.plan([source], params_key({"chunker": "structure", "chunk_size": 500}))
+    assert plan.to_ingest == [source] and plan.stale_chunk_ids == {source: ["a-0"]}
+
+
+def test_partial_listing_keeps_missing_sources(tmp_path):
+    first, second = write(tmp_path / "a.md", "# A\n"), write(tmp_path / "b.md", "# B\n")
+    manifest = IngestManifest(str(tmp_path / "manifest.json"))
+    for source in (first, second):
+        manifest.record(source, hash_file(source), KEY, [f"{source}-0"])
+
+    plan = manifest.plan([first], KEY, content_hashes={first: hash_file(first)}, prune_missing=False)
+    assert (plan.unchanged, plan.removed) == ([first], [])
+
+
+def test_unreadable_manifest_starts_empty(tmp_path):
+    path = write(tmp_path / "manifest.json", "{not json")
+    source = write(tmp_path / "a.md", "# A\n")
+    assert IngestManifest(path).plan([source], KEY).to_ingest == [source]
+
+
+def test_chunk_id_prefix_changes_with_content_and_parameters():
+    prefix = chunk_id_prefix("a.md", "hash-1", KEY)
+    assert prefix == chunk_id_prefix("a.md", "hash-1", KEY)
+    assert len({prefix, chunk_id_prefix("a.md", "hash-2", KEY), chunk_id_prefix("a.md", "hash-1", "other")}) == 3
+
+
+def test_ingest_incrementally_updates_the_store(tmp_path):
+    pytest.importorskip("docling")
+    from src.services.ingestion import ingest_incrementally
+
+    store = LocalVectorStore(str(tmp_path / "store"), FakeEmbeddings(size=16), index_type="flat")
+    manifest = IngestManifest(str(tmp_path / "manifest.json"))
+    kept = write(tmp_path / "kept.md", "# Kept\n\nThis file never changes.\n")
+    edited = write(tmp_path / "edited.txt", "The first version of this file.\n")
+    removed = write(tmp_path / "removed.txt", "This file is deleted later.\n")
+    params = {"chunker": "structure"}
+
+    plan, report = ingest_incrementally([kept, edited, removed], store, manifest, params, max_workers=1)
+    assert len(plan.to_ingest) == 3 and report.files_loaded == 3
+    first_ids = {source: manifest.get(source)["chunk_ids"] for source in (kept, edited, removed)}
+    assert len(store) == sum(len(ids) for ids in first_ids.values())
+
+    write(edited, "The second version of this file.\n")
+    os.remove(removed)
+    manifest = IngestManifest(str(tmp_path / "manifest.json"))
+    plan, report = ingest_incrementally([kept, edited], store, manifest, params, max_workers=1)
+    assert (plan.unchanged, plan.to_ingest, plan.removed) == ([kept], [edited], [removed])
+
+    live = set(store.get()["ids"])
+    assert set(first_ids[kept]) <= live
+    assert not live & (set(first_ids[edited]) | set(first_ids[removed]))
+    assert "second version" in " ".join(store.get()["documents"])
@@ -0,0 +1,43 @@
+"""The cached RAG chain streams from sync and async callers alike."""
+import asyncio
+
+from langchain_core.documents import Document as LCDocument
+from langchain_core.language_models.fake import FakeStreamingListLLM
+from langchain_core.runnables import RunnableLambda
+
+from src.services.rag import build_rag_chain
+from src.services.response_cache import ResponseCache
+
+DOCS = [LCDocument(page_content="The kickoff is on March 3rd.", metadata={"chunk_id": "doc-1"}, id="doc-1")]
+
+
+def make_chain(responses):
+    llm = FakeStreamingListLLM(responses=responses)
+    cache = ResponseCache(max_entries=16)
+    return build_rag_chain(RunnableLambda(lambda question: DOCS), llm, cache=cache), llm, cache
+
+
+async def collect(chain, question):
+    return [token async for token in chain.astream(question)]
+
+
+def test_astream_misses_then_hits_the_cache():
+    chain, llm, cache = make_chain(["March 3rd", "a different answer"])
+
+    miss = asyncio.run(collect(chain, "When is the kickoff?"))
+    assert "".join(miss) == "March 3rd"
+    assert len(miss) > 1
+    assert len(cache) == 1
+
+    # A second LLM call would answer differently; the cached answer comes back in one piece
+    hit = asyncio.run(collect(chain, "When is the kickoff?"))
+    assert hit == ["March 3rd"]
+    assert (cache.metrics.exact_hits, cache.metrics.misses) == (1, 1)
+
+
+def test_ainvoke_and_sync_stream_share_the_cache():
+    chain, _, cache = make_chain(["March 3rd", "a different answer"])
+
+    assert asyncio.run(chain.ainvoke("When is the kickoff?")) == "March 3rd"
+    assert "".join(chain.stream("When is the kickoff?")) == "March 3rd"
+    assert len(cache) == 1
@@ -0,0 +1,62 @@
+"""Cached responses are dropped when the chunks they were built from change."""
+import os
+
+from src.services import bm25
+from src.services.bm25 import BM25Index
+from src.services.response_cache import ResponseCache
+
+PARAMS = {"model": "test", "temperature": 0.0}
+
+
+def test_invalidate_documents_drops_only_entries_using_them():
+    cache = ResponseCache()
+    cache.store("When is the kickoff?", ["doc-1", "doc-2"], PARAMS, "March 3rd")
+    cache.store("Who is the client?", ["doc-3"], PARAMS, "Acme")
+
+    assert cache.invalidate_documents(["doc-2"]) == 1
+    assert cache.lookup("When is the kickoff?", ["doc-1", "doc-2"], PARAMS) is None
+    assert cache.lookup("Who is the client?", ["doc-3"], PARAMS).value == "Acme"
+
+
+def test_change_feed_from_another_connection_invalidates(tmp_path):
+    path = os.path.join(tmp_path, "bm25.sqlite3")
+    reader, writer = BM25Index(path), BM25Index(path)
+    writer.add(["doc-1", "doc-2"], ["kickoff on March 3rd", "client is Acme"])
+
+    cache = ResponseCache()
+    cache.watch(reader)
+    cache.store("When is the kickoff?", ["doc-1"], PARAMS, "March 3rd")
+    cache.store("Who is the client?", ["doc-2"], PARAMS, "Acme")
+
+    # Another process re-ingests doc-1 through its own connection
+    writer.add(["doc-1"], ["kickoff moved to March 10th"])
+    assert cache.lookup("When is the kickoff?", ["doc-1"], PARAMS) is None
+    assert cache.lookup("Who is the client?", ["doc-2"], PARAMS).value == "Acme"
+
+
+def test_adding_new_chunks_keeps_cached_entries(tmp_path):
+    index = BM25Index(os.path.join(tmp_path, "bm25.sqlite3"))
+    index.add(["doc-1"], ["kickoff on March 3rd"])
+    cache = ResponseCache()
+    cache.watch(index)
+    cache.store("When is the kickoff?", ["doc-1"], PARAMS, "March 3rd")
+
+    index.add(["doc-2"], ["client is Acme"])
+    assert cache.lookup("When is the kickoff?", ["doc-1"], PARAMS).value == "March 3rd"
+
+
+def test_trimmed_change_log_clears_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(bm25, "CHANGE_LOG_SIZE", 2)
+    index = BM25Index(os.path.join(tmp_path, "bm25.sqlite3"))
+    index.add(["doc-1", "doc-2", "doc-3", "doc-4"], ["one", "two", "three", "four"])
+    index.delete(["doc-4"])
+    cache = ResponseCache()
+    cache.watch(index)
+    cache.store("Who is the client?", ["doc-3"], PARAMS, "Acme")
+
+    # doc-3 is untouched, but the log keeps fewer changes than happened since `watch`
+    index.delete(["doc-1", "doc-2"])
+    index.add(["doc-5"], ["five"])
+    index.delete(["doc-5"])
+    assert cache.lookup("Who is the client?", ["doc-3"], PARAMS) is None
+    assert len(cache) == 0
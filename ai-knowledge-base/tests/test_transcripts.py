@@ -0,0 +1,103 @@
+"""SRT/WebVTT cue parsing and transcript chunk bounds."""
+import io
+import re
+
+from src.services import transcripts
+from src.services.context_packer import estimate_tokens
+from src.services.transcripts import TranscriptChunker, Turn, iter_turns, transcript_format
+
+VTT = """WEBVTT
+Kind: captions
+
+NOTE This block is a comment
+with two lines
+
+STYLE
+::cue { color: yellow }
+
+intro
+00:00:01.000 --> 00:00:04.500 align:start
+<v Alice>Welcome, everyone.</v>
+
+00:00:04.500 --> 00:00:06.000
+
+00:00:06.000 --> 00:00:09.250
+<v.loud Bob>Thanks <b>Alice</b>,
+glad to be here.</v>
+
+01:02:03.5 --> 01:02:04.25
+Carol: Last point.
+"""
+
+SRT = """1
+00:00:01,000 --> 00:00:02,000
+Alice: First line
+continues here
+
+2
+00:00:02,000 --> 00:00:03,000
+<i></i>
+
+3
+00:00:03,000 --> 00:00:04,000
+Plain caption
+"""
+
+
+def parse(text: str, fmt: str):
+    return [(turn.speaker, turn.text, turn.start, turn.end) for turn in iter_turns(io.BytesIO(text.encode()), fmt)]
+
+
+def test_vtt_cues_skip_header_note_style_and_empty_cues():
+    assert parse(VTT, "vtt") == [
+        ("Alice", "Welcome, everyone.", 1.0, 4.5),
+        ("Bob", "Thanks Alice, glad to be here.", 6.0, 9.25),
+        ("Carol", "Last point.", 3723.5, 3724.25),
+    ]
+
+
+def test_srt_cues_with_crlf_line_endings_and_a_bom():
+    expected = [
+        ("Alice", "First line continues here", 1.0, 2.0),
+        (None, "Plain caption", 3.0, 4.0),
+    ]
+    assert parse(SRT, "srt") == expected
+    crlf = ("\ufeff" + SRT.replace("\n", "\r\n")).encode()
+    assert [(t.speaker, t.text, t.start, t.end) for t in iter_turns(io.BytesIO(crlf), "srt")] == expected
+
+
+def test_cues_across_window_boundaries(monkeypatch):
+    monkeypatch.setattr(transcripts, "_WINDOW_SIZE", 64)
+    cues = "".join(f"{i}\n00:00:{i:02d},000 --> 00:00:{i:02d},500\nLine {i}\n\n" for i in range(40))
+    assert [text for _, text, _, _ in parse(cues, "srt")] == [f"Line {i}" for i in range(40)]
+
+
+def test_format_detection():
+    assert transcript_format("meeting.VTT") == "vtt"
+    assert transcript_format(content_type="application/x-subrip") == "srt"
+    assert transcript_format(head=b"\xef\xbb\xbfWEBVTT\n\n") == "vtt"
+    assert transcript_format(head=b"1\n00:00:01,000 --> 00:00:02,000\nHi\n") == "srt"
+    assert transcript_format(head=b"Alice: hello") == "text"
+
+
+def test_chunks_respect_token_and_time_bounds():
+    turns = [Turn(f"Sentence number {i} about the roadmap.", "Alice" if i % 3 else "Bob", i * 5.0, i * 5.0 + 4) for i in range(200)]
+    chunker = TranscriptChunker(max_tokens=60, max_seconds=30.0)
+    chunks = list(chunker.chunk(turns, {"source": "call.vtt"}))
+
+    sentences = [re.findall(r"Sentence number \d+ about the roadmap\.", chunk.page_content) for chunk in chunks]
+    assert [sentence for found in sentences for sentence in found] == [turn.text for turn in turns]
+    for chunk, found in zip(chunks, sentences):
+        assert chunk.metadata["source"] == "call.vtt"
+        assert sum(estimate_tokens(sentence) for sentence in found) <= 60
+        # Turns starting within 30 s of the chunk's first turn, each lasting 4 s
+        assert chunk.metadata["end_seconds"] - chunk.metadata["start_seconds"] <= 30.0 + 4
+    assert chunks[0].page_content.startswith("Bob [00:00:00]: Sentence number 0")
+
+
+def test_long_turn_is_split_at_sentences():
+    text = " ".join(f"This is sentence {i} of a long monologue." for i in range(50))
+    chunks = list(TranscriptChunker(max_tokens=40).chunk([Turn(text, "Alice", 0.0, 60.0)]))
+    assert len(chunks) > 1
+    assert all(chunk.page_content.rstrip().endswith(".") for chunk in chunks)
+    assert " ".join(chunk.page_content.split(": ", 1)[1] for chunk in chunks) == text
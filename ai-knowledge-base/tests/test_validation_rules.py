@@ -0,0 +1,121 @@
+"""The compiled rule engine against the hand-written validators it replaced.
+
+The reference functions below are the `_validate_*` coroutines of
+src/modules/validate/controller.py before the rule engine, made synchronous.
+Run from ai-knowledge-base/:
+
+    python -m pytest tests
+"""
+from typing import Any, Dict, List
+import random
+
+from src.modules.validate.rules import RuleEngine, default_rule_sets, get_rule_engine
+
+DOCUMENTS = 1600
+DOCUMENT_TYPES = ["proposal", "technical_doc", "jira_ticket", "email", "unknown"]
+KEYS = [
+    "executive_summary", "project_overview", "scope_of_work", "timeline", "budget_estimate",
+    "summary", "description", "priority", "acceptance_criteria", "ticket_type", "notes",
+]
+# Falsy and truthy values the old `not content[key]` checks distinguish
+VALUES = ["", None, [], {}, 0, False, "text", ["item"], {"a": 1}, 3, True, "story", "task"]
+
+
+def _validate_proposal(content: Dict[str, Any]) -> Dict[str, Any]:
+    issues = []
+    suggestions = []
+    score = 100.0
+    for section in ["executive_summary", "project_overview", "scope_of_work", "timeline", "budget_estimate"]:
+        if section not in content or not content[section]:
+            issues.append({
+                "type": "missing_section",
+                "severity": "high",
+                "message": f"Required section '{section}' is missing or empty"
+            })
+            score -= 20.0
+    if not issues:
+        suggestions.append("Consider adding client testimonials or case studies")
+        suggestions.append("Include detailed project milestones")
+    return {"is_valid": len(issues) == 0, "score": max(0.0, score), "issues": issues, "suggestions": suggestions}
+
+
+def _validate_technical_doc(content: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "is_valid": True,
+        "score": 100.0,
+        "issues": [],
+        "suggestions": ["Consider adding code examples", "Include diagrams or flowcharts"],
+    }
+
+
+def _validate_jira_ticket(content: Dict[str, Any]) -> Dict[str, Any]:
+    issues = []
+    suggestions = []
+    score = 100.0
+    for field in ["summary", "description", "priority"]:
+        if field not in content or not content[field]:
+            issues.append({
+                "type": "missing_field",
+                "severity": "medium",
+                "message": f"Required field '{field}' is missing"
+            })
+            score -= 15.0
+    if content.get("ticket_type") == "story" and "acceptance_criteria" not in content:
+        suggestions.append("User stories should include acceptance criteria")
+    return {
+        "is_valid": len([i for i in issues if i["severity"] == "high"]) == 0,
+        "score": max(0.0, score),
+        "issues": issues,
+        "suggestions": suggestions,
+    }
+
+
+def _validate_generic(content: Dict[str, Any]) -> Dict[str, Any]:
+    issues = []
+    score = 85.0
+    if not content:
+        issues.append({"type": "empty_content", "severity": "high", "message": "Document content is empty"})
+        score = 0.0
+    return {
+        "is_valid": len(issues) == 0,
+        "score": score,
+        "issues": issues,
+        "suggestions": ["Consider using specific document type validation"],
+    }
+
+
+LEGACY = {
+    "proposal": _validate_proposal,
+    "technical_doc": _validate_technical_doc,
+    "jira_ticket": _validate_jira_ticket,
+}
+
+
+def legacy_validate(document_type: str, content: Dict[str, Any]) -> Dict[str, Any]:
+    return LEGACY.get(document_type, _validate_generic)(content)
+
+
+def random_documents(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    documents = []
+    for _ in range(count):
+        keys = rng.sample(KEYS, rng.randint(0, len(KEYS)))
+        documents.append({
+            "document_type": rng.choice(DOCUMENT_TYPES),
+            "content": {key: rng.choice(VALUES) for key in keys},
+        })
+    return documents
+
+
+def test_default_rules_match_legacy_validators():
+    engine = RuleEngine(default_rule_sets())
+    for document in random_documents(DOCUMENTS):
+        expected = legacy_validate(document["document_type"], document["content"])
+        assert engine.validate(document["document_type"], document["content"]) == expected, document
+
+
+def test_batch_matches_single_document_results():
+    engine = get_rule_engine()
+    documents = random_documents(DOCUMENTS, seed=1)
+    expected = [legacy_validate(document["document_type"], document["content"]) for document in documents]
+    assert engine.validate_many(documents) == expected
@@ -0,0 +1,44 @@
+"""Wireframe deduplication only counts uploads that finished indexing."""
+import os
+
+from PIL import Image, ImageDraw
+
+from src.services.wireframes import PerceptualHashIndex, VisionSettings, WireframePreprocessor
+
+
+def make_wireframe(path: str, boxes: int) -> str:
+    image = Image.new("RGB", (1200, 800), "white")
+    draw = ImageDraw.Draw(image)
+    for i in range(boxes):
+        draw.rectangle((40 + i * 110, 60 + (i % 3) * 200, 120 + i * 110, 220 + (i % 3) * 200), fill="black")
+    image.save(path, format="PNG")
+    return path
+
+
+def test_retry_of_an_unrecorded_upload_is_not_a_duplicate(tmp_path):
+    index = PerceptualHashIndex(os.path.join(tmp_path, "hashes.sqlite3"))
+    preprocessor = WireframePreprocessor(os.path.join(tmp_path, "images"), index, VisionSettings())
+    path = make_wireframe(os.path.join(tmp_path, "login.png"), boxes=6)
+
+    first = preprocessor.prepare(path, "image/png", "login.png", "sha-login")
+    # The job failed before `record`: its retry must prepare the page again
+    retry = preprocessor.prepare(path, "image/png", "login.png", "sha-login")
+    assert not first.is_duplicate and not retry.is_duplicate
+    assert len(index) == 0
+
+    preprocessor.record(retry, "login.png", "sha-login")
+    again = preprocessor.prepare(path, "image/png", "login-copy.png", "sha-login")
+    assert again.is_duplicate
+    assert again.as_dict()["duplicate_of"] == ["login.png"]
+
+
+def test_near_identical_upload_is_a_duplicate_once_recorded(tmp_path):
+    index = PerceptualHashIndex(os.path.join(tmp_path, "hashes.sqlite3"))
+    preprocessor = WireframePreprocessor(os.path.join(tmp_path, "images"), index, VisionSettings())
+    original = make_wireframe(os.path.join(tmp_path, "a.png"), boxes=6)
+    preprocessor.record(preprocessor.prepare(original, "image/png", "a.png", "sha-a"), "a.png", "sha-a")
+
+    # Same design re-exported (different bytes, same layout)
+    Image.open(original).convert("RGB").save(os.path.join(tmp_path, "b.jpg"), format="JPEG", quality=80)
+    result = preprocessor.prepare(os.path.join(tmp_path, "b.jpg"), "image/jpeg", "b.jpg", "sha-b")
+    assert result.is_duplicate